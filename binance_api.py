@@ -1,17 +1,25 @@
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, Optional, Union
 
 import aiohttp
-import ujson
+from utils import deadline
 from utils.error import *
-from ujson import JSONDecodeError
+from utils.breaker import CircuitBreakers
+from utils.codec import JsonCodec, SchemaError, get_codec
+from utils.concurrency import AdaptiveConcurrency, endpoint_class
 from utils.auth import ed25519_signature, hmac_hashing, rsa_signature
 from utils.format import cleanNoneValue, encoded_string
+from utils.limiter import OrderCountLimiter, RateLimiter
+from utils.metrics import Metrics
+from utils.transport import AiohttpTransport, Transport
 from utils.util import get_timestamp
-from aiohttp.client import ClientTimeout
-from aiohttp.client_reqrep import ClientResponse
+from utils.weights import ORDER_PATHS, request_weight
 from types import TracebackType
 
+# binance default, a deadline never widens it
+RECV_WINDOW = 5000
 
 
 class BinanceBase:
@@ -31,23 +39,50 @@ class BinanceBase:
         show_header: bool = False,
         private_key: Optional[str] = None,
         private_key_pass: Optional[str] = None,
+        codec: Union[str, JsonCodec, None] = None,
+        typed_responses: bool = False,
+        session: Optional[aiohttp.ClientSession] = None,
+        transport: Optional[Transport] = None,
+        weight_limiter: Optional[RateLimiter] = None,
+        order_limiter: Optional[OrderCountLimiter] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        metrics: Optional[Metrics] = None,
+        order_tracker: Optional[Any] = None,
+        prewarm_connections: int = 0,
+        heartbeat_interval: Optional[float] = None,
     ) -> None:
         self.api_key = api_key
         self.api_secret = api_secret
         self.base_url = base_url
         self.timeout = timeout
+        # total seconds per request, without it a hanging request would wait for aiohttp's 5 minute default
+        self.request_timeout = timeout or 15
         self.proxies = proxies
         self.show_limit_usage = show_limit_usage
         self.show_header = show_header
         self.private_key = private_key
         self.private_key_pass = private_key_pass
-        self.session = aiohttp.ClientSession(
-            headers={
-                "Content-Type": "application/json;charset=utf-8",
-                "User-Agent": "binance-connector-python/" + self.__version__,
-                "X-MBX-APIKEY": api_key,
-            }
-        )
+        # typed_responses: decode hot endpoints (depth, book_ticker, klines) into utils.codec types
+        self.codec = get_codec(codec)
+        self.typed_responses = typed_responses
+        # the api key is sent per request, so a session or transport can be shared between accounts
+        self._owns_transport = transport is None
+        self.transport = transport or AiohttpTransport(session)
+        self._default_headers = self.default_headers()
+        self.session = getattr(self.transport, "session", None)
+        self.weight_limiter = weight_limiter
+        self.order_limiter = order_limiter
+        self.concurrency = concurrency
+        self.breakers = breakers
+        self.metrics = metrics
+        # engine.OrderTracker, timestamps every stage of order entry
+        self.order_tracker = order_tracker
+        # opened by __aenter__, then kept alive with pings while the client is idle
+        self.prewarm_connections = prewarm_connections
+        self.heartbeat_interval = heartbeat_interval
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._last_request = 0.0
 
         if show_limit_usage:
             self.show_limit_usage = True
@@ -60,13 +95,25 @@ class BinanceBase:
 
         self._logger = logging.getLogger(__name__)
 
+    @classmethod
+    def default_headers(cls) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json;charset=utf-8",
+            "User-Agent": "binance-connector-python/" + cls.__version__,
+        }
+
     def check_credential(self) -> bool:
         if self.api_key and self.api_secret:
             return True
         return False
 
-    async def query(self, url_path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
-        return await self.send_request("GET", url_path, payload=payload)
+    def get_timestamp(self) -> int:
+        return get_timestamp()
+
+    async def query(
+        self, url_path: str, payload: Optional[Dict[str, Any]] = None, schema: Optional[str] = None
+    ) -> Any:
+        return await self.send_request("GET", url_path, payload=payload, schema=schema)
 
     async def _get_sign(self, payload: str) -> str:
         if self.private_key:
@@ -82,87 +129,230 @@ class BinanceBase:
     ) -> Any:
         if payload is None:
             payload = {}
-        payload["timestamp"] = get_timestamp()
+        with deadline.deadline(payload.pop("deadline", None)):
+            tracker = self.order_tracker
+            key = tracker.begin(http_method, url_path, payload) if tracker is not None else None
+            if key is None:
+                return await self._request(http_method, url_path, payload, None, True)
+            with tracker.bind(key):
+                return await self._request(http_method, url_path, payload, None, True)
+
+    async def _sign(self, http_method: str, url_path: str, payload: Dict[str, Any]) -> None:
+        # called once the limiters let the request through, so a throttled request
+        # is not sent with a timestamp that went stale while it waited
+        left = deadline.remaining()
+        if left is not None:
+            deadline.check("sign")
+            if payload.get("recvWindow") is None:
+                # the exchange drops the request once the deadline has passed
+                payload["recvWindow"] = min(max(int(left * 1000), 1), RECV_WINDOW)
+        payload["timestamp"] = self.get_timestamp()
         query_string = self._prepare_params(payload)
         payload["signature"] = await self._get_sign(query_string)
-        print(f"sign is {payload}")
-        return await self.send_request(http_method, url_path, payload)
+        if self.order_tracker is not None:
+            self.order_tracker.stage_current("signed")
 
     async def send_request(
-        self, http_method: str, url_path: str, payload: Optional[Dict[str, Any]] = None
+        self,
+        http_method: str,
+        url_path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        schema: Optional[str] = None,
     ) -> Any:
+        """Send a request; a `deadline` (seconds) in the payload bounds every phase of it,
+        see utils.deadline."""
+
         if payload is None:
             payload = {}
+        with deadline.deadline(payload.pop("deadline", None)):
+            return await self._request(http_method, url_path, payload, schema, False)
+
+    async def _request(
+        self, http_method: str, url_path: str, payload: Dict[str, Any], schema: Optional[str], signed: bool
+    ) -> Any:
+        if deadline.remaining() is None:
+            return await self._send(http_method, url_path, payload, schema, signed)
+        endpoint = http_method + " " + url_path
+        try:
+            result = await self._send(http_method, url_path, payload, schema, signed)
+        except DeadlineExceededError as e:
+            if self.metrics is not None:
+                self.metrics.increment("deadline.exceeded." + e.phase, endpoint)
+            raise
+        if self.metrics is not None:
+            self.metrics.observe("deadline.leftover", endpoint, deadline.remaining())
+        return result
+
+    async def _send(
+        self, http_method: str, url_path: str, payload: Dict[str, Any], schema: Optional[str], signed: bool
+    ) -> Any:
+        breaker = None
+        if self.breakers is not None:
+            # fail fast before waiting on any limiter, the trial is taken after them
+            breaker = self.breakers.breaker(http_method, url_path)
+            breaker.check()
+
+        if self.weight_limiter is not None and url_path.startswith("/api/"):
+            await self.weight_limiter.acquire(request_weight(http_method, url_path, payload))
+        is_order = self.order_limiter is not None and (http_method, url_path) in ORDER_PATHS
+        if is_order:
+            await self.order_limiter.acquire()
+
+        if self.concurrency is None:
+            params = await self._params(http_method, url_path, payload, signed)
+            return await self._guarded_http(breaker, http_method, params, schema, is_order)
+        async with self.concurrency.slot(endpoint_class(http_method, url_path, signed), self.weight_limiter):
+            params = await self._params(http_method, url_path, payload, signed)
+            return await self._guarded_http(breaker, http_method, params, schema, is_order)
+
+    async def _params(self, http_method: str, url_path: str, payload: Dict[str, Any], signed: bool) -> Dict[str, Any]:
+        if signed:
+            await self._sign(http_method, url_path, payload)
         url = self.base_url + url_path
+        query_string = self._prepare_params(payload)
+        if query_string:
+            url += "?" + query_string
         self._logger.debug("url: " + url)
-        params = cleanNoneValue(
-            {
-                "url": url,
-                "params": self._prepare_params(payload),
-                "timeout": self.timeout,
-                "proxy": self.proxies,
-            }
+        return {
+            # already encoded (and signed), must not be quoted again
+            "url": url,
+            "proxy": self.proxies,
+            "headers": {**self._default_headers, "X-MBX-APIKEY": self.api_key} if self.api_key else self._default_headers,
+        }
+
+    async def _guarded_http(
+        self, breaker: Any, http_method: str, params: Dict[str, Any], schema: Optional[str], is_order: bool
+    ) -> Any:
+        if breaker is None:
+            return await self._http(http_method, params, schema, is_order)
+        breaker.allow()
+        start = time.monotonic()
+        try:
+            result = await self._http(http_method, params, schema, is_order)
+        except BaseException as e:
+            breaker.record(time.monotonic() - start, e)
+            raise
+        breaker.record(time.monotonic() - start)
+        return result
+
+    async def _http(self, http_method: str, params: Dict[str, Any], schema: Optional[str], is_order: bool) -> Any:
+        left = deadline.remaining()
+        if left is None:
+            return await self._response(http_method, params, self.request_timeout, schema, is_order)
+        deadline.check("http")
+        total = min(left, self.request_timeout)
+        try:
+            return await self._response(http_method, params, total, schema, is_order)
+        except asyncio.TimeoutError:
+            if total < self.request_timeout:
+                raise DeadlineExceededError("http", -deadline.remaining()) from None
+            raise
+
+    async def _response(
+        self, http_method: str, params: Dict[str, Any], timeout: float, schema: Optional[str], is_order: bool
+    ) -> Any:
+        if self.order_tracker is not None:
+            self.order_tracker.stage_current("sent")
+        response = await self.transport.request(http_method, timeout=timeout, **params)
+        self._last_request = time.monotonic()
+        if self.order_tracker is not None:
+            self.order_tracker.stage_current("ack", None if response.status < 400 else "REJECTED")
+        if self.weight_limiter is not None:
+            self.weight_limiter.update(response.headers)
+        if is_order:
+            self.order_limiter.update(response.headers)
+        body = response.body
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug("raw response from server:" + body.decode(errors="replace"))
+        self._handle_exception(response.status, body, response.headers)
+
+        try:
+            data = self.codec.decode(body, schema if self.typed_responses else None)
+        except SchemaError as e:
+            # same fallback for every codec: the plain JSON the typed schema didn't fit
+            self._logger.warning("typed decoding failed, returning plain JSON: %s", e)
+            data = self.codec.loads(body)
+        except ValueError:
+            data = body.decode()
+
+        result = {}
+
+        if self.show_limit_usage:
+            limit_usage = {}
+            for key in response.headers.keys():
+                key = key.lower()
+                if (
+                    key.startswith("x-mbx-used-weight")
+                    or key.startswith("x-mbx-order-count")
+                    or key.startswith("x-sapi-used")
+                ):
+                    limit_usage[key] = response.headers[key]
+            result["limit_usage"] = limit_usage
+
+        if self.show_header:
+            result["header"] = response.headers
+
+        if len(result) != 0:
+            result["data"] = data
+            return result
+        return data
+
+    async def prewarm(self, connections: Optional[int] = None) -> int:
+        """Open connections ahead of the first real request (dns, tcp and tls setup) with
+        concurrent pings of weight 1, return how many succeeded."""
+
+        count = connections or self.prewarm_connections or 1
+        results = await asyncio.gather(
+            *(self.send_request("GET", "/api/v3/ping") for _ in range(count)), return_exceptions=True
         )
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            self._logger.warning("prewarm: %d of %d pings failed: %r", len(errors), count, errors[0])
+        return count - len(errors)
 
-        timeout = ClientTimeout(total=15)
-        async with getattr(self.session, http_method.lower())(**params) as response:
-            response_data = await response.json()
+    async def _heartbeat(self, interval: float) -> None:
+        # one ping (weight 1, through weight_limiter) per idle interval keeps the most
+        # recently used connection open; the rest of a prewarmed pool may idle out
+        while True:
+            await asyncio.sleep(interval)
+            if time.monotonic() - self._last_request >= interval:
+                await self.prewarm(1)
 
-            self._logger.debug("raw response from server:" + await response.text())
-            # self._handle_exception(response)
+    def connection_health(self) -> Dict[Any, Dict[str, Any]]:
+        """Age, idle time, requests, last round trip and health of every pooled connection."""
 
-            try:
-                data = await response.json()
-            except ValueError:
-                data = await response.text()
-
-            result = {}
-
-            if self.show_limit_usage:
-                limit_usage = {}
-                for key in response.headers.keys():
-                    key = key.lower()
-                    if (
-                        key.startswith("x-mbx-used-weight")
-                        or key.startswith("x-mbx-order-count")
-                        or key.startswith("x-sapi-used")
-                    ):
-                        limit_usage[key] = response.headers[key]
-                result["limit_usage"] = limit_usage
-
-            if self.show_header:
-                result["header"] = response.headers
-
-            if len(result) != 0:
-                result["data"] = data
-                return result
-            logging.info(f"data is {data}")
-            return data
+        return self.transport.connection_stats()
 
     async def __aenter__(self) -> 'BinanceBase':
+        if self.prewarm_connections:
+            await self.prewarm()
+        if self.heartbeat_interval:
+            self._heartbeat_task = asyncio.ensure_future(self._heartbeat(self.heartbeat_interval))
         return self
 
     async def __aexit__(self, exc_type: Optional[type], exc_value: Optional[Exception], traceback: Optional[TracebackType]) -> None:
-        await self.session.close()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self._owns_transport:
+            await self.transport.close()
 
     def _prepare_params(self, params: Dict[str, Any]) -> str:
         return encoded_string(cleanNoneValue(params))
 
-    def _handle_exception(self, response: ClientResponse) -> None:
-        status_code = response.status
+    def _handle_exception(self, status_code: int, body: bytes, headers: Any) -> None:
         if status_code < 400:
             return
+        text = body.decode(errors="replace")
         if 400 <= status_code < 500:
             try:
-                err = ujson.loads(response.text)
-            except JSONDecodeError:
-                raise ClientError(
-                    status_code, None, response.text, None, response.headers
-                )
-            error_data = None
-            if "data" in err:
-                error_data = err["data"]
+                err = self.codec.loads(body)
+            except ValueError:
+                raise ClientError(status_code, None, text, headers)
+            if not isinstance(err, dict):
+                # JSON from a proxy or WAF rather than the API
+                raise ClientError(status_code, None, text, headers)
             raise ClientError(
-                status_code, err["code"], err["msg"], response.headers, error_data
+                status_code, err.get("code"), err.get("msg", text), headers, err.get("data")
             )
-        raise ServerError(status_code, response.text)
+        raise ServerError(status_code, text)
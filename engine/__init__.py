@@ -0,0 +1,38 @@
+import importlib
+from typing import Any, List
+
+from engine._pool import AccountPool
+from engine._shard import ShardedClient
+from engine._replay import MatchingSimulator, ReplayBase, ReplayStore
+from engine._reconcile import Reconciler
+from engine._scan import ActivityScanner, merge_by_time
+from engine._kill_switch import KillSwitch
+from engine._quoter import QuoteEngine
+from engine._order_lists import OrderListManager
+from engine._wallet_cache import WalletMetadata
+
+# engines built on numpy, imported on first use so the others work without it
+_NUMPY_ENGINES = {
+    "engine._market_snapshot": ("MarketSnapshot", "SnapshotDiff", "plan_requests"),
+    "engine._klines": ("ATR", "EMA", "RSI", "SMA", "VWAP", "Bar", "BarSeries", "Indicator", "KlineEngine"),
+    "engine._trade_bars": ("BAR_DTYPE", "TradeArrays", "TradeBarBuilder", "agg_trade_pages"),
+    "engine._bus": ("MarketDataBus", "Subscription"),
+    "engine._shm_cache": ("MarketDataFeeder", "SharedMarketData"),
+    "engine._order_tracker": ("OrderTracker",),
+    "engine._valuation": ("PortfolioValuation",),
+    "engine._snapshots": ("SnapshotHistory",),
+}
+_LAZY = {name: module for module, names in _NUMPY_ENGINES.items() for name in names}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
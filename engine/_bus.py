@@ -0,0 +1,185 @@
+import asyncio
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from engine._market_snapshot import MAX_SYMBOLS_PER_REQUEST
+
+
+def _field(book: Any, name: str) -> Any:
+    return book[name] if isinstance(book, dict) else getattr(book, name)
+
+
+class Subscription:
+    """Latest book ticker of each subscribed symbol that changed since the last read.
+
+    Updates are conflated: a symbol holds one pending value however many updates
+    arrive, so a slow consumer skips intermediate quotes instead of queueing them.
+
+    async for books in bus.subscribe(["BTCUSDT", "ETHUSDT"]):
+        for symbol, book in books.items():
+            ...
+    """
+
+    def __init__(self, bus: "MarketDataBus", symbols: Iterable[str]) -> None:
+        self.bus = bus
+        self.symbols = frozenset(symbols)
+        self.closed = False
+        self.pending: Dict[str, Any] = {}
+        # updates that replaced a pending value before it was read
+        self.conflated = 0
+        self._ready = asyncio.Event()
+
+    def _push(self, symbol: str, book: Any) -> None:
+        if symbol in self.pending:
+            self.conflated += 1
+        self.pending[symbol] = book
+        self._ready.set()
+
+    def latest(self, symbol: str) -> Any:
+        return self.bus.last.get(symbol)
+
+    def drain(self) -> Dict[str, Any]:
+        """Pending updates without waiting, possibly empty."""
+
+        pending, self.pending = self.pending, {}
+        self._ready.clear()
+        return pending
+
+    async def get(self) -> Dict[str, Any]:
+        """Wait for at least one update and return all pending ones."""
+
+        while not self.pending:
+            if self.closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        return self.drain()
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        return await self.get()
+
+    def update_symbols(self, symbols: Iterable[str]) -> None:
+        self.bus._reindex(self, frozenset(symbols))
+
+    def close(self) -> None:
+        self.bus._reindex(self, frozenset())
+        self.closed = True
+        self._ready.set()
+
+
+class MarketDataBus:
+    """In-process fan-out of best bid/ask to many subscribers.
+
+    One feeder (REST polling with `poll`, or bookTicker stream events passed to
+    `on_stream_event`) publishes; every Subscription interested in a symbol gets the
+    update conflated into its pending dict. The symbol -> subscribers index is rebuilt
+    copy-on-write when subscriptions change, so `publish` reads a tuple without any
+    locking and the cost of an update is one dict store per interested subscriber.
+
+    bus = MarketDataBus()
+    asyncio.ensure_future(bus.poll(client, interval=1))
+    sub = bus.subscribe(["BTCUSDT"])
+    books = await sub.get()
+    """
+
+    def __init__(self) -> None:
+        self.last: Dict[str, Any] = {}
+        self._index: Dict[str, Tuple[Subscription, ...]] = {}
+        self._update_ids: Dict[str, int] = {}
+        self.published = 0
+
+    def subscribe(self, symbols: Iterable[str], replay: bool = True) -> Subscription:
+        """Subscribe to symbols; with replay the last known values are pending at once."""
+
+        subscription = Subscription(self, ())
+        self._reindex(subscription, frozenset(symbols))
+        if replay:
+            for symbol in subscription.symbols:
+                if symbol in self.last:
+                    subscription._push(symbol, self.last[symbol])
+        return subscription
+
+    def _reindex(self, subscription: Subscription, symbols: frozenset) -> None:
+        index = dict(self._index)
+        for symbol in subscription.symbols - symbols:
+            remaining = tuple(s for s in index.get(symbol, ()) if s is not subscription)
+            if remaining:
+                index[symbol] = remaining
+            else:
+                index.pop(symbol, None)
+        for symbol in symbols - subscription.symbols:
+            index[symbol] = index.get(symbol, ()) + (subscription,)
+        subscription.symbols = symbols
+        self._index = index
+
+    def symbols(self) -> Tuple[str, ...]:
+        """Symbols with at least one subscriber."""
+
+        return tuple(sorted(self._index))
+
+    def subscribers(self, symbol: str) -> int:
+        return len(self._index.get(symbol, ()))
+
+    def publish(self, symbol: str, book: Any) -> bool:
+        """Fan out a book ticker, unless bid and ask are unchanged; return whether it was sent."""
+
+        previous = self.last.get(symbol)
+        if previous is not None and all(
+            _field(previous, name) == _field(book, name) for name in ("bidPrice", "bidQty", "askPrice", "askQty")
+        ):
+            return False
+        self.last[symbol] = book
+        self.published += 1
+        for subscription in self._index.get(symbol, ()):
+            subscription._push(symbol, book)
+        return True
+
+    def on_stream_event(self, event: Dict[str, Any]) -> bool:
+        """Publish a <symbol>@bookTicker websocket event, dropping ones older than the last seen."""
+
+        symbol = event["s"]
+        update_id = event.get("u")
+        if update_id is not None:
+            if update_id <= self._update_ids.get(symbol, -1):
+                return False
+            self._update_ids[symbol] = update_id
+        book = {
+            "symbol": symbol,
+            "bidPrice": event["b"],
+            "bidQty": event["B"],
+            "askPrice": event["a"],
+            "askQty": event["A"],
+        }
+        return self.publish(symbol, book)
+
+    async def refresh(self, client: Any) -> int:
+        """Fetch book tickers of all subscribed symbols in as few requests as possible."""
+
+        symbols = self.symbols()
+        if not symbols:
+            return 0
+        if len(symbols) == 1:
+            books = [await client.book_ticker(symbol=symbols[0])]
+        elif len(symbols) > MAX_SYMBOLS_PER_REQUEST:
+            # all symbols cost the same weight (4) as a long symbols list
+            books = await client.book_ticker()
+        else:
+            books = await client.book_ticker(symbols=list(symbols))
+        wanted = self._index
+        return sum(
+            self.publish(_field(book, "symbol"), book) for book in books if _field(book, "symbol") in wanted
+        )
+
+    async def poll(self, client: Any, interval: float = 1.0, on_error: Optional[Any] = None) -> None:
+        """Refresh every interval seconds until cancelled; errors go to on_error or are raised."""
+
+        while True:
+            try:
+                await self.refresh(client)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+            await asyncio.sleep(interval)
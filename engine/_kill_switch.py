@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from engine._reconcile import OPEN_STATUSES
+from utils.error import ClientError
+
+# "Unknown order sent.", what DELETE /api/v3/openOrders answers when nothing is open
+NO_OPEN_ORDERS = -2011
+
+# results key of a failed open order sync
+SYNC = "*"
+
+
+class KillSwitch:
+    """Cancels every open order of the account as fast as the exchange allows.
+
+    `flatten` sends one cancel_open_orders per symbol that has open orders, all at
+    once, instead of one cancel_order per order. The symbols come from the in-memory
+    open order state: the last `sync` (GET /api/v3/openOrders, weight 80), kept
+    current by executionReport events passed to `on_execution_report`, and the open
+    orders of a Reconciler. The first flatten syncs when nothing did yet, since the
+    stream does not know orders placed before it started or by another process.
+
+    `websocket` is an optional WebSocket API connection, any object with a `connected`
+    flag and `async request(method, params)`; while it is connected the cancels go
+    over it ("openOrders.cancelAll"), falling back to REST per symbol on error.
+
+    With `arm(timeout)` it is also a dead man's switch: if `heartbeat` is not called
+    for timeout seconds, everything is cancelled and `on_fire` gets the result. A
+    failed sync or cancel is logged and retried with backoff up to `retries` times.
+
+    kill = KillSwitch(client, reconciler, on_fire=alert)
+    kill.arm(5)
+    while running:
+        kill.heartbeat()
+        ...
+    await kill.flatten()
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        reconciler: Any = None,
+        websocket: Any = None,
+        on_fire: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        retries: int = 5,
+        retry_delay: float = 0.5,
+    ) -> None:
+        self.client = client
+        self.reconciler = reconciler
+        self.websocket = websocket
+        self.on_fire = on_fire
+        self.retries = retries
+        self.retry_delay = retry_delay
+        # symbol -> orderIds open according to the user data stream
+        self.open: Dict[str, Set[int]] = {}
+        self.synced = False
+        self.fired = 0
+        self.timeout: Optional[float] = None
+        self._last_heartbeat = time.monotonic()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._logger = logging.getLogger(__name__)
+
+    # open order state
+
+    def on_execution_report(self, event: Dict[str, Any]) -> None:
+        orders = self.open.setdefault(event["s"], set())
+        if event["X"] in OPEN_STATUSES:
+            orders.add(event["i"])
+        else:
+            orders.discard(event["i"])
+
+    async def sync(self) -> Set[str]:
+        """Replace the in-memory state with the open orders of all symbols."""
+
+        orders = await self.client.get_open_orders()
+        self.open = {}
+        for order in orders:
+            self.open.setdefault(order["symbol"], set()).add(order["orderId"])
+        self.synced = True
+        return self.open_symbols()
+
+    def open_symbols(self) -> Set[str]:
+        symbols = {symbol for symbol, orders in self.open.items() if orders}
+        if self.reconciler is not None:
+            for status in OPEN_STATUSES:
+                symbols.update(o["symbol"] for o in self.reconciler.orders(status=status))
+        return symbols
+
+    # cancelling
+
+    async def _cancel_symbol(self, symbol: str) -> Any:
+        websocket = self.websocket
+        if websocket is not None and getattr(websocket, "connected", False):
+            try:
+                return await websocket.request("openOrders.cancelAll", {"symbol": symbol})
+            except Exception as e:
+                self._logger.warning("openOrders.cancelAll of %s over the websocket failed, using REST: %r", symbol, e)
+        try:
+            return await self.client.cancel_open_orders(symbol)
+        except ClientError as e:
+            if e.error_code == NO_OPEN_ORDERS:
+                return []
+            raise
+
+    async def flatten(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Cancel all open orders of the given symbols (default: all with open orders).
+
+        Returns symbol -> canceled orders, or the exception for symbols that failed.
+        """
+
+        if symbols is None:
+            if not self.synced:
+                await self.sync()
+            symbols = self.open_symbols()
+        symbols = sorted(set(symbols))
+        results = await asyncio.gather(*(self._cancel_symbol(symbol) for symbol in symbols), return_exceptions=True)
+        for symbol, result in zip(symbols, results):
+            if not isinstance(result, BaseException):
+                self.open.pop(symbol, None)
+        return dict(zip(symbols, results))
+
+    def failed(self, results: Dict[str, Any]) -> List[str]:
+        return [symbol for symbol, result in results.items() if isinstance(result, BaseException)]
+
+    # dead man's switch
+
+    def heartbeat(self) -> None:
+        self._last_heartbeat = time.monotonic()
+
+    def arm(self, timeout: float) -> None:
+        """Flatten once no heartbeat came for timeout seconds."""
+
+        self.timeout = timeout
+        self.heartbeat()
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.ensure_future(self._watch())
+
+    def disarm(self) -> None:
+        self.timeout = None
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    @property
+    def armed(self) -> bool:
+        return self._watch_task is not None and not self._watch_task.done()
+
+    async def _watch(self) -> None:
+        while self.timeout is not None:
+            left = self._last_heartbeat + self.timeout - time.monotonic()
+            if left > 0:
+                await asyncio.sleep(left)
+                continue
+            self.timeout = None
+            self.fired += 1
+            results = await self._flatten_retrying()
+            if self.on_fire is not None:
+                try:
+                    outcome = self.on_fire(results)
+                    if asyncio.iscoroutine(outcome):
+                        await outcome
+                except Exception:
+                    self._logger.exception("kill switch on_fire failed")
+
+    async def _flatten_retrying(self) -> Dict[str, Any]:
+        """flatten until nothing fails or the retries are used up; a sync that kept
+        failing is reported under SYNC."""
+
+        results: Dict[str, Any] = {}
+        symbols = None
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                results.update(await self.flatten(symbols))
+            except Exception as e:
+                self._logger.error("kill switch could not sync open orders: %r", e)
+                results[SYNC] = e
+            else:
+                results.pop(SYNC, None)
+                symbols = self.failed(results)
+                if not symbols:
+                    return results
+                self._logger.error("kill switch could not cancel the orders of %s", ", ".join(symbols))
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+                delay *= 2
+        return results
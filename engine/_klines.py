@@ -0,0 +1,462 @@
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.error import ParameterValueError
+
+INTERVAL_MS = {
+    "1s": 1000,
+    "1m": 60000,
+    "3m": 180000,
+    "5m": 300000,
+    "15m": 900000,
+    "30m": 1800000,
+    "1h": 3600000,
+    "2h": 7200000,
+    "4h": 14400000,
+    "6h": 21600000,
+    "8h": 28800000,
+    "12h": 43200000,
+    "1d": 86400000,
+    "3d": 259200000,
+    "1w": 604800000,
+}
+
+nan = float("nan")
+
+
+class Bar(NamedTuple):
+    open_time: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    quote_volume: float
+    trades: int
+
+
+def merge_bars(first: Optional[Bar], second: Bar, open_time: int) -> Bar:
+    if first is None:
+        return second._replace(open_time=open_time)
+    return Bar(
+        open_time,
+        first.open,
+        max(first.high, second.high),
+        min(first.low, second.low),
+        second.close,
+        first.volume + second.volume,
+        first.quote_volume + second.quote_volume,
+        first.trades + second.trades,
+    )
+
+
+def bar_from_kline(row: Sequence[Any]) -> Bar:
+    """Bar from a REST kline row (list or utils.codec.Kline)."""
+
+    return Bar(
+        int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]),
+        float(row[5]), float(row[7]), int(row[8]),
+    )
+
+
+class BarRing:
+    """Fixed capacity ring of bars stored in one float64 array, oldest first."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.data = np.zeros((capacity, len(Bar._fields)))
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, bar: Bar) -> None:
+        if self.size < self.capacity:
+            self.data[(self.start + self.size) % self.capacity] = bar
+            self.size += 1
+        else:
+            self.data[self.start] = bar
+            self.start = (self.start + 1) % self.capacity
+
+    def set_last(self, bar: Bar) -> None:
+        self.data[(self.start + self.size - 1) % self.capacity] = bar
+
+    @property
+    def last(self) -> Optional[Bar]:
+        if not self.size:
+            return None
+        row = self.data[(self.start + self.size - 1) % self.capacity]
+        return Bar(int(row[0]), *row[1:7].tolist(), int(row[7]))
+
+    def to_array(self, n: Optional[int] = None) -> np.ndarray:
+        """Copy of the last n bars (all by default) in time order."""
+
+        n = self.size if n is None else min(n, self.size)
+        index = (self.start + np.arange(self.size - n, self.size)) % self.capacity
+        return self.data[index]
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        return self.to_array(n)[:, Bar._fields.index(name)]
+
+
+class Indicator:
+    """Incremental indicator. `update(bar, closed)` is O(1): a closed bar is committed
+    into the state, an open bar only yields a provisional value from it.
+    """
+
+    value = nan
+
+    def update(self, bar: Bar, closed: bool) -> float:
+        self.value = self._compute(bar, closed)
+        return self.value
+
+    def _compute(self, bar: Bar, commit: bool) -> float:
+        raise NotImplementedError
+
+
+class _Window:
+    """Running sum over the last `period` committed values."""
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.values = np.zeros(period)
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+
+    def peek(self, x: float) -> Tuple[float, int]:
+        full = self.count >= self.period
+        total = self.total - (self.values[self.pos] if full else 0.0) + x
+        return total, self.period if full else self.count + 1
+
+    def commit(self, x: float, total: float) -> None:
+        self.values[self.pos] = x
+        self.pos = (self.pos + 1) % self.period
+        self.count += 1
+        if self.count % (self.period * 64) == 0:
+            # drop accumulated rounding error
+            total = float(self.values.sum())
+        self.total = total
+
+
+class SMA(Indicator):
+    def __init__(self, period: int, source: str = "close") -> None:
+        self.period = period
+        self.source = source
+        self._window = _Window(period)
+
+    def _compute(self, bar: Bar, commit: bool) -> float:
+        x = getattr(bar, self.source)
+        total, n = self._window.peek(x)
+        if commit:
+            self._window.commit(x, total)
+        return total / n if n >= self.period else nan
+
+
+class EMA(Indicator):
+    """Seeded with the SMA of the first `period` values."""
+
+    def __init__(self, period: int, source: str = "close") -> None:
+        self.period = period
+        self.source = source
+        self.alpha = 2.0 / (period + 1)
+        self._ema = nan
+        self._seed = 0.0
+        self._count = 0
+
+    def _compute(self, bar: Bar, commit: bool) -> float:
+        x = getattr(bar, self.source)
+        if self._count < self.period - 1:
+            value = nan
+            if commit:
+                self._seed += x
+        elif self._count == self.period - 1:
+            value = (self._seed + x) / self.period
+        else:
+            value = self._ema + self.alpha * (x - self._ema)
+        if commit:
+            self._count += 1
+            if value == value:
+                self._ema = value
+        return value
+
+
+class VWAP(Indicator):
+    """Volume weighted typical price over the last `period` bars, or since start
+    (or `reset`) when period is None.
+    """
+
+    def __init__(self, period: Optional[int] = None) -> None:
+        self.period = period
+        self.reset()
+
+    def reset(self) -> None:
+        self._pv = _Window(self.period) if self.period else None
+        self._v = _Window(self.period) if self.period else None
+        self._sum_pv = 0.0
+        self._sum_v = 0.0
+
+    def _compute(self, bar: Bar, commit: bool) -> float:
+        pv = (bar.high + bar.low + bar.close) / 3.0 * bar.volume
+        if self.period:
+            sum_pv, _ = self._pv.peek(pv)
+            sum_v, _ = self._v.peek(bar.volume)
+            if commit:
+                self._pv.commit(pv, sum_pv)
+                self._v.commit(bar.volume, sum_v)
+        else:
+            sum_pv = self._sum_pv + pv
+            sum_v = self._sum_v + bar.volume
+            if commit:
+                self._sum_pv, self._sum_v = sum_pv, sum_v
+        return sum_pv / sum_v if sum_v else nan
+
+
+class ATR(Indicator):
+    """Average true range with Wilder smoothing."""
+
+    def __init__(self, period: int = 14) -> None:
+        self.period = period
+        self._prev_close = nan
+        self._atr = nan
+        self._seed = 0.0
+        self._count = 0
+
+    def _compute(self, bar: Bar, commit: bool) -> float:
+        if self._prev_close != self._prev_close:
+            tr = bar.high - bar.low
+        else:
+            tr = max(bar.high - bar.low, abs(bar.high - self._prev_close), abs(bar.low - self._prev_close))
+        if self._count < self.period - 1:
+            value = nan
+            if commit:
+                self._seed += tr
+        elif self._count == self.period - 1:
+            value = (self._seed + tr) / self.period
+        else:
+            value = (self._atr * (self.period - 1) + tr) / self.period
+        if commit:
+            self._count += 1
+            self._prev_close = bar.close
+            if value == value:
+                self._atr = value
+        return value
+
+
+class RSI(Indicator):
+    """Relative strength index with Wilder smoothing."""
+
+    def __init__(self, period: int = 14) -> None:
+        self.period = period
+        self._prev_close = nan
+        self._gain = 0.0
+        self._loss = 0.0
+        self._count = 0
+
+    def _compute(self, bar: Bar, commit: bool) -> float:
+        if self._prev_close != self._prev_close:
+            if commit:
+                self._prev_close = bar.close
+            return nan
+        change = bar.close - self._prev_close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        p = self.period
+        if self._count < p - 1:
+            avg_gain = avg_loss = nan
+        elif self._count == p - 1:
+            avg_gain, avg_loss = (self._gain + gain) / p, (self._loss + loss) / p
+        else:
+            avg_gain = (self._gain * (p - 1) + gain) / p
+            avg_loss = (self._loss * (p - 1) + loss) / p
+        if commit:
+            self._count += 1
+            self._prev_close = bar.close
+            if avg_gain == avg_gain:
+                self._gain, self._loss = avg_gain, avg_loss
+            else:
+                self._gain += gain
+                self._loss += loss
+        if avg_gain != avg_gain:
+            return nan
+        if avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class BarSeries:
+    """Bars of one symbol and interval in a fixed size ring, with incremental indicators.
+
+    The last bar may be in progress; it is updated in place and committed into the
+    indicators once closed (explicitly, or implicitly when a newer bar arrives).
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        interval: str,
+        capacity: int = 1000,
+        indicators: Optional[Dict[str, Indicator]] = None,
+    ) -> None:
+        if interval not in INTERVAL_MS:
+            raise ParameterValueError([interval])
+        self.symbol = symbol
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.bars = BarRing(capacity)
+        self.indicators = dict(indicators or {})
+        self.children: List["BarSeries"] = []
+        self._open = False
+        self._parent_ms = 0
+        self._partial: Optional[Bar] = None
+        self._listeners: List[Callable[["BarSeries", Bar, bool], Any]] = []
+
+    @property
+    def last(self) -> Optional[Bar]:
+        return self.bars.last
+
+    def values(self) -> Dict[str, float]:
+        return {name: indicator.value for name, indicator in self.indicators.items()}
+
+    def on_update(self, callback: Callable[["BarSeries", Bar, bool], Any]) -> None:
+        self._listeners.append(callback)
+
+    def update(self, bar: Bar, closed: bool) -> None:
+        last = self.bars.last
+        if last is not None and bar.open_time < last.open_time:
+            return
+        if last is not None and bar.open_time == last.open_time:
+            if not self._open:
+                return
+            self.bars.set_last(bar)
+        else:
+            if self._open:
+                self._commit(last)
+            self.bars.append(bar)
+        for indicator in self.indicators.values():
+            indicator.update(bar, closed)
+        self._open = not closed
+        for child in self.children:
+            child._on_parent(bar, closed)
+        for callback in self._listeners:
+            callback(self, bar, closed)
+
+    def _commit(self, bar: Bar) -> None:
+        for indicator in self.indicators.values():
+            indicator.update(bar, True)
+        self._open = False
+        for child in self.children:
+            child._on_parent(bar, True)
+
+    def close(self, now_ms: Optional[int] = None) -> None:
+        """Close the bar in progress once its interval has elapsed."""
+
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        last = self.bars.last
+        if self._open and now_ms >= last.open_time + self.interval_ms:
+            self._commit(last)
+
+    def on_kline(self, event: Dict[str, Any]) -> None:
+        """Apply a websocket kline event (or its "k" payload)."""
+
+        k = event.get("k", event)
+        bar = Bar(
+            k["t"], float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]),
+            float(k["v"]), float(k["q"]), k["n"],
+        )
+        self.update(bar, k["x"])
+
+    def on_trade(self, price: float, qty: float, time_ms: int) -> None:
+        """Aggregate a trade into the bar of its interval."""
+
+        open_time = time_ms - time_ms % self.interval_ms
+        last = self.bars.last
+        if self._open and last.open_time == open_time:
+            bar = Bar(
+                open_time, last.open, max(last.high, price), min(last.low, price), price,
+                last.volume + qty, last.quote_volume + price * qty, last.trades + 1,
+            )
+        else:
+            bar = Bar(open_time, price, price, price, price, qty, price * qty, 1)
+        self.update(bar, False)
+
+    def seed(self, klines: Sequence[Sequence[Any]], now_ms: Optional[int] = None) -> None:
+        """Load REST klines; the last one stays open if its close time is in the future."""
+
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        for row in klines:
+            self.update(bar_from_kline(row), int(row[6]) < now_ms)
+
+    def resample(
+        self, interval: str, capacity: int = 1000, indicators: Optional[Dict[str, Indicator]] = None
+    ) -> "BarSeries":
+        """Higher interval series built on the fly from this one."""
+
+        child = BarSeries(self.symbol, interval, capacity, indicators)
+        if child.interval_ms % self.interval_ms:
+            raise ParameterValueError([interval])
+        child._parent_ms = self.interval_ms
+        self.children.append(child)
+        return child
+
+    def _on_parent(self, bar: Bar, closed: bool) -> None:
+        open_time = bar.open_time - bar.open_time % self.interval_ms
+        if self._partial is not None and self._partial.open_time != open_time:
+            self._partial = None
+        combined = merge_bars(self._partial, bar, open_time)
+        ends_bucket = bar.open_time + self._parent_ms >= open_time + self.interval_ms
+        self.update(combined, closed and ends_bucket)
+        if closed:
+            self._partial = None if ends_bucket else combined
+
+
+class KlineEngine:
+    """Bar series per (symbol, interval), seeded from REST klines and advanced by
+    websocket kline, trade and aggTrade events.
+
+    engine = KlineEngine(indicators=lambda: {"ema": EMA(20), "rsi": RSI(14)})
+    await engine.seed(client, "BTCUSDT", "1m")
+    hourly = engine.series("BTCUSDT", "1m").resample("1h", indicators={"atr": ATR(14)})
+    engine.on_event(message)
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        indicators: Optional[Callable[[], Dict[str, Indicator]]] = None,
+    ) -> None:
+        self.capacity = capacity
+        self.indicators = indicators
+        self._series: Dict[Tuple[str, str], BarSeries] = {}
+        self._trade_series: Dict[str, List[BarSeries]] = {}
+
+    def series(self, symbol: str, interval: str, from_trades: bool = False) -> BarSeries:
+        key = (symbol, interval)
+        series = self._series.get(key)
+        if series is None:
+            series = BarSeries(symbol, interval, self.capacity, self.indicators() if self.indicators else None)
+            self._series[key] = series
+            if from_trades:
+                self._trade_series.setdefault(symbol, []).append(series)
+        return series
+
+    async def seed(self, client: Any, symbol: str, interval: str, limit: int = 500, from_trades: bool = False) -> BarSeries:
+        series = self.series(symbol, interval, from_trades)
+        series.seed(await client.klines(symbol, interval, limit=limit))
+        return series
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        event_type = event.get("e")
+        if event_type == "kline":
+            series = self._series.get((event["s"], event["k"]["i"]))
+            if series is not None:
+                series.on_kline(event)
+        elif event_type in ("trade", "aggTrade"):
+            for series in self._trade_series.get(event["s"], ()):
+                series.on_trade(float(event["p"]), float(event["q"]), event["T"])
+
+    def close_elapsed(self, now_ms: Optional[int] = None) -> None:
+        for series in self._series.values():
+            series.close(now_ms)
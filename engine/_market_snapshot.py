@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.error import ParameterArgumentError
+from utils.weights import request_weight
+
+# endpoint -> {field: key in the response}
+SOURCES: Dict[str, Dict[str, str]] = {
+    "ticker_price": {"lastPrice": "price"},
+    "book_ticker": {
+        "bidPrice": "bidPrice",
+        "bidQty": "bidQty",
+        "askPrice": "askPrice",
+        "askQty": "askQty",
+    },
+    "ticker_24hr": {
+        "lastPrice": "lastPrice",
+        "bidPrice": "bidPrice",
+        "bidQty": "bidQty",
+        "askPrice": "askPrice",
+        "askQty": "askQty",
+        "openPrice": "openPrice",
+        "highPrice": "highPrice",
+        "lowPrice": "lowPrice",
+        "volume": "volume",
+        "quoteVolume": "quoteVolume",
+        "priceChangePercent": "priceChangePercent",
+        "weightedAvgPrice": "weightedAvgPrice",
+        "count": "count",
+    },
+    "rolling_window_ticker": {
+        "lastPrice": "lastPrice",
+        "openPrice": "openPrice",
+        "highPrice": "highPrice",
+        "lowPrice": "lowPrice",
+        "volume": "volume",
+        "quoteVolume": "quoteVolume",
+        "priceChangePercent": "priceChangePercent",
+        "weightedAvgPrice": "weightedAvgPrice",
+        "count": "count",
+    },
+}
+
+# fields that describe a window; only rolling_window_ticker serves windows other than 1d
+WINDOW_FIELDS = set(SOURCES["rolling_window_ticker"]) - {"lastPrice"}
+
+# symbols sent in one request; rolling_window_ticker accepts at most 100
+MAX_SYMBOLS_PER_REQUEST = 100
+
+# endpoint -> REST path, the weights come from utils.weights
+PATHS = {
+    "ticker_price": "/api/v3/ticker/price",
+    "book_ticker": "/api/v3/ticker/bookTicker",
+    "ticker_24hr": "/api/v3/ticker/24hr",
+    "rolling_window_ticker": "/api/v3/ticker",
+}
+
+# batch sizes tried, the 24hr ticker weight steps at 20 and 100 symbols
+BATCH_SIZES = (20, MAX_SYMBOLS_PER_REQUEST)
+
+
+class PlannedRequest(NamedTuple):
+    endpoint: str
+    symbols: Optional[Tuple[str, ...]]  # None: whole market
+    weight: int
+
+
+def _chunks(symbols: Sequence[str], size: int) -> List[Tuple[str, ...]]:
+    return [tuple(symbols[i:i + size]) for i in range(0, len(symbols), size)]
+
+
+def symbol_params(symbols: Optional[Tuple[str, ...]]) -> Optional[Dict[str, Any]]:
+    """Symbol parameters of a planned request, as MarketSnapshot sends them."""
+
+    if not symbols:
+        return None
+    if len(symbols) == 1:
+        return {"symbol": symbols[0]}
+    return {"symbols": list(symbols)}
+
+
+def _planned(endpoint: str, symbols: Optional[Tuple[str, ...]]) -> PlannedRequest:
+    return PlannedRequest(endpoint, symbols, request_weight("GET", PATHS[endpoint], symbol_params(symbols)))
+
+
+def plan_endpoint(endpoint: str, symbols: Sequence[str]) -> List[PlannedRequest]:
+    """Cheapest way to fetch one endpoint for a symbol universe."""
+
+    if endpoint not in PATHS:
+        raise ParameterArgumentError(f"unknown snapshot endpoint {endpoint}")
+    candidates = []
+    if endpoint != "rolling_window_ticker":
+        # the rolling window ticker has no whole market form
+        candidates.append([_planned(endpoint, None)])
+    for size in BATCH_SIZES:
+        candidates.append([_planned(endpoint, chunk) for chunk in _chunks(symbols, size)])
+    return min(candidates, key=lambda plan: (sum(r.weight for r in plan), len(plan)))
+
+
+def plan_requests(
+    symbols: Sequence[str], fields: Iterable[str], window_size: Optional[str] = None
+) -> List[PlannedRequest]:
+    """Pick the set of endpoints covering all fields at the lowest total weight."""
+
+    fields = set(fields)
+    sources = dict(SOURCES)
+    if window_size is not None and fields & WINDOW_FIELDS:
+        # the 24hr ticker cannot answer a different window
+        sources["ticker_24hr"] = {k: v for k, v in SOURCES["ticker_24hr"].items() if k not in WINDOW_FIELDS}
+    unknown = fields - set().union(*sources.values())
+    if unknown:
+        raise ParameterArgumentError(f"unknown snapshot fields {', '.join(sorted(unknown))}")
+
+    endpoints = list(sources)
+    best: Optional[List[PlannedRequest]] = None
+    best_key = None
+    for mask in range(1, 1 << len(endpoints)):
+        chosen = [endpoints[i] for i in range(len(endpoints)) if mask >> i & 1]
+        covered = set().union(*(sources[e] for e in chosen))
+        if not fields <= covered:
+            continue
+        plan = [request for endpoint in chosen for request in plan_endpoint(endpoint, symbols)]
+        key = (sum(r.weight for r in plan), len(plan))
+        if best_key is None or key < best_key:
+            best, best_key = plan, key
+    return best
+
+
+class SnapshotDiff(NamedTuple):
+    # field -> row indices that changed
+    changed: Dict[str, np.ndarray]
+    symbols: List[str]
+
+    def changed_symbols(self, field: Optional[str] = None) -> List[str]:
+        if field is not None:
+            rows = self.changed.get(field, ())
+        else:
+            rows = np.unique(np.concatenate(list(self.changed.values()))) if self.changed else ()
+        return [self.symbols[i] for i in rows]
+
+
+class MarketSnapshot:
+    """Symbol indexed table of market fields, filled with batched requests.
+
+    Every field is a float64 column aligned with `symbols` (NaN until first seen).
+
+    snapshot = MarketSnapshot(client, symbols, ["lastPrice", "bidPrice", "askPrice", "volume"])
+    diff = await snapshot.refresh()
+    snapshot["bidPrice"][snapshot.index["BTCUSDT"]]
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        symbols: Sequence[str],
+        fields: Sequence[str],
+        window_size: Optional[str] = None,
+    ) -> None:
+        self.client = client
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.fields = list(fields)
+        self.window_size = window_size
+        self.plan = plan_requests(self.symbols, self.fields, window_size)
+        self.columns = {field: np.full(len(self.symbols), np.nan) for field in self.fields}
+        self.updated_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def weight(self) -> int:
+        return sum(request.weight for request in self.plan)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    def row(self, symbol: str) -> Dict[str, float]:
+        i = self.index[symbol]
+        return {field: float(values[i]) for field, values in self.columns.items()}
+
+    async def _fetch(self, request: PlannedRequest) -> Tuple[str, Any]:
+        kwargs = dict(symbol_params(request.symbols) or {})
+        if request.endpoint == "rolling_window_ticker" and self.window_size is not None:
+            kwargs["windowSize"] = self.window_size
+        data = await getattr(self.client, request.endpoint)(**kwargs)
+        return request.endpoint, data
+
+    def _apply(self, endpoint: str, data: Any, columns: Dict[str, np.ndarray]) -> None:
+        if not isinstance(data, list):
+            data = [data]
+        mapping = [(field, key) for field, key in SOURCES[endpoint].items() if field in columns]
+        index = self.index
+        for item in data:
+            # typed_responses clients return objects instead of dicts
+            get = item.__getitem__ if isinstance(item, dict) else item.__getattribute__
+            i = index.get(get("symbol"))
+            if i is None:
+                continue
+            for field, key in mapping:
+                columns[field][i] = float(get(key))
+
+    async def refresh(self) -> SnapshotDiff:
+        """Run the plan concurrently and return which cells changed."""
+
+        results = await asyncio.gather(*(self._fetch(request) for request in self.plan))
+        columns = {field: values.copy() for field, values in self.columns.items()}
+        for endpoint, data in results:
+            self._apply(endpoint, data, columns)
+
+        changed = {}
+        for field, new in columns.items():
+            old = self.columns[field]
+            mask = (old != new) & ~(np.isnan(old) & np.isnan(new))
+            rows = np.flatnonzero(mask)
+            if len(rows):
+                changed[field] = rows
+        self.columns = columns
+        self.updated_at = time.time()
+        return SnapshotDiff(changed, self.symbols)
+
+    async def run(self, interval: float, on_update: Optional[Callable[[SnapshotDiff], Any]] = None) -> None:
+        """Refresh every interval seconds, passing each diff to on_update."""
+
+        while True:
+            started = time.monotonic()
+            try:
+                diff = await self.refresh()
+            except Exception:
+                self._logger.exception("snapshot refresh failed")
+            else:
+                if on_update is not None:
+                    result = on_update(diff)
+                    if asyncio.iscoroutine(result):
+                        await result
+            await asyncio.sleep(max(interval - (time.monotonic() - started), 0))
+
+    def start(self, interval: float, on_update: Optional[Callable[[SnapshotDiff], Any]] = None) -> asyncio.Task:
+        self._task = asyncio.ensure_future(self.run(interval, on_update))
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
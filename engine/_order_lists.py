@@ -0,0 +1,215 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+from engine._reconcile import OPEN_STATUSES
+
+
+def _leg(order: Dict[str, Any]) -> Dict[str, Any]:
+    """Leg of an order list from a REST order report or an executionReport event."""
+
+    if "e" in order:
+        return {
+            "orderId": order["i"],
+            "clientOrderId": order["c"],
+            "side": order["S"],
+            "type": order["o"],
+            "price": order["p"],
+            "stopPrice": order["P"],
+            "quantity": order["q"],
+            "status": order["X"],
+        }
+    return {
+        "orderId": order["orderId"],
+        "clientOrderId": order["clientOrderId"],
+        "side": order.get("side"),
+        "type": order.get("type"),
+        "price": order.get("price"),
+        "stopPrice": order.get("stopPrice"),
+        "quantity": order.get("origQty"),
+        "status": order.get("status"),
+    }
+
+
+class OrderListManager:
+    """Open OCO / order lists of an account, indexed in memory.
+
+    Lists are indexed by orderListId, by symbol and by the orderId of every leg, so
+    "which protective orders are on BTCUSDT" is a dict lookup instead of a GET
+    /api/v3/openOrderList (weight 6). The index is fed by the responses of
+    `new_oco_order` / `cancel_oco_order` placed through it, by listStatus and
+    executionReport events of the user data stream (`on_event`), and rebuilt from REST
+    with `sync`, which `run` repeats and which should follow every stream reconnect.
+
+    lists = OrderListManager(client)
+    await lists.sync()
+    lists.on_event(event)  # every user data stream event
+    stops = lists.protective_orders("BTCUSDT", side="SELL")
+    """
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self.lists: Dict[int, Dict[str, Any]] = {}
+        self._by_symbol: Dict[str, Set[int]] = {}
+        self._by_order: Dict[int, int] = {}
+        # orderListId -> legs from executionReports that came before the list itself
+        self._pending: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self.synced = False
+
+    # index maintenance
+
+    def _index(self, order_list: Dict[str, Any]) -> None:
+        list_id = order_list["orderListId"]
+        pending = self._pending.pop(list_id, {})
+        if order_list["listOrderStatus"] == "ALL_DONE":
+            self._remove(list_id)
+            return
+        known = self.lists.get(list_id)
+        if known is not None:
+            # a listStatus event or list response only names the legs, keep their details
+            order_list["legs"] = {
+                order_id: {**known["legs"].get(order_id, {}), **leg} for order_id, leg in order_list["legs"].items()
+            }
+        for order_id, leg in pending.items():
+            order_list["legs"][order_id] = {**order_list["legs"].get(order_id, {}), **leg}
+        self.lists[list_id] = order_list
+        self._by_symbol.setdefault(order_list["symbol"], set()).add(list_id)
+        for order_id in order_list["legs"]:
+            self._by_order[order_id] = list_id
+
+    def _remove(self, list_id: int) -> None:
+        order_list = self.lists.pop(list_id, None)
+        if order_list is None:
+            return
+        ids = self._by_symbol.get(order_list["symbol"])
+        if ids is not None:
+            ids.discard(list_id)
+            if not ids:
+                del self._by_symbol[order_list["symbol"]]
+        for order_id in order_list["legs"]:
+            self._by_order.pop(order_id, None)
+
+    def apply(self, data: Dict[str, Any]) -> None:
+        """Index an order list as returned by the REST order list endpoints."""
+
+        legs = {o["orderId"]: {"orderId": o["orderId"], "clientOrderId": o["clientOrderId"]} for o in data["orders"]}
+        for report in data.get("orderReports", ()):
+            legs[report["orderId"]] = _leg(report)
+        self._index(
+            {
+                "orderListId": data["orderListId"],
+                "symbol": data["symbol"],
+                "contingencyType": data["contingencyType"],
+                "listStatusType": data["listStatusType"],
+                "listOrderStatus": data["listOrderStatus"],
+                "listClientOrderId": data["listClientOrderId"],
+                "time": data["transactionTime"],
+                "legs": legs,
+            }
+        )
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        """Feed user data stream events; ones unrelated to order lists are ignored."""
+
+        kind = event.get("e")
+        if kind == "listStatus":
+            self._index(
+                {
+                    "orderListId": event["g"],
+                    "symbol": event["s"],
+                    "contingencyType": event["c"],
+                    "listStatusType": event["l"],
+                    "listOrderStatus": event["L"],
+                    "listClientOrderId": event["C"],
+                    "time": event["T"],
+                    "legs": {o["i"]: {"orderId": o["i"], "clientOrderId": o["c"]} for o in event["O"]},
+                }
+            )
+        elif kind == "executionReport" and event.get("g", -1) != -1:
+            order_list = self.lists.get(event["g"])
+            if order_list is None:
+                # the stream may report a leg before the listStatus of its list
+                self._pending.setdefault(event["g"], {})[event["i"]] = _leg(event)
+                return
+            order_list["legs"][event["i"]] = _leg(event)
+            self._by_order[event["i"]] = event["g"]
+
+    async def sync(self) -> int:
+        """Rebuild the index from GET /api/v3/openOrderList; return the number of open lists.
+
+        Legs whose details (side, type, prices) are unknown are completed from one
+        GET /api/v3/openOrders.
+        """
+
+        # reports buffered before the request are older than what it returns
+        stale = set(self._pending)
+        open_lists = await self.client.get_oco_open_orders()
+        for list_id in stale:
+            self._pending.pop(list_id, None)
+        known = self.lists
+        self.lists, self._by_symbol, self._by_order = {}, {}, {}
+        for data in open_lists:
+            previous = known.get(data["orderListId"])
+            if previous is not None:
+                self.lists[data["orderListId"]] = previous
+            self.apply(data)
+        if any("type" not in leg for order_list in self.lists.values() for leg in order_list["legs"].values()):
+            for order in await self.client.get_open_orders():
+                list_id = self._by_order.get(order["orderId"])
+                if list_id is not None:
+                    self.lists[list_id]["legs"][order["orderId"]] = _leg(order)
+        self.synced = True
+        return len(self.lists)
+
+    async def run(self, interval: float = 60.0, on_error: Optional[Any] = None) -> None:
+        """Sync every interval seconds until cancelled, as a fallback for missed events."""
+
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+            await asyncio.sleep(interval)
+
+    # orders through the manager
+
+    async def new_oco_order(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        response = await self.client.new_oco_order(*args, **kwargs)
+        self.apply(response)
+        return response
+
+    async def cancel_oco_order(self, symbol: str, **kwargs: Any) -> Dict[str, Any]:
+        response = await self.client.cancel_oco_order(symbol, **kwargs)
+        self.apply(response)
+        return response
+
+    # local queries
+
+    def open_lists(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        if symbol is None:
+            return list(self.lists.values())
+        return [self.lists[list_id] for list_id in self._by_symbol.get(symbol, ())]
+
+    def protective_orders(self, symbol: str, side: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Open legs of the open order lists on symbol, optionally of one side."""
+
+        return [
+            dict(leg, orderListId=list_id, symbol=symbol)
+            for list_id in self._by_symbol.get(symbol, ())
+            for leg in self.lists[list_id]["legs"].values()
+            if (leg.get("status") or "NEW") in OPEN_STATUSES and (side is None or leg.get("side") == side)
+        ]
+
+    def is_protected(self, symbol: str) -> bool:
+        return symbol in self._by_symbol
+
+    def order_list(self, list_id: int) -> Optional[Dict[str, Any]]:
+        return self.lists.get(list_id)
+
+    def list_of_order(self, order_id: int) -> Optional[Dict[str, Any]]:
+        list_id = self._by_order.get(order_id)
+        return None if list_id is None else self.lists.get(list_id)
+
+    def symbols(self) -> List[str]:
+        return sorted(self._by_symbol)
@@ -0,0 +1,186 @@
+import csv
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from utils.metrics import Histogram
+from utils.util import get_uuid
+
+# request -> action of the orders that are tracked
+TRACKED = {
+    ("POST", "/api/v3/order"): "new",
+    ("DELETE", "/api/v3/order"): "cancel",
+    ("POST", "/api/v3/order/cancelReplace"): "replace",
+}
+
+STAGES = ("submit", "signed", "sent", "ack", "report", "fill")
+
+# name, from stage, to stage
+SEGMENTS = (
+    # limiter and concurrency waits, then signing: the timestamp is set last
+    ("queue", "submit", "signed"),
+    ("send", "signed", "sent"),
+    ("network", "sent", "ack"),
+    ("ack", "submit", "ack"),
+    ("report", "submit", "report"),
+    ("fill", "submit", "fill"),
+)
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("client_order_id", "S36"),
+        ("symbol", "S16"),
+        ("type", "S24"),
+        ("action", "S8"),
+        ("status", "S16"),
+        ("time", "i8"),
+    ]
+    # perf_counter_ns of every stage, 0 until reached
+    + [(stage, "i8") for stage in STAGES]
+)
+
+_current: ContextVar[Optional[str]] = ContextVar("binance_tracked_order", default=None)
+
+
+class OrderTracker:
+    """Where the time of order entry goes, stage by stage.
+
+    Given to a client as `order_tracker=`, every new_order, cancel_order and
+    cancel_and_replace is keyed by its newClientOrderId (one is generated when not
+    passed) and timestamped at submit (sign_request entered), signed (limiters passed,
+    signature computed), sent (handed to the transport) and ack (response read). Feed
+    the user data stream to `on_execution_report` for the first report and the fill.
+
+    Stage intervals (see SEGMENTS) go into a Histogram per (symbol, order type,
+    segment), in microseconds. The last `capacity` orders stay in a NumPy ring buffer.
+
+    tracker = OrderTracker()
+    client = Spot(api_key, api_secret, order_tracker=tracker)
+    ...
+    tracker.summary()["BTCUSDT", "LIMIT", "network"]["p99"]
+    """
+
+    def __init__(self, capacity: int = 10000, significant_bits: int = 7) -> None:
+        self.capacity = capacity
+        self.significant_bits = significant_bits
+        self.records = np.zeros(capacity, RECORD_DTYPE)
+        self.histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self.count = 0
+        self._rows: Dict[str, int] = {}
+
+    # hooks called by BinanceBase
+
+    def begin(self, http_method: str, url_path: str, payload: Dict[str, Any]) -> Optional[str]:
+        action = TRACKED.get((http_method, url_path))
+        if action is None:
+            return None
+        key = payload.get("newClientOrderId")
+        if key is None:
+            key = payload["newClientOrderId"] = get_uuid()
+        row = self.count % self.capacity
+        evicted = self.records[row]["client_order_id"]
+        if self.count >= self.capacity:
+            self._rows.pop(evicted.decode(), None)
+        self.records[row] = np.zeros(1, RECORD_DTYPE)[0]
+        record = self.records[row]
+        record["client_order_id"] = key.encode()
+        record["symbol"] = str(payload.get("symbol", "")).encode()
+        record["type"] = str(payload.get("type") or action.upper()).encode()
+        record["action"] = action.encode()
+        record["time"] = int(time.time() * 1000)
+        record["submit"] = time.perf_counter_ns()
+        self._rows[key] = row
+        self.count += 1
+        return key
+
+    @contextmanager
+    def bind(self, key: str) -> Iterator[None]:
+        """Make key the order the request being sent belongs to."""
+
+        token = _current.set(key)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def stage_current(self, stage: str, status: Optional[str] = None) -> None:
+        key = _current.get()
+        if key is not None:
+            self.stage(key, stage, status)
+
+    def stage(self, key: str, stage: str, status: Optional[str] = None, now: Optional[int] = None) -> None:
+        row = self._rows.get(key)
+        if row is None:
+            return
+        record = self.records[row]
+        if record[stage]:
+            return
+        record[stage] = time.perf_counter_ns() if now is None else now
+        if status is not None:
+            record["status"] = status.encode()
+        symbol, type_ = record["symbol"].decode(), record["type"].decode()
+        for name, start, end in SEGMENTS:
+            if end == stage and record[start]:
+                histogram = self.histograms.get((symbol, type_, name))
+                if histogram is None:
+                    histogram = self.histograms[symbol, type_, name] = Histogram(self.significant_bits)
+                histogram.record((record[stage] - record[start]) // 1000)
+
+    def on_execution_report(self, event: Dict[str, Any]) -> None:
+        """Feed executionReport events of the user data stream."""
+
+        now = time.perf_counter_ns()
+        # a cancel reports its own id in c and the canceled order's in C
+        key = event.get("c") if event.get("c") in self._rows else event.get("C")
+        if key not in self._rows:
+            return
+        self.stage(key, "report", event.get("X"), now)
+        if event.get("X") == "FILLED":
+            self.stage(key, "fill", "FILLED", now)
+        elif event.get("X"):
+            self.records[self._rows[key]]["status"] = event["X"].encode()
+
+    # results
+
+    def order(self, client_order_id: str) -> Optional[Dict[str, Any]]:
+        row = self._rows.get(client_order_id)
+        return None if row is None else self._to_dict(self.records[row])
+
+    @staticmethod
+    def _to_dict(record: np.void) -> Dict[str, Any]:
+        result = {name: record[name].decode() for name in ("client_order_id", "symbol", "type", "action", "status")}
+        result["time"] = int(record["time"])
+        submit = int(record["submit"])
+        # stage times relative to submit, in microseconds
+        for stage in STAGES[1:]:
+            result[stage] = (int(record[stage]) - submit) / 1000 if record[stage] else None
+        return result
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Orders in the ring buffer, oldest first."""
+
+        count = min(self.count, self.capacity)
+        start = self.count - count
+        rows = [(start + i) % self.capacity for i in range(count)]
+        if limit is not None:
+            rows = rows[-limit:]
+        return [self._to_dict(self.records[row]) for row in rows]
+
+    def summary(self) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        return {key: histogram.to_dict() for key, histogram in sorted(self.histograms.items())}
+
+    def export_csv(self, path: str) -> None:
+        rows = self.recent()
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["client_order_id"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def reset(self) -> None:
+        self.records[:] = np.zeros(1, RECORD_DTYPE)[0]
+        self.histograms.clear()
+        self._rows.clear()
+        self.count = 0
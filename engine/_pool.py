@@ -0,0 +1,111 @@
+from types import TracebackType
+from typing import Any, Dict, Optional, Type
+
+import aiohttp
+
+from binance_api import BinanceBase
+from utils.error import ParameterArgumentError
+from utils.limiter import OrderCountLimiter, WeightLimiter
+
+
+class AccountPool:
+    """Many API keys behind one connection pool and one IP weight limiter.
+
+    Account clients are created on first use and only hold credentials and their own
+    order count limiter; sockets and the weight budget are shared.
+
+    class Client(BinanceBase, SpotMarket, SpotOrder):
+        ...
+
+    async with AccountPool(Client, accounts={"grid": {"api_key": ..., "api_secret": ...}}) as pool:
+        await pool.for_account("grid").new_order("BTCUSDT", "BUY", "MARKET", quantity=0.001)
+        await pool.public.depth("BTCUSDT")
+    """
+
+    def __init__(
+        self,
+        client_class: Type[BinanceBase],
+        accounts: Optional[Dict[str, Dict[str, Any]]] = None,
+        weight_limit: int = 6000,
+        orders_per_10s: int = 50,
+        orders_per_day: int = 160000,
+        connection_limit: int = 100,
+        **client_kwargs: Any,
+    ) -> None:
+        self.client_class = client_class
+        self.client_kwargs = client_kwargs
+        self.orders_per_10s = orders_per_10s
+        self.orders_per_day = orders_per_day
+        self.weight_limiter = WeightLimiter(weight_limit)
+        self.session = aiohttp.ClientSession(
+            headers=client_class.default_headers(),
+            connector=aiohttp.TCPConnector(limit=connection_limit, keepalive_timeout=60, ttl_dns_cache=300),
+        )
+        self._credentials: Dict[str, Dict[str, Any]] = {}
+        self._clients: Dict[str, BinanceBase] = {}
+        self._public: Optional[BinanceBase] = None
+        for name, credentials in (accounts or {}).items():
+            self.add_account(name, **credentials)
+
+    def add_account(
+        self,
+        name: str,
+        api_key: str,
+        api_secret: Optional[str] = None,
+        private_key: Optional[str] = None,
+        private_key_pass: Optional[str] = None,
+    ) -> None:
+        self._credentials[name] = {
+            "api_key": api_key,
+            "api_secret": api_secret,
+            "private_key": private_key,
+            "private_key_pass": private_key_pass,
+        }
+        self._clients.pop(name, None)
+
+    def remove_account(self, name: str) -> None:
+        self._credentials.pop(name, None)
+        self._clients.pop(name, None)
+
+    @property
+    def accounts(self):
+        return list(self._credentials)
+
+    def _make_client(self, **credentials: Any) -> BinanceBase:
+        return self.client_class(
+            session=self.session,
+            weight_limiter=self.weight_limiter,
+            **credentials,
+            **self.client_kwargs,
+        )
+
+    def for_account(self, name: str) -> BinanceBase:
+        client = self._clients.get(name)
+        if client is None:
+            try:
+                credentials = self._credentials[name]
+            except KeyError:
+                raise ParameterArgumentError(f"unknown account {name}")
+            client = self._make_client(
+                order_limiter=OrderCountLimiter(self.orders_per_10s, self.orders_per_day),
+                **credentials,
+            )
+            self._clients[name] = client
+        return client
+
+    @property
+    def public(self) -> BinanceBase:
+        """Client without credentials for market data."""
+
+        if self._public is None:
+            self._public = self._make_client()
+        return self._public
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def __aenter__(self) -> "AccountPool":
+        return self
+
+    async def __aexit__(self, exc_type: Optional[type], exc_value: Optional[Exception], traceback: Optional[TracebackType]) -> None:
+        await self.close()
@@ -0,0 +1,293 @@
+import asyncio
+import logging
+import time
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.error import CircuitOpenError, ClientError, DeadlineExceededError
+from utils.util import get_uuid
+
+# statuses after which an order no longer rests on the book
+DONE_STATUSES = ("FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH")
+
+# "Unknown order sent." and "Order does not exist."
+UNKNOWN_ORDER = (-2011, -2013)
+
+Slot = Tuple[str, int]
+
+# longest wait between retries of a failing requote
+MAX_RETRY_DELAY = 30.0
+
+
+def _maybe_placed(error: Exception) -> bool:
+    """Whether a failed order request may still have reached the exchange."""
+
+    if isinstance(error, (ClientError, CircuitOpenError)):
+        return False
+    if isinstance(error, DeadlineExceededError):
+        return error.phase == "http"
+    # timeouts, dropped connections and 5xx leave the outcome unknown
+    return True
+
+
+class QuoteEngine:
+    """Keeps a ladder of LIMIT orders per symbol in line with a target ladder.
+
+    `set_target` replaces the wanted ladder of a symbol: bids and asks as (price,
+    quantity) pairs, best first. Level i of a side is matched against the live order
+    in the same slot and only the difference is sent:
+
+    - a live order within `tolerance` ticks and at the same quantity is kept
+    - a live order at another price or quantity is repriced with one cancel_and_replace
+    - a missing level is placed with new_order, a level no longer wanted is cancelled
+
+    Prices are rounded to the symbol's tick size first (bids down, asks up), so
+    sub-tick moves of the target cause no orders at all. Requotes of a symbol are
+    debounced: at most one per `min_interval` seconds, always with the latest target.
+    Operations of all symbols run concurrently, at most `max_inflight` at a time and
+    inner levels first; the order count limits are enforced by the client's
+    order_limiter. A requote that fails, as a whole (e.g. exchange_info) or in any of
+    its operations, is logged and retried with backoff from `retry_delay` seconds.
+    An order whose request failed without an answer (e.g. a timeout) may rest on the
+    book anyway: before the next requote of its symbol it is looked up by its
+    newClientOrderId and adopted if it is open.
+
+    quoter = QuoteEngine(client, min_interval=0.05)
+    quoter.set_target("BTCUSDT", bids=[(60000, 0.01), (59990, 0.02)], asks=[(60010, 0.01)])
+    quoter.on_execution_report(event)  # from the user data stream
+    await quoter.flush()
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        tick_sizes: Optional[Dict[str, Any]] = None,
+        tolerance: int = 0,
+        min_interval: float = 0.0,
+        max_inflight: int = 8,
+        time_in_force: str = "GTC",
+        retry_delay: float = 0.5,
+    ) -> None:
+        self.client = client
+        # symbol -> tick size, loaded from exchange_info PRICE_FILTER when not given
+        self.tick_sizes = {symbol: Decimal(str(tick)) for symbol, tick in (tick_sizes or {}).items()}
+        self.tolerance = tolerance
+        self.min_interval = min_interval
+        self.time_in_force = time_in_force
+        self.retry_delay = retry_delay
+        self.targets: Dict[str, Dict[Slot, Tuple[Decimal, Decimal]]] = {}
+        self.live: Dict[str, Dict[Slot, Dict[str, Any]]] = {}
+        self.stats = {"new": 0, "replace": 0, "cancel": 0, "kept": 0, "errors": 0}
+        self._by_client_id: Dict[str, Tuple[str, Slot]] = {}
+        # symbol -> slot -> (newClientOrderId, price and quantity) of placements with unknown outcome
+        self._unconfirmed: Dict[str, Dict[Slot, Tuple[str, Tuple[Decimal, Decimal]]]] = {}
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._dirty: Dict[str, bool] = {}
+        self._last_requote: Dict[str, float] = {}
+        self._logger = logging.getLogger(__name__)
+
+    async def _load_tick_sizes(self, symbol: str) -> Decimal:
+        if symbol not in self.tick_sizes:
+            info = await self.client.exchange_info(symbol=symbol)
+            for s in info["symbols"]:
+                for f in s["filters"]:
+                    if f["filterType"] == "PRICE_FILTER":
+                        self.tick_sizes[s["symbol"]] = Decimal(f["tickSize"]).normalize()
+        return self.tick_sizes[symbol]
+
+    @staticmethod
+    def _round(price: Any, tick: Decimal, side: str) -> Decimal:
+        steps = (Decimal(str(price)) / tick).to_integral_value(ROUND_FLOOR if side == "BUY" else ROUND_CEILING)
+        return steps * tick
+
+    # target ladder
+
+    def set_target(
+        self, symbol: str, bids: Sequence[Tuple[Any, Any]] = (), asks: Sequence[Tuple[Any, Any]] = ()
+    ) -> None:
+        """Replace the target ladder of symbol and schedule a requote."""
+
+        target = {}
+        for side, levels in (("BUY", bids), ("SELL", asks)):
+            for level, (price, quantity) in enumerate(levels):
+                target[side, level] = (price, Decimal(str(quantity)))
+        self.targets[symbol] = target
+        self._dirty[symbol] = True
+        task = self._tasks.get(symbol)
+        if task is None or task.done():
+            self._tasks[symbol] = asyncio.ensure_future(self._run(symbol))
+
+    def clear(self, symbol: str) -> None:
+        """Pull all quotes of symbol."""
+
+        self.set_target(symbol)
+
+    async def _run(self, symbol: str) -> None:
+        delay = self.retry_delay
+        while self._dirty.get(symbol):
+            wait = self._last_requote.get(symbol, 0.0) + self.min_interval - time.monotonic()
+            if wait > 0:
+                # targets set meanwhile are conflated into one requote
+                await asyncio.sleep(wait)
+            self._dirty[symbol] = False
+            self._last_requote[symbol] = time.monotonic()
+            try:
+                results = await self.requote(symbol)
+            except Exception:
+                self.stats["errors"] += 1
+                self._logger.exception("requote of %s failed, retrying in %.2fs", symbol, delay)
+                failed = True
+            else:
+                failed = [(action, slot, e) for action, slot, e in results if isinstance(e, Exception)]
+                for action, slot, e in failed:
+                    self._logger.warning("%s of %s %s failed: %r, retrying in %.2fs", action, symbol, slot, e, delay)
+            if failed:
+                # the target is still wanted, keep the symbol scheduled
+                self._dirty[symbol] = True
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+            else:
+                delay = self.retry_delay
+
+    async def flush(self) -> None:
+        """Wait until all scheduled requotes are done."""
+
+        while any(not task.done() for task in self._tasks.values()):
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    # diffing
+
+    async def plan(self, symbol: str) -> List[Tuple[str, Slot, Optional[Tuple[Decimal, Decimal]]]]:
+        """Operations that bring the live orders of symbol to its target, inner levels first."""
+
+        tick = await self._load_tick_sizes(symbol)
+        target = self.targets.get(symbol, {})
+        live = self.live.get(symbol, {})
+        operations = []
+        for slot in sorted(set(target) | set(live), key=lambda slot: (slot[1], slot[0])):
+            order = live.get(slot)
+            if slot not in target:
+                operations.append(("cancel", slot, None))
+                continue
+            price, quantity = target[slot]
+            wanted = (self._round(price, tick, slot[0]), quantity)
+            if order is None:
+                operations.append(("new", slot, wanted))
+            elif abs(order["price"] - wanted[0]) > self.tolerance * tick or order["quantity"] != quantity:
+                operations.append(("replace", slot, wanted))
+            else:
+                self.stats["kept"] += 1
+        return operations
+
+    async def requote(self, symbol: str) -> List[Tuple[str, Slot, Any]]:
+        """Send the operations of `plan` now; returns them with their result or exception."""
+
+        await self._recover(symbol)
+        operations = await self.plan(symbol)
+        results = await asyncio.gather(
+            *(self._execute(symbol, action, slot, wanted) for action, slot, wanted in operations),
+            return_exceptions=True,
+        )
+        return [(action, slot, result) for (action, slot, _), result in zip(operations, results)]
+
+    async def _recover(self, symbol: str) -> None:
+        """Look up the orders of symbol whose placement has an unknown outcome and adopt
+        the ones resting on the book, so they are diffed instead of placed twice."""
+
+        unconfirmed = self._unconfirmed.get(symbol, {})
+        for slot, (client_order_id, wanted) in list(unconfirmed.items()):
+            try:
+                order = await self.client.get_order(symbol, origClientOrderId=client_order_id)
+            except ClientError as e:
+                if e.error_code not in UNKNOWN_ORDER:
+                    raise
+                order = None
+            del unconfirmed[slot]
+            if order is None or order["status"] in DONE_STATUSES:
+                continue
+            self._forget(symbol, slot)
+            self._adopt(symbol, slot, order["orderId"], client_order_id, wanted)
+
+    def _adopt(
+        self, symbol: str, slot: Slot, order_id: int, client_order_id: str, wanted: Tuple[Decimal, Decimal]
+    ) -> None:
+        self.live.setdefault(symbol, {})[slot] = {
+            "orderId": order_id,
+            "clientOrderId": client_order_id,
+            "price": wanted[0],
+            "quantity": wanted[1],
+        }
+        self._by_client_id[client_order_id] = (symbol, slot)
+
+    async def _execute(self, symbol: str, action: str, slot: Slot, wanted: Optional[Tuple[Decimal, Decimal]]) -> Any:
+        live = self.live.setdefault(symbol, {})
+        order = live.get(slot)
+        side = slot[0]
+        async with self._semaphore:
+            try:
+                if action == "cancel":
+                    result = await self.client.cancel_order(symbol, orderId=order["orderId"])
+                    self._forget(symbol, slot)
+                    self.stats["cancel"] += 1
+                    return result
+                client_order_id = get_uuid()
+                params = {
+                    "timeInForce": self.time_in_force,
+                    "quantity": format(wanted[1], "f"),
+                    "price": format(wanted[0], "f"),
+                    "newClientOrderId": client_order_id,
+                }
+                if action == "new":
+                    result = await self.client.new_order(symbol, side, "LIMIT", **params)
+                    placed = result
+                else:
+                    result = await self.client.cancel_and_replace(
+                        symbol, side, "LIMIT", "STOP_ON_FAILURE", cancelOrderId=order["orderId"], **params
+                    )
+                    placed = result["newOrderResponse"]
+                    self._forget(symbol, slot)
+            except ClientError as e:
+                self.stats["errors"] += 1
+                data = e.error_data if isinstance(e.error_data, dict) else {}
+                cancel_code = (data.get("cancelResponse") or {}).get("code")
+                if order is not None and (
+                    e.error_code in UNKNOWN_ORDER or cancel_code in UNKNOWN_ORDER or data.get("cancelResult") == "SUCCESS"
+                ):
+                    # the old order is gone (filled, or cancelled without replacement)
+                    self._forget(symbol, slot)
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                if action != "cancel" and _maybe_placed(e):
+                    self._unconfirmed.setdefault(symbol, {})[slot] = (client_order_id, wanted)
+                raise
+        self.stats[action] += 1
+        self._adopt(symbol, slot, placed["orderId"], client_order_id, wanted)
+        return result
+
+    def _forget(self, symbol: str, slot: Slot) -> None:
+        order = self.live.get(symbol, {}).pop(slot, None)
+        if order is not None:
+            self._by_client_id.pop(order["clientOrderId"], None)
+
+    # user data stream
+
+    def on_execution_report(self, event: Dict[str, Any]) -> None:
+        """Drop quotes that were filled or cancelled outside the engine; the next
+        requote of their symbol places them again."""
+
+        if event.get("X") not in DONE_STATUSES:
+            return
+        # a cancel reports the cancelled order's client id in C
+        entry = self._by_client_id.get(event.get("C")) or self._by_client_id.get(event.get("c"))
+        if entry is not None:
+            self._forget(*entry)
+
+    def live_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        symbols: Iterable[str] = [symbol] if symbol is not None else sorted(self.live)
+        return [
+            dict(order, symbol=s, side=side, level=level)
+            for s in symbols
+            for (side, level), order in sorted(self.live.get(s, {}).items(), key=lambda item: (item[0][1], item[0][0]))
+        ]
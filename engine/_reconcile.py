@@ -0,0 +1,254 @@
+import asyncio
+import json
+import sqlite3
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+OPEN_STATUSES = ("NEW", "PARTIALLY_FILLED", "PENDING_NEW")
+
+# fetch(method, *args, **kwargs): calls the client method, e.g. through a limiter
+Fetch = Callable[..., Awaitable[Any]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    symbol TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    orderId INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    raw TEXT NOT NULL,
+    PRIMARY KEY (symbol, id)
+);
+CREATE INDEX IF NOT EXISTS trades_time ON trades (time);
+CREATE INDEX IF NOT EXISTS trades_order ON trades (orderId);
+CREATE TABLE IF NOT EXISTS orders (
+    symbol TEXT NOT NULL,
+    orderId INTEGER NOT NULL,
+    clientOrderId TEXT,
+    time INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    raw TEXT NOT NULL,
+    PRIMARY KEY (symbol, orderId)
+);
+CREATE INDEX IF NOT EXISTS orders_time ON orders (time);
+CREATE INDEX IF NOT EXISTS orders_order ON orders (orderId);
+CREATE INDEX IF NOT EXISTS orders_client ON orders (clientOrderId);
+CREATE TABLE IF NOT EXISTS order_lists (
+    orderListId INTEGER PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    raw TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cursors (
+    symbol TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (symbol, kind)
+);
+"""
+
+
+class Reconciler:
+    """Local index of account orders, fills and order lists kept in SQLite.
+
+    Each symbol has a cursor per dataset: the next trade id for my_trades (fromId),
+    the lowest still open order id for get_orders (orderId), and the next orderListId
+    for get_oco_orders. `sync` only pulls what is newer than the cursors; `resync`
+    drops a symbol and pulls its full history again.
+
+    Requests run concurrently up to `concurrency`; pass a client with a weight_limiter
+    to keep them within the IP weight budget. sync_trades and sync_orders also take a
+    `fetch(method, *args, **kwargs)` to send the pages through, and a `since` (ms)
+    where a symbol without a cursor starts instead of its first trade or order.
+
+    reconciler = Reconciler(client, "account.db")
+    await reconciler.sync(["BTCUSDT", "ETHUSDT"])
+    reconciler.trades("BTCUSDT", start=day_start, end=day_end)
+    """
+
+    def __init__(self, client: Any, path: str = ":memory:", concurrency: int = 5, page_limit: int = 1000) -> None:
+        self.client = client
+        self.page_limit = page_limit
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def close(self) -> None:
+        self.db.close()
+
+    # cursors
+
+    def cursor(self, symbol: str, kind: str) -> Optional[int]:
+        row = self.db.execute("SELECT value FROM cursors WHERE symbol = ? AND kind = ?", (symbol, kind)).fetchone()
+        return row[0] if row else None
+
+    def _set_cursor(self, symbol: str, kind: str, value: int) -> None:
+        self.db.execute("INSERT OR REPLACE INTO cursors VALUES (?, ?, ?)", (symbol, kind, value))
+
+    # sync
+
+    async def _page(self, fetch: Optional[Fetch], method: str, *args: Any, **kwargs: Any) -> List[Dict[str, Any]]:
+        async with self._semaphore:
+            if fetch is not None:
+                return await fetch(method, *args, limit=self.page_limit, **kwargs)
+            return await getattr(self.client, method)(*args, limit=self.page_limit, **kwargs)
+
+    def _start(self, symbol: str, kind: str, key: str, since: Optional[int]) -> Dict[str, int]:
+        cursor = self.cursor(symbol, kind)
+        if cursor is None and since is not None:
+            return {"startTime": since}
+        return {key: cursor or 0}
+
+    async def sync_trades(self, symbol: str, since: Optional[int] = None, fetch: Optional[Fetch] = None) -> int:
+        kwargs = self._start(symbol, "trades", "fromId", since)
+        count = 0
+        while True:
+            page = await self._page(fetch, "my_trades", symbol, **kwargs)
+            if page:
+                with self.db:
+                    self.db.executemany(
+                        "INSERT OR REPLACE INTO trades VALUES (?, ?, ?, ?, ?)",
+                        [(symbol, t["id"], t["orderId"], t["time"], json.dumps(t)) for t in page],
+                    )
+                    kwargs = {"fromId": page[-1]["id"] + 1}
+                    self._set_cursor(symbol, "trades", kwargs["fromId"])
+                count += len(page)
+            if len(page) < self.page_limit:
+                return count
+
+    async def sync_orders(self, symbol: str, since: Optional[int] = None, fetch: Optional[Fetch] = None) -> int:
+        kwargs = self._start(symbol, "orders", "orderId", since)
+        count = 0
+        open_ids = []
+        while True:
+            page = await self._page(fetch, "get_orders", symbol, **kwargs)
+            if page:
+                with self.db:
+                    self.db.executemany(
+                        "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?)",
+                        [
+                            (symbol, o["orderId"], o.get("clientOrderId"), o["time"], o["status"], json.dumps(o))
+                            for o in page
+                        ],
+                    )
+                open_ids.extend(o["orderId"] for o in page if o["status"] in OPEN_STATUSES)
+                kwargs = {"orderId": page[-1]["orderId"] + 1}
+                count += len(page)
+            if len(page) < self.page_limit:
+                break
+        if "orderId" not in kwargs:
+            # nothing since `since` yet, no cursor to keep
+            return count
+        # open orders can still change, so start from the oldest one next time
+        with self.db:
+            self._set_cursor(symbol, "orders", min(open_ids) if open_ids else kwargs["orderId"])
+        return count
+
+    async def sync_order_lists(self) -> int:
+        from_id = self.cursor("*", "order_lists") or 0
+        count = 0
+        open_ids = []
+        while True:
+            page = await self._page(None, "get_oco_orders", fromId=from_id)
+            if page:
+                with self.db:
+                    self.db.executemany(
+                        "INSERT OR REPLACE INTO order_lists VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (l["orderListId"], l["symbol"], l["transactionTime"], l["listOrderStatus"], json.dumps(l))
+                            for l in page
+                        ],
+                    )
+                open_ids.extend(l["orderListId"] for l in page if l["listOrderStatus"] != "ALL_DONE")
+                from_id = page[-1]["orderListId"] + 1
+                count += len(page)
+            if len(page) < self.page_limit:
+                break
+        with self.db:
+            self._set_cursor("*", "order_lists", min(open_ids) if open_ids else from_id)
+        return count
+
+    async def sync_symbol(self, symbol: str) -> Dict[str, int]:
+        trades, orders = await asyncio.gather(self.sync_trades(symbol), self.sync_orders(symbol))
+        return {"trades": trades, "orders": orders}
+
+    async def sync(self, symbols: Iterable[str], order_lists: bool = False) -> Dict[str, Dict[str, int]]:
+        """Pull new fills and orders for every symbol concurrently, return counts per symbol."""
+
+        symbols = list(symbols)
+        results = await asyncio.gather(*(self.sync_symbol(symbol) for symbol in symbols))
+        if order_lists:
+            await self.sync_order_lists()
+        return dict(zip(symbols, results))
+
+    async def resync(self, symbols: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        symbols = list(symbols)
+        with self.db:
+            for symbol in symbols:
+                self.db.execute("DELETE FROM trades WHERE symbol = ?", (symbol,))
+                self.db.execute("DELETE FROM orders WHERE symbol = ?", (symbol,))
+                self.db.execute("DELETE FROM cursors WHERE symbol = ?", (symbol,))
+        return await self.sync(symbols)
+
+    # queries
+
+    def _select(self, table: str, where: List[str], args: List[Any], order: str = "time") -> List[Dict[str, Any]]:
+        sql = f"SELECT raw FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order}"
+        return [json.loads(row[0]) for row in self.db.execute(sql, args)]
+
+    @staticmethod
+    def _range(symbol: Optional[str], start: Optional[int], end: Optional[int]):
+        where, args = [], []
+        if symbol is not None:
+            where.append("symbol = ?")
+            args.append(symbol)
+        if start is not None:
+            where.append("time >= ?")
+            args.append(start)
+        if end is not None:
+            where.append("time <= ?")
+            args.append(end)
+        return where, args
+
+    def trades(self, symbol: Optional[str] = None, start: Optional[int] = None, end: Optional[int] = None) -> List[Dict[str, Any]]:
+        where, args = self._range(symbol, start, end)
+        return self._select("trades", where, args, "time, id")
+
+    def trades_for_order(self, order_id: int, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        where, args = self._range(symbol, None, None)
+        return self._select("trades", where + ["orderId = ?"], args + [order_id], "id")
+
+    def orders(
+        self,
+        symbol: Optional[str] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        where, args = self._range(symbol, start, end)
+        if status is not None:
+            where.append("status = ?")
+            args.append(status)
+        return self._select("orders", where, args, "time, orderId")
+
+    def order(self, order_id: int, symbol: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        where, args = self._range(symbol, None, None)
+        rows = self._select("orders", where + ["orderId = ?"], args + [order_id], "orderId")
+        return rows[0] if rows else None
+
+    def order_by_client_id(self, client_order_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._select("orders", ["clientOrderId = ?"], [client_order_id], "time")
+        return rows[-1] if rows else None
+
+    def order_lists(self, symbol: Optional[str] = None, start: Optional[int] = None, end: Optional[int] = None) -> List[Dict[str, Any]]:
+        where, args = self._range(symbol, start, end)
+        return self._select("order_lists", where, args, "time, orderListId")
+
+    def symbols(self) -> List[str]:
+        return [row[0] for row in self.db.execute("SELECT DISTINCT symbol FROM trades UNION SELECT DISTINCT symbol FROM orders")]
+
+    def last_trade_time(self, symbol: str) -> Optional[int]:
+        row = self.db.execute("SELECT MAX(time) FROM trades WHERE symbol = ?", (symbol,)).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,581 @@
+import bisect
+import itertools
+import json
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from binance_api import BinanceBase
+from utils.codec import SCHEMAS
+from utils.error import ClientError, ParameterValueError
+from utils.util import get_uuid
+
+Level = Tuple[float, float]
+
+ORDER_TYPES = (
+    "LIMIT", "MARKET", "LIMIT_MAKER", "STOP_LOSS", "STOP_LOSS_LIMIT", "TAKE_PROFIT", "TAKE_PROFIT_LIMIT",
+)
+
+# stop type -> whether it triggers at or below stopPrice for a SELL (above for a BUY)
+STOP_TYPES = {"STOP_LOSS": True, "STOP_LOSS_LIMIT": True, "TAKE_PROFIT": False, "TAKE_PROFIT_LIMIT": False}
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.8f}"
+
+
+class ReplayStore:
+    """Recorded market events ordered by time.
+
+    Events are normalised on load so replay does no parsing:
+      depth:      (bids, asks) lists of (price, qty)
+      bookTicker: (bidPrice, bidQty, askPrice, askQty)
+      trade:      (price, qty, isBuyerMaker)
+
+    A jsonl recording has one event per line, with "t" (ms), "type" and "s" keys and the
+    payload in REST or websocket field names, e.g.
+      {"t": 1700000000000, "type": "bookTicker", "s": "BTCUSDT", "b": "37000.1", "B": "1.2", "a": "37000.2", "A": "0.4"}
+    """
+
+    def __init__(self) -> None:
+        self.times: List[int] = []
+        self.events: List[Tuple[str, str, Any]] = []
+        self._sorted = True
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def add(self, time_ms: int, kind: str, symbol: str, data: Dict[str, Any]) -> None:
+        if kind == "depth":
+            event = (
+                [(float(p), float(q)) for p, q in data["bids"]],
+                [(float(p), float(q)) for p, q in data["asks"]],
+            )
+        elif kind == "bookTicker":
+            event = (
+                float(data.get("bidPrice", data.get("b"))),
+                float(data.get("bidQty", data.get("B"))),
+                float(data.get("askPrice", data.get("a"))),
+                float(data.get("askQty", data.get("A"))),
+            )
+        elif kind in ("trade", "aggTrade"):
+            kind = "trade"
+            event = (
+                float(data.get("price", data.get("p"))),
+                float(data.get("qty", data.get("q"))),
+                bool(data.get("isBuyerMaker", data.get("m"))),
+            )
+        else:
+            raise ParameterValueError([kind])
+        if self.times and time_ms < self.times[-1]:
+            self._sorted = False
+        self.times.append(time_ms)
+        self.events.append((kind, symbol, event))
+
+    def sort(self) -> None:
+        if self._sorted:
+            return
+        order = sorted(range(len(self.times)), key=self.times.__getitem__)
+        self.times = [self.times[i] for i in order]
+        self.events = [self.events[i] for i in order]
+        self._sorted = True
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "ReplayStore":
+        store = cls()
+        for record in records:
+            store.add(record["t"], record["type"], record["s"], record)
+        store.sort()
+        return store
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "ReplayStore":
+        with open(path) as f:
+            return cls.from_records(json.loads(line) for line in f if line.strip())
+
+
+class SimOrder:
+    __slots__ = (
+        "symbol", "orderId", "clientOrderId", "side", "type", "timeInForce", "price",
+        "origQty", "executedQty", "cummulativeQuoteQty", "status", "time", "updateTime",
+        "stopPrice", "isWorking",
+    )
+
+    def __init__(self, **fields: Any) -> None:
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    @property
+    def remaining(self) -> float:
+        return self.origQty - self.executedQty
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "orderId": self.orderId,
+            "orderListId": -1,
+            "clientOrderId": self.clientOrderId,
+            "price": _fmt(self.price),
+            "origQty": _fmt(self.origQty),
+            "executedQty": _fmt(self.executedQty),
+            "cummulativeQuoteQty": _fmt(self.cummulativeQuoteQty),
+            "status": self.status,
+            "timeInForce": self.timeInForce,
+            "type": self.type,
+            "side": self.side,
+            "time": self.time,
+            "updateTime": self.updateTime,
+            "stopPrice": _fmt(self.stopPrice),
+            "isWorking": self.isWorking,
+        }
+
+
+class MatchingSimulator:
+    """Replays a ReplayStore on a discrete event clock and fills orders against it.
+
+    Incoming marketable orders walk the recorded book (our fills do not deplete it);
+    resting limit orders fill from recorded trades through their price and from the
+    book crossing them. Stop and take profit orders rest until a recorded trade
+    reaches their stopPrice, then work as a market or limit order.
+    """
+
+    def __init__(
+        self,
+        store: ReplayStore,
+        fee_rate: float = 0.001,
+        balances: Optional[Dict[str, float]] = None,
+        assets: Optional[Dict[str, Tuple[str, str]]] = None,
+    ) -> None:
+        store.sort()
+        self.store = store
+        self.fee_rate = fee_rate
+        self.balances = dict(balances or {})
+        # symbol -> (base asset, quote asset), required for balance tracking
+        self.assets = dict(assets or {})
+        self.now = store.times[0] if len(store) else 0
+        self.cursor = 0
+        self.bids: Dict[str, List[Level]] = {}
+        self.asks: Dict[str, List[Level]] = {}
+        self._depth: Dict[str, Tuple[List[Level], List[Level]]] = {}
+        self.last_price: Dict[str, float] = {}
+        self.orders: Dict[int, SimOrder] = {}
+        self.open_orders: Dict[str, Dict[int, SimOrder]] = {}
+        self.trades: List[Dict[str, Any]] = []
+        self.execution_reports: deque = deque(maxlen=10000)
+        self.listeners: List[Callable[[Dict[str, Any]], Any]] = []
+        self._order_ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+
+    # clock
+
+    @property
+    def finished(self) -> bool:
+        return self.cursor >= len(self.store)
+
+    def advance_to(self, time_ms: int) -> int:
+        """Apply every event up to time_ms as one batch, return how many were applied."""
+
+        end = bisect.bisect_right(self.store.times, time_ms, self.cursor)
+        events = self.store.events
+        touched = set()
+        for i in range(self.cursor, end):
+            kind, symbol, data = events[i]
+            self.now = self.store.times[i]
+            if kind == "trade":
+                self.last_price[symbol] = data[0]
+                if symbol in self.open_orders:
+                    self._trigger_stops(symbol, data[0])
+                    self._fill_from_trade(symbol, data)
+            elif kind == "bookTicker":
+                # new top of book over the deeper levels of the last depth snapshot
+                bid, bid_qty, ask, ask_qty = data
+                bids, asks = self._depth.get(symbol, ((), ()))
+                self.bids[symbol] = [(bid, bid_qty)] + [l for l in bids if l[0] < bid]
+                self.asks[symbol] = [(ask, ask_qty)] + [l for l in asks if l[0] > ask]
+                touched.add(symbol)
+            else:
+                self._depth[symbol] = data
+                self.bids[symbol], self.asks[symbol] = data
+                touched.add(symbol)
+        for symbol in touched:
+            if symbol in self.open_orders:
+                self._fill_from_book(symbol)
+        count = end - self.cursor
+        self.cursor = end
+        self.now = max(self.now, time_ms)
+        return count
+
+    async def run(self, step_ms: Optional[int] = None, until: Optional[int] = None) -> AsyncIterator[int]:
+        """Advance the clock and yield the time after each batch.
+
+        With step_ms the clock moves in fixed steps, otherwise it jumps from one event
+        timestamp to the next (all events sharing a timestamp form one batch).
+        """
+
+        times = self.store.times
+        while not self.finished:
+            target = self.now + step_ms if step_ms else times[self.cursor]
+            if until is not None and target > until:
+                return
+            self.advance_to(target)
+            yield self.now
+
+    # matching
+
+    def _report(self, order: SimOrder, execution: str, last_qty: float = 0.0, last_price: float = 0.0, trade_id: int = -1) -> None:
+        report = {
+            "e": "executionReport",
+            "E": self.now,
+            "s": order.symbol,
+            "c": order.clientOrderId,
+            "S": order.side,
+            "o": order.type,
+            "f": order.timeInForce,
+            "q": _fmt(order.origQty),
+            "p": _fmt(order.price),
+            "x": execution,
+            "X": order.status,
+            "i": order.orderId,
+            "l": _fmt(last_qty),
+            "z": _fmt(order.executedQty),
+            "L": _fmt(last_price),
+            "P": _fmt(order.stopPrice),
+            "T": self.now,
+            "t": trade_id,
+            "Z": _fmt(order.cummulativeQuoteQty),
+        }
+        self.execution_reports.append(report)
+        for listener in self.listeners:
+            listener(report)
+
+    def _fill(self, order: SimOrder, qty: float, price: float, maker: bool) -> Dict[str, Any]:
+        qty = min(qty, order.remaining)
+        order.executedQty += qty
+        order.cummulativeQuoteQty += qty * price
+        order.updateTime = self.now
+        order.status = "FILLED" if order.remaining <= 1e-12 else "PARTIALLY_FILLED"
+        commission = qty * price * self.fee_rate
+        trade_id = next(self._trade_ids)
+        assets = self.assets.get(order.symbol)
+        if assets is not None:
+            base, quote = assets
+            sign = 1 if order.side == "BUY" else -1
+            self.balances[base] = self.balances.get(base, 0.0) + sign * qty
+            self.balances[quote] = self.balances.get(quote, 0.0) - sign * qty * price - commission
+        self.trades.append(
+            {
+                "symbol": order.symbol,
+                "id": trade_id,
+                "orderId": order.orderId,
+                "orderListId": -1,
+                "price": _fmt(price),
+                "qty": _fmt(qty),
+                "quoteQty": _fmt(qty * price),
+                "commission": _fmt(commission),
+                "commissionAsset": assets[1] if assets else "",
+                "time": self.now,
+                "isBuyer": order.side == "BUY",
+                "isMaker": maker,
+                "isBestMatch": True,
+            }
+        )
+        self._report(order, "TRADE", qty, price, trade_id)
+        if order.status == "FILLED":
+            self.open_orders.get(order.symbol, {}).pop(order.orderId, None)
+        return {"price": _fmt(price), "qty": _fmt(qty), "commission": _fmt(commission), "tradeId": trade_id}
+
+    def _take(self, order: SimOrder, limit: Optional[float]) -> List[Dict[str, Any]]:
+        levels = self.asks.get(order.symbol, []) if order.side == "BUY" else self.bids.get(order.symbol, [])
+        fills = []
+        for price, qty in levels:
+            if order.remaining <= 1e-12:
+                break
+            if limit is not None and (price > limit if order.side == "BUY" else price < limit):
+                break
+            fills.append(self._fill(order, qty, price, False))
+        return fills
+
+    def _fill_from_trade(self, symbol: str, trade: Tuple[float, float, bool]) -> None:
+        price, qty, _ = trade
+        for order in list(self.open_orders[symbol].values()):
+            if qty <= 0:
+                break
+            if not order.isWorking:
+                continue
+            if (order.side == "BUY" and price <= order.price) or (order.side == "SELL" and price >= order.price):
+                filled = min(qty, order.remaining)
+                self._fill(order, filled, order.price, True)
+                qty -= filled
+
+    def _fill_from_book(self, symbol: str) -> None:
+        for order in list(self.open_orders[symbol].values()):
+            if order.isWorking:
+                self._take(order, order.price)
+
+    @staticmethod
+    def _stop_reached(order: SimOrder, price: float) -> bool:
+        at_or_below = STOP_TYPES[order.type] == (order.side == "SELL")
+        return price <= order.stopPrice if at_or_below else price >= order.stopPrice
+
+    def _trigger_stops(self, symbol: str, price: float) -> None:
+        for order in list(self.open_orders[symbol].values()):
+            if not order.isWorking and self._stop_reached(order, price):
+                order.isWorking = True
+                order.updateTime = self.now
+                del self.open_orders[symbol][order.orderId]
+                self._execute(order)
+
+    def new_order(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        symbol, side, order_type = payload["symbol"], payload["side"], payload["type"]
+        if order_type not in ORDER_TYPES:
+            raise ClientError(400, -1116, "Invalid orderType.", {})
+        stop_price = float(payload.get("stopPrice") or 0)
+        is_stop = order_type in STOP_TYPES
+        if is_stop and not stop_price:
+            raise ClientError(
+                400, -1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.", {}
+            )
+        price = float(payload.get("price") or 0)
+        quantity = payload.get("quantity")
+        if quantity is None and payload.get("quoteOrderQty") is not None:
+            book = self.asks if side == "BUY" else self.bids
+            top = book.get(symbol) or [(self.last_price.get(symbol, 0.0), 0.0)]
+            quantity = float(payload["quoteOrderQty"]) / top[0][0] if top[0][0] else 0.0
+        order = SimOrder(
+            symbol=symbol,
+            orderId=0,
+            clientOrderId=payload.get("newClientOrderId") or get_uuid(),
+            side=side,
+            type=order_type,
+            timeInForce=payload.get("timeInForce", "GTC"),
+            price=price,
+            origQty=float(quantity or 0),
+            executedQty=0.0,
+            cummulativeQuoteQty=0.0,
+            status="NEW",
+            time=self.now,
+            updateTime=self.now,
+            stopPrice=stop_price,
+            isWorking=not is_stop,
+        )
+        if is_stop and symbol in self.last_price and self._stop_reached(order, self.last_price[symbol]):
+            raise ClientError(400, -2010, "Order would trigger immediately.", {})
+        order.orderId = next(self._order_ids)
+        self.orders[order.orderId] = order
+        self._report(order, "NEW")
+
+        fills = self._execute(order) if order.isWorking else []
+        if not order.isWorking:
+            self.open_orders.setdefault(symbol, {})[order.orderId] = order
+
+        response = order.to_dict()
+        response["transactTime"] = self.now
+        response["fills"] = fills
+        return response
+
+    def _execute(self, order: SimOrder) -> List[Dict[str, Any]]:
+        """Match a working order against the book and rest what is left of it."""
+
+        fills = []
+        symbol, side, price = order.symbol, order.side, order.price
+        if order.type == "LIMIT_MAKER":
+            crossing = self.asks.get(symbol) if side == "BUY" else self.bids.get(symbol)
+            if crossing and (crossing[0][0] <= price if side == "BUY" else crossing[0][0] >= price):
+                order.status = "EXPIRED"
+                self._report(order, "EXPIRED")
+        else:
+            market = order.type in ("MARKET", "STOP_LOSS", "TAKE_PROFIT")
+            limit = None if market else price
+            if order.timeInForce == "FOK" and self._available(order, limit) < order.origQty:
+                order.status = "EXPIRED"
+                self._report(order, "EXPIRED")
+            else:
+                fills = self._take(order, limit)
+                if order.remaining > 1e-12 and (market or order.timeInForce == "IOC"):
+                    order.status = "EXPIRED"
+                    self._report(order, "EXPIRED")
+        if order.status in ("NEW", "PARTIALLY_FILLED"):
+            self.open_orders.setdefault(symbol, {})[order.orderId] = order
+        return fills
+
+    def _available(self, order: SimOrder, limit: Optional[float]) -> float:
+        levels = self.asks.get(order.symbol, []) if order.side == "BUY" else self.bids.get(order.symbol, [])
+        if limit is None:
+            return sum(qty for _, qty in levels)
+        return sum(qty for price, qty in levels if (price <= limit if order.side == "BUY" else price >= limit))
+
+    def find_order(self, payload: Dict[str, Any]) -> SimOrder:
+        order = None
+        if payload.get("orderId") is not None:
+            order = self.orders.get(int(payload["orderId"]))
+        elif payload.get("origClientOrderId") is not None:
+            order = next((o for o in self.orders.values() if o.clientOrderId == payload["origClientOrderId"]), None)
+        if order is None or order.symbol != payload.get("symbol", order.symbol):
+            raise ClientError(400, -2013, "Order does not exist.", {})
+        return order
+
+    def cancel_order(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        order = self.find_order(payload)
+        if order.orderId not in self.open_orders.get(order.symbol, {}):
+            raise ClientError(400, -2011, "Unknown order sent.", {})
+        del self.open_orders[order.symbol][order.orderId]
+        order.status = "CANCELED"
+        order.updateTime = self.now
+        self._report(order, "CANCELED")
+        response = order.to_dict()
+        response["origClientOrderId"] = order.clientOrderId
+        return response
+
+    def cancel_open_orders(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        orders = list(self.open_orders.get(payload["symbol"], {}).values())
+        return [self.cancel_order({"orderId": order.orderId}) for order in orders]
+
+    def depth(self, symbol: str, limit: int = 100) -> Dict[str, Any]:
+        return {
+            "lastUpdateId": self.cursor,
+            "bids": [[_fmt(p), _fmt(q)] for p, q in self.bids.get(symbol, [])[:limit]],
+            "asks": [[_fmt(p), _fmt(q)] for p, q in self.asks.get(symbol, [])[:limit]],
+        }
+
+    def book_ticker(self, symbol: str) -> Dict[str, Any]:
+        bid = (self.bids.get(symbol) or [(0.0, 0.0)])[0]
+        ask = (self.asks.get(symbol) or [(0.0, 0.0)])[0]
+        return {
+            "symbol": symbol,
+            "bidPrice": _fmt(bid[0]),
+            "bidQty": _fmt(bid[1]),
+            "askPrice": _fmt(ask[0]),
+            "askQty": _fmt(ask[1]),
+        }
+
+    def symbols(self) -> List[str]:
+        return sorted(set(self.bids) | set(self.last_price))
+
+
+class NullSession:
+    """Stands in for aiohttp.ClientSession when no network is used."""
+
+    closed = True
+
+    async def close(self) -> None:
+        pass
+
+
+def _symbols_param(payload: Dict[str, Any], sim: MatchingSimulator) -> List[str]:
+    if payload.get("symbol"):
+        return [payload["symbol"]]
+    if payload.get("symbols"):
+        return json.loads(payload["symbols"])
+    return sim.symbols()
+
+
+class ReplayBase(BinanceBase):
+    """BinanceBase whose transport is a MatchingSimulator: the mixin methods run
+    unchanged against recorded data, with the replay clock as timestamp.
+
+    class Backtest(ReplayBase, SpotMarket, SpotOrder):
+        ...
+
+    client = Backtest(ReplayStore.from_jsonl("btcusdt.jsonl"))
+    async for now in client.simulator.run(step_ms=100):
+        book = await client.book_ticker("BTCUSDT")
+        ...
+    """
+
+    def __init__(self, store: ReplayStore, simulator: Optional[MatchingSimulator] = None, **kwargs: Any) -> None:
+        kwargs.setdefault("api_key", "replay")
+        kwargs.setdefault("api_secret", "replay")
+        super().__init__(session=NullSession(), **kwargs)
+        self.simulator = simulator or MatchingSimulator(store)
+        sim = self.simulator
+        self.routes: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Any]] = {
+            ("GET", "/api/v3/ping"): lambda p: {},
+            ("GET", "/api/v3/time"): lambda p: {"serverTime": sim.now},
+            ("GET", "/api/v3/depth"): lambda p: sim.depth(p["symbol"], int(p.get("limit") or 100)),
+            ("GET", "/api/v3/ticker/bookTicker"): self._book_ticker,
+            ("GET", "/api/v3/ticker/price"): self._ticker_price,
+            ("POST", "/api/v3/order/test"): lambda p: {},
+            ("POST", "/api/v3/order"): sim.new_order,
+            ("DELETE", "/api/v3/order"): sim.cancel_order,
+            ("GET", "/api/v3/order"): lambda p: sim.find_order(p).to_dict(),
+            ("GET", "/api/v3/openOrders"): self._open_orders,
+            ("DELETE", "/api/v3/openOrders"): sim.cancel_open_orders,
+            ("GET", "/api/v3/allOrders"): lambda p: [o.to_dict() for o in sim.orders.values() if o.symbol == p["symbol"]],
+            ("GET", "/api/v3/myTrades"): lambda p: [t for t in sim.trades if t["symbol"] == p["symbol"]],
+            ("GET", "/api/v3/account"): self._account,
+            ("POST", "/api/v3/order/cancelReplace"): self._cancel_replace,
+        }
+
+    def get_timestamp(self) -> int:
+        return self.simulator.now
+
+    async def sign_request(self, http_method: str, url_path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        # nothing verifies a signature here, skip the hashing
+        payload = payload or {}
+        payload["timestamp"] = self.get_timestamp()
+        return await self.send_request(http_method, url_path, payload)
+
+    async def send_request(
+        self,
+        http_method: str,
+        url_path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        schema: Optional[str] = None,
+    ) -> Any:
+        if payload:
+            payload.pop("deadline", None)
+        handler = self.routes.get((http_method, url_path))
+        if handler is None:
+            raise ClientError(400, -1100, f"{http_method} {url_path} is not supported in replay", {})
+        data = handler({k: v for k, v in (payload or {}).items() if v is not None})
+        if schema is not None and self.typed_responses:
+            return SCHEMAS[schema][1](data)
+        return data
+
+    def _book_ticker(self, payload: Dict[str, Any]) -> Any:
+        data = [self.simulator.book_ticker(s) for s in _symbols_param(payload, self.simulator)]
+        return data[0] if payload.get("symbol") else data
+
+    def _ticker_price(self, payload: Dict[str, Any]) -> Any:
+        sim = self.simulator
+        data = []
+        for symbol in _symbols_param(payload, sim):
+            price = sim.last_price.get(symbol)
+            if price is None:
+                book = sim.book_ticker(symbol)
+                price = (float(book["bidPrice"]) + float(book["askPrice"])) / 2
+            data.append({"symbol": symbol, "price": _fmt(price)})
+        return data[0] if payload.get("symbol") else data
+
+    def _open_orders(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        sim = self.simulator
+        symbols = [payload["symbol"]] if payload.get("symbol") else list(sim.open_orders)
+        return [o.to_dict() for s in symbols for o in sim.open_orders.get(s, {}).values()]
+
+    def _account(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "updateTime": self.simulator.now,
+            "accountType": "SPOT",
+            "balances": [
+                {"asset": asset, "free": _fmt(amount), "locked": _fmt(0.0)}
+                for asset, amount in self.simulator.balances.items()
+            ],
+        }
+
+    def _cancel_replace(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        cancel = {"symbol": payload["symbol"]}
+        if payload.get("cancelOrderId") is not None:
+            cancel["orderId"] = payload["cancelOrderId"]
+        else:
+            cancel["origClientOrderId"] = payload.get("cancelOrigClientOrderId")
+        try:
+            cancel_response = self.simulator.cancel_order(cancel)
+        except ClientError:
+            if payload.get("cancelReplaceMode") == "STOP_ON_FAILURE":
+                raise
+            cancel_response = None
+        return {
+            "cancelResult": "SUCCESS" if cancel_response else "FAILURE",
+            "newOrderResult": "SUCCESS",
+            "cancelResponse": cancel_response,
+            "newOrderResponse": self.simulator.new_order(payload),
+        }
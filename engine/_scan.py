@@ -0,0 +1,140 @@
+import asyncio
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from engine._reconcile import OPEN_STATUSES
+from utils.concurrency import AdaptiveConcurrency, ConcurrencyPolicy, is_overload
+from utils.error import ClientError, ServerError
+
+
+class ActivityScanner:
+    """Finds account trades and orders across symbols without querying every symbol.
+
+    The symbol set is first narrowed with cheap signals: non zero balances from
+    `account` (by base asset), symbols seen in executionReport events, and symbols in
+    the Reconciler index. Only those are queried, concurrently under the "signed" limit
+    of an AdaptiveConcurrency (the client's own one if it has it, otherwise an AIMD
+    policy) that shrinks on 429/-1003/5xx, and the results are merged into one time
+    ordered list.
+
+    With a reconciler the symbols are synced into its index instead, its pages sent
+    through the same limit and retries; a symbol it has no cursor for starts at `since`.
+
+    scanner = ActivityScanner(client, reconciler)
+    scanner.on_execution_report(event)  # from the user data stream
+    trades = await scanner.scan_trades(since=day_start)
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        reconciler: Any = None,
+        base_assets: Optional[Dict[str, str]] = None,
+        concurrency: int = 4,
+        max_concurrency: int = 32,
+        page_limit: int = 1000,
+        max_retries: int = 3,
+    ) -> None:
+        self.client = client
+        self.reconciler = reconciler
+        # symbol -> base asset, loaded from exchange_info when not given
+        self.base_assets = dict(base_assets or {})
+        self.page_limit = page_limit
+        self.max_retries = max_retries
+        if getattr(client, "concurrency", None) is not None:
+            # every request already waits for a slot inside the client
+            self.concurrency = None
+        else:
+            policy = ConcurrencyPolicy(initial=concurrency, maximum=max_concurrency, algorithm="aimd")
+            self.concurrency = AdaptiveConcurrency(policy)
+        self._reported: Dict[str, int] = {}
+
+    def on_execution_report(self, event: Dict[str, Any]) -> None:
+        self._reported[event["s"]] = max(self._reported.get(event["s"], 0), event.get("E", 0))
+
+    async def _load_base_assets(self) -> None:
+        if self.base_assets:
+            return
+        info = await self.client.exchange_info()
+        self.base_assets = {s["symbol"]: s["baseAsset"] for s in info["symbols"]}
+
+    async def candidates(self, since: Optional[int] = None, extra: Iterable[str] = ()) -> Set[str]:
+        """Symbols that may have activity since the given time (ms)."""
+
+        await self._load_base_assets()
+        account = await self.client.account()
+        held = {
+            b["asset"]
+            for b in account["balances"]
+            if float(b["free"]) > 0 or float(b["locked"]) > 0
+        }
+        symbols = {symbol for symbol, base in self.base_assets.items() if base in held}
+        symbols.update(s for s, t in self._reported.items() if since is None or t >= since)
+        if self.reconciler is not None:
+            for status in OPEN_STATUSES:
+                symbols.update(o["symbol"] for o in self.reconciler.orders(status=status))
+            if since is not None:
+                symbols.update(t["symbol"] for t in self.reconciler.trades(start=since))
+        symbols.update(extra)
+        return symbols
+
+    async def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self.concurrency is None:
+                    return await getattr(self.client, method)(*args, **kwargs)
+                async with self.concurrency.slot("signed", getattr(self.client, "weight_limiter", None)):
+                    return await getattr(self.client, method)(*args, **kwargs)
+            except (ClientError, ServerError) as e:
+                if not is_overload(e) or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+    async def _pages(
+        self, method: str, symbol: str, cursor_key: str, id_key: str, since: Optional[int], until: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        kwargs = {"startTime": since} if since is not None else {cursor_key: 0}
+        rows: List[Dict[str, Any]] = []
+        while True:
+            page = await self._call(method, symbol, limit=self.page_limit, **kwargs)
+            if until is not None:
+                page = [row for row in page if row["time"] <= until]
+            rows.extend(page)
+            if len(page) < self.page_limit:
+                return rows
+            kwargs = {cursor_key: page[-1][id_key] + 1}
+
+    async def _symbol_trades(self, symbol: str, since: Optional[int], until: Optional[int]) -> List[Dict[str, Any]]:
+        if self.reconciler is not None:
+            # pages go through the scanner's concurrency limit and overload retries
+            await self.reconciler.sync_trades(symbol, since, self._call)
+            return self.reconciler.trades(symbol, since, until)
+        return await self._pages("my_trades", symbol, "fromId", "id", since, until)
+
+    async def _symbol_orders(self, symbol: str, since: Optional[int], until: Optional[int]) -> List[Dict[str, Any]]:
+        if self.reconciler is not None:
+            await self.reconciler.sync_orders(symbol, since, self._call)
+            return self.reconciler.orders(symbol, since, until)
+        return await self._pages("get_orders", symbol, "orderId", "orderId", since, until)
+
+    async def _scan(self, fetch, since, until, symbols) -> List[Dict[str, Any]]:
+        if symbols is None:
+            symbols = await self.candidates(since)
+        results = await asyncio.gather(*(fetch(symbol, since, until) for symbol in sorted(symbols)))
+        return merge_by_time(results)
+
+    async def scan_trades(
+        self, since: Optional[int] = None, until: Optional[int] = None, symbols: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._scan(self._symbol_trades, since, until, symbols)
+
+    async def scan_orders(
+        self, since: Optional[int] = None, until: Optional[int] = None, symbols: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._scan(self._symbol_orders, since, until, symbols)
+
+
+def merge_by_time(results: Iterable[List[Dict[str, Any]]], key: str = "time") -> List[Dict[str, Any]]:
+    """Merge per symbol lists, each already sorted by time, into one ordered list."""
+
+    return list(heapq.merge(*results, key=lambda row: row[key]))
@@ -0,0 +1,235 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+import zlib
+from types import TracebackType
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Type
+
+from binance_api import BinanceBase
+from utils.error import ShardError
+from utils.limiter import SharedWeightLimiter
+
+# seconds between checks that the worker processes are alive
+LIVENESS_INTERVAL = 0.5
+
+
+def _portable_error(error: Exception) -> Exception:
+    # exceptions whose __init__ does not forward its arguments cannot be unpickled in the parent
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return ShardError(f"{type(error).__name__}: {error!r}")
+
+
+async def _run_call(client, request_id, method, args, kwargs, results):
+    try:
+        result = await getattr(client, method)(*args, **kwargs)
+    except Exception as e:
+        results.put((request_id, False, _portable_error(e)))
+    else:
+        results.put((request_id, True, result))
+
+
+async def _serve(client_class, client_kwargs, weight_limiter, tasks, results):
+    loop = asyncio.get_running_loop()
+    pending = set()
+    async with client_class(weight_limiter=weight_limiter, **client_kwargs) as client:
+        while True:
+            task = await loop.run_in_executor(None, tasks.get)
+            if task is None:
+                break
+            request_id, method, args, kwargs = task
+            future = asyncio.ensure_future(_run_call(client, request_id, method, args, kwargs, results))
+            pending.add(future)
+            future.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+
+
+def _worker_main(client_class, client_kwargs, weight_limiter, tasks, results):
+    asyncio.run(_serve(client_class, client_kwargs, weight_limiter, tasks, results))
+
+
+class ShardedClient:
+    """Runs a client class in several worker processes, partitioned by symbol.
+
+    Every worker owns its event loop, session and signing, and draws request weight
+    from one SharedWeightLimiter, so together they stay within the IP budget. Methods
+    keep the signatures of the mixins and are routed by their `symbol` argument:
+
+    class Client(BinanceBase, SpotMarket, SpotOrder):  # must be importable by the workers
+        ...
+
+    async with ShardedClient(Client, workers=4) as sharded:
+        await sharded.klines("BTCUSDT", "1m")
+        async for symbol, depth in sharded.map("depth", symbols, limit=5):
+            ...
+
+    A worker that exits fails its pending calls with ShardError, and so do later calls
+    routed to it.
+    """
+
+    def __init__(
+        self,
+        client_class: Type[BinanceBase],
+        workers: int = 4,
+        weight_limit: int = 6000,
+        start_method: str = "spawn",
+        **client_kwargs: Any,
+    ) -> None:
+        self.client_class = client_class
+        self.client_kwargs = client_kwargs
+        self.workers = workers
+        self._ctx = multiprocessing.get_context(start_method)
+        self.weight_limiter = SharedWeightLimiter(weight_limit, self._ctx)
+        self._tasks = [self._ctx.Queue() for _ in range(workers)]
+        self._results = self._ctx.Queue()
+        self._processes: List[Any] = []
+        self._futures: Dict[int, asyncio.Future] = {}
+        # request id -> shard it was sent to
+        self._shards: Dict[int, int] = {}
+        # shard -> exit code of a worker that died
+        self._dead: Dict[int, Optional[int]] = {}
+        self._closing = False
+        self._ids = itertools.count()
+        self._round_robin = itertools.cycle(range(workers))
+        self._reader: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._logger = logging.getLogger(__name__)
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        for tasks in self._tasks:
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(self.client_class, self.client_kwargs, self.weight_limiter, tasks, self._results),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+
+    def _read_results(self) -> None:
+        next_check = time.monotonic() + LIVENESS_INTERVAL
+        while True:
+            try:
+                item = self._results.get(timeout=LIVENESS_INTERVAL)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                return
+            if item:
+                self._loop.call_soon_threadsafe(self._resolve, item)
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + LIVENESS_INTERVAL
+                self._check_workers()
+
+    def _check_workers(self) -> None:
+        # reader thread: a worker that crashed or never started leaves its calls unanswered
+        if self._closing:
+            return
+        for shard, process in enumerate(self._processes):
+            if shard not in self._dead and not process.is_alive():
+                self._dead[shard] = process.exitcode
+                self._loop.call_soon_threadsafe(self._fail_shard, shard, process.exitcode)
+
+    def _fail_shard(self, shard: int, exitcode: Optional[int]) -> None:
+        self._logger.error("shard %d worker exited with code %s", shard, exitcode)
+        for request_id in [r for r, s in self._shards.items() if s == shard]:
+            del self._shards[request_id]
+            future = self._futures.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_exception(ShardError(f"shard {shard} worker exited with code {exitcode}"))
+
+    def _resolve(self, item: Tuple[int, bool, Any]) -> None:
+        request_id, ok, value = item
+        self._shards.pop(request_id, None)
+        future = self._futures.pop(request_id, None)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def shard_of(self, symbol: Optional[str]) -> int:
+        if not symbol:
+            for _ in range(self.workers):
+                shard = next(self._round_robin)
+                if shard not in self._dead:
+                    return shard
+            return shard
+        return zlib.crc32(symbol.encode()) % self.workers
+
+    def submit(self, method: str, *args: Any, **kwargs: Any) -> asyncio.Future:
+        symbol = kwargs.get("symbol")
+        if symbol is None and args and isinstance(args[0], str):
+            symbol = args[0]
+        shard = self.shard_of(symbol)
+        if shard in self._dead:
+            raise ShardError(f"shard {shard} worker exited with code {self._dead[shard]}")
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        self._futures[request_id] = future
+        self._shards[request_id] = shard
+        self._tasks[shard].put((request_id, method, args, kwargs))
+        return future
+
+    async def call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        return await self.submit(method, *args, **kwargs)
+
+    async def map(
+        self, method: str, symbols: Iterable[str], *args: Any, **kwargs: Any
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Call method for every symbol, yielding (symbol, result) as workers finish.
+        A failed call yields its exception as the result.
+        """
+
+        async def tagged(symbol: str) -> Tuple[str, Any]:
+            try:
+                return symbol, await self.submit(method, symbol, *args, **kwargs)
+            except Exception as e:
+                return symbol, e
+
+        calls = [tagged(symbol) for symbol in symbols]
+        for call in asyncio.as_completed(calls):
+            yield await call
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        async def proxy(*args: Any, **kwargs: Any) -> Any:
+            return await self.call(method, *args, **kwargs)
+
+        return proxy
+
+    async def close(self) -> None:
+        self._closing = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join)
+        self._results.put(None)
+        if self._reader is not None:
+            await loop.run_in_executor(None, self._reader.join)
+        for future in self._futures.values():
+            if not future.done():
+                future.cancel()
+        self._futures.clear()
+        self._shards.clear()
+
+    async def __aenter__(self) -> "ShardedClient":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type: Optional[type], exc_value: Optional[Exception], traceback: Optional[TracebackType]) -> None:
+        await self.close()
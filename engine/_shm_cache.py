@@ -0,0 +1,344 @@
+import asyncio
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.error import ClientError, ParameterArgumentError, ParameterValueError
+
+MAGIC = 0x424E4D44  # "BNMD"
+VERSION = 1
+SYMBOL_SIZE = 16
+# limits GET /api/v3/depth accepts
+DEPTH_LIMITS = (5, 10, 20, 50, 100, 500, 1000, 5000)
+# magic, version, symbols, depth levels
+HEADER = np.dtype([("magic", "u4"), ("version", "u4"), ("symbols", "u4"), ("levels", "u4")])
+
+
+def slot_dtype(levels: int) -> np.dtype:
+    return np.dtype(
+        [
+            ("book_update_id", "i8"),
+            ("book_time", "i8"),
+            ("bid_price", "f8"),
+            ("bid_qty", "f8"),
+            ("ask_price", "f8"),
+            ("ask_qty", "f8"),
+            ("depth_update_id", "i8"),
+            ("depth_time", "i8"),
+            ("bid_levels", "i4"),
+            ("ask_levels", "i4"),
+            ("bids", "f8", (levels, 2)),
+            ("asks", "f8", (levels, 2)),
+        ]
+    )
+
+
+class _Layout:
+    """header | symbol names | seq per slot | slots, all views on one shared buffer."""
+
+    def __init__(self, buffer: Any, symbols: int, levels: int) -> None:
+        offset = HEADER.itemsize
+        self.header = np.ndarray((), HEADER, buffer, 0)
+        self.names = np.ndarray((symbols,), f"S{SYMBOL_SIZE}", buffer, offset)
+        offset += symbols * SYMBOL_SIZE
+        offset += -offset % 8
+        self.seq = np.ndarray((symbols,), "u8", buffer, offset)
+        # plain memoryviews for the reader, indexing them is much cheaper than numpy scalars
+        self.seq_view = buffer[offset : offset + symbols * 8].cast("Q")
+        offset += symbols * 8
+        self.dtype = slot_dtype(levels)
+        self.slots = np.ndarray((symbols,), self.dtype, buffer, offset)
+        self.slots_view = buffer[offset : offset + symbols * self.dtype.itemsize]
+
+    def release(self) -> None:
+        self.seq_view.release()
+        self.slots_view.release()
+
+    @staticmethod
+    def size(symbols: int, levels: int) -> int:
+        offset = HEADER.itemsize + symbols * SYMBOL_SIZE
+        offset += -offset % 8
+        return offset + symbols * 8 + symbols * slot_dtype(levels).itemsize
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.8f}"
+
+
+def _symbol_of(book: Any) -> str:
+    # typed_responses clients return utils.codec.BookTicker objects instead of dicts
+    return book["symbol"] if isinstance(book, dict) else book.symbol
+
+
+class MarketDataFeeder:
+    """Single writer of the shared market data cache.
+
+    Keeps the book ticker and the top `levels` of depth of every symbol in a shared
+    memory block. Each symbol slot is guarded by a seqlock: its sequence number is
+    odd while the slot is written, so readers in other processes retry instead of
+    taking a torn copy, and the writer never waits on them.
+
+    async with client, MarketDataFeeder(client, symbols, name="binance_md") as feeder:
+        await feeder.run(book_interval=1, depth_interval=5)
+    """
+
+    def __init__(self, client: Any, symbols: Iterable[str], levels: int = 20, name: str = "binance_md") -> None:
+        self.client = client
+        self.symbols = list(symbols)
+        self.levels = levels
+        if any(len(s) > SYMBOL_SIZE for s in self.symbols):
+            raise ParameterValueError([s for s in self.symbols if len(s) > SYMBOL_SIZE])
+        if not 0 < levels <= DEPTH_LIMITS[-1]:
+            # deeper than any depth request can fill
+            raise ParameterValueError([f"levels={levels}"])
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        size = _Layout.size(len(self.symbols), levels)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._layout = _Layout(self.shm.buf, len(self.symbols), levels)
+        self._layout.names[:] = [s.encode() for s in self.symbols]
+        self._layout.seq[:] = 0
+        self._layout.slots[:] = np.zeros(1, self._layout.slots.dtype)
+        self._layout.header[()] = (MAGIC, VERSION, len(self.symbols), levels)
+        self._scratch = np.zeros(1, self._layout.slots.dtype)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _begin(self, slot: int) -> np.ndarray:
+        # start from the current content so fields not written keep their values
+        scratch = self._scratch
+        scratch[0] = self._layout.slots[slot]
+        return scratch
+
+    def _commit(self, slot: int, scratch: np.ndarray) -> None:
+        seq = self._layout.seq
+        seq[slot] += 1
+        self._layout.slots[slot] = scratch[0]
+        seq[slot] += 1
+
+    def write_book(self, symbol: str, book: Any, update_id: int = 0) -> bool:
+        slot = self.index.get(symbol)
+        if slot is None:
+            return False
+        get = book.get if isinstance(book, dict) else lambda name: getattr(book, name)
+        record = self._begin(slot)[0]
+        record["book_update_id"] = update_id
+        record["book_time"] = int(time.time() * 1000)
+        record["bid_price"] = float(get("bidPrice"))
+        record["bid_qty"] = float(get("bidQty"))
+        record["ask_price"] = float(get("askPrice"))
+        record["ask_qty"] = float(get("askQty"))
+        self._commit(slot, self._scratch)
+        return True
+
+    def write_depth(self, symbol: str, depth: Any) -> bool:
+        slot = self.index.get(symbol)
+        if slot is None:
+            return False
+        get = depth.get if isinstance(depth, dict) else lambda name: getattr(depth, name)
+        bids = np.asarray(get("bids")[: self.levels], dtype="f8").reshape(-1, 2)
+        asks = np.asarray(get("asks")[: self.levels], dtype="f8").reshape(-1, 2)
+        record = self._begin(slot)[0]
+        record["depth_update_id"] = get("lastUpdateId")
+        record["depth_time"] = int(time.time() * 1000)
+        record["bid_levels"] = len(bids)
+        record["ask_levels"] = len(asks)
+        record["bids"][: len(bids)] = bids
+        record["asks"][: len(asks)] = asks
+        self._commit(slot, self._scratch)
+        return True
+
+    def on_book_ticker_event(self, event: Dict[str, Any]) -> bool:
+        """Write a <symbol>@bookTicker websocket event."""
+
+        book = {"bidPrice": event["b"], "bidQty": event["B"], "askPrice": event["a"], "askQty": event["A"]}
+        return self.write_book(event["s"], book, event.get("u", 0))
+
+    async def refresh_books(self) -> int:
+        # one request for every symbol, weight 4
+        books = await self.client.book_ticker()
+        return sum(self.write_book(_symbol_of(book), book) for book in books)
+
+    async def refresh_depth(self, symbols: Optional[Iterable[str]] = None, concurrency: int = 8) -> int:
+        semaphore = asyncio.Semaphore(concurrency)
+        limit = next(l for l in DEPTH_LIMITS if l >= self.levels)
+
+        async def one(symbol: str) -> bool:
+            async with semaphore:
+                return self.write_depth(symbol, await self.client.depth(symbol, limit=limit))
+
+        results = await asyncio.gather(*(one(symbol) for symbol in (symbols or self.symbols)))
+        return sum(results)
+
+    async def run(self, book_interval: float = 1.0, depth_interval: Optional[float] = None) -> None:
+        """Refresh books every book_interval and depth every depth_interval seconds until cancelled."""
+
+        next_depth = 0.0
+        while True:
+            await self.refresh_books()
+            if depth_interval is not None and time.monotonic() >= next_depth:
+                next_depth = time.monotonic() + depth_interval
+                await self.refresh_depth()
+            await asyncio.sleep(book_interval)
+
+    def close(self) -> None:
+        self._layout.release()
+        del self._layout
+        self.shm.close()
+        self.shm.unlink()
+
+    async def __aenter__(self) -> "MarketDataFeeder":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # before 3.13 the resource tracker of a reader unlinks the block when the reader exits
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedMarketData:
+    """Reader of a MarketDataFeeder cache, with the signatures of SpotMarket.book_ticker
+    and SpotMarket.depth so a strategy can take it in place of a client.
+
+    Reads copy one slot between two equal, even sequence numbers, a few microseconds
+    per symbol and no request weight. Symbols that are not cached, depth deeper than
+    the cache, or data older than max_age seconds go to `fallback` (a client) when
+    given, otherwise raise.
+
+    market = SharedMarketData("binance_md", fallback=client)
+    book = await market.book_ticker("BTCUSDT")
+    depth = await market.depth("BTCUSDT", limit=10)
+    """
+
+    def __init__(self, name: str = "binance_md", fallback: Any = None, max_age: Optional[float] = None) -> None:
+        self.shm = _attach(name)
+        header = np.ndarray((), HEADER, self.shm.buf, 0)
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            self.shm.close()
+            raise ParameterValueError([name])
+        self.levels = int(header["levels"])
+        self._layout = _Layout(self.shm.buf, int(header["symbols"]), self.levels)
+        self.index = {name.decode(): i for i, name in enumerate(self._layout.names)}
+        self.fallback = fallback
+        self.max_age = max_age
+
+    def _try_read(self, slot: int) -> Optional[np.void]:
+        layout = self._layout
+        seq = layout.seq_view
+        size = layout.dtype.itemsize
+        start = slot * size
+        before = seq[slot]
+        if before & 1:
+            return None
+        raw = layout.slots_view[start : start + size].tobytes()
+        if seq[slot] != before:
+            return None
+        return np.frombuffer(raw, layout.dtype)[0]
+
+    def read(self, symbol: str, timeout: float = 0.1) -> np.void:
+        """Consistent copy of a symbol's slot, for readers without an event loop."""
+
+        slot = self.index[symbol]
+        give_up = None
+        while True:
+            record = self._try_read(slot)
+            if record is not None:
+                return record
+            # the feeder is inside a write, let it run (it may share our core)
+            if give_up is None:
+                give_up = time.monotonic() + timeout
+            elif time.monotonic() > give_up:
+                raise ParameterArgumentError(f"no consistent read of {symbol}, is the feeder stuck?")
+            time.sleep(0)
+
+    async def read_async(self, symbol: str, timeout: float = 0.1) -> np.void:
+        """`read` that waits for the feeder by yielding to the event loop."""
+
+        slot = self.index[symbol]
+        give_up = None
+        while True:
+            record = self._try_read(slot)
+            if record is not None:
+                return record
+            if give_up is None:
+                give_up = time.monotonic() + timeout
+            elif time.monotonic() > give_up:
+                raise ParameterArgumentError(f"no consistent read of {symbol}, is the feeder stuck?")
+            await asyncio.sleep(0)
+
+    def _fresh(self, time_ms: int) -> bool:
+        if time_ms == 0:
+            return False
+        return self.max_age is None or time.time() * 1000 - time_ms <= self.max_age * 1000
+
+    async def _book(self, symbol: str) -> Optional[Dict[str, str]]:
+        if symbol not in self.index:
+            return None
+        record = await self.read_async(symbol)
+        if not self._fresh(int(record["book_time"])):
+            return None
+        return {
+            "symbol": symbol,
+            "bidPrice": _fmt(record["bid_price"]),
+            "bidQty": _fmt(record["bid_qty"]),
+            "askPrice": _fmt(record["ask_price"]),
+            "askQty": _fmt(record["ask_qty"]),
+        }
+
+    async def book_ticker(self, symbol: str = None, symbols: list = None, **kwargs: Any):
+        if symbol and symbols:
+            raise ParameterArgumentError("symbol and symbols cannot be sent together.")
+        wanted = [symbol] if symbol else (symbols or list(self.index))
+        books = [await self._book(s) for s in wanted]
+        missing = [s for s, book in zip(wanted, books) if book is None]
+        if missing:
+            if self.fallback is None:
+                raise ClientError(400, -1121, f"Invalid symbol {missing[0]} for the shared cache.", {})
+            if symbol:
+                return await self.fallback.book_ticker(symbol=symbol, **kwargs)
+            fetched = {_symbol_of(b): b for b in await self.fallback.book_ticker(symbols=missing, **kwargs)}
+            books = [book if book is not None else fetched.get(s) for s, book in zip(wanted, books)]
+        return books[0] if symbol else books
+
+    async def depth(self, symbol: str, **kwargs: Any):
+        limit = kwargs.get("limit", 100)
+        record = await self.read_async(symbol) if symbol in self.index else None
+        usable = (
+            record is not None
+            and self._fresh(int(record["depth_time"]))
+            and limit <= self.levels
+            and set(kwargs) <= {"limit"}
+        )
+        if not usable:
+            if self.fallback is None:
+                raise ClientError(400, -1121, f"depth of {symbol} (limit {limit}) is not in the shared cache.", {})
+            return await self.fallback.depth(symbol, **kwargs)
+        bids = record["bids"][: min(int(record["bid_levels"]), limit)]
+        asks = record["asks"][: min(int(record["ask_levels"]), limit)]
+        return {
+            "lastUpdateId": int(record["depth_update_id"]),
+            "bids": [[_fmt(p), _fmt(q)] for p, q in bids],
+            "asks": [[_fmt(p), _fmt(q)] for p, q in asks],
+        }
+
+    def top(self, symbol: str):
+        """(bid_price, bid_qty, ask_price, ask_qty) as floats, the cheapest read."""
+
+        record = self.read(symbol)
+        return float(record["bid_price"]), float(record["bid_qty"]), float(record["ask_price"]), float(record["ask_qty"])
+
+    def close(self) -> None:
+        self._layout.release()
+        del self._layout
+        self.shm.close()
@@ -0,0 +1,213 @@
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DAY_MS = 86400 * 1000
+
+# days per account_snapshot call, the API maximum
+MAX_DAYS_PER_REQUEST = 30
+
+AGGREGATES = {
+    "first": lambda m: m[0],
+    "last": lambda m: m[-1],
+    "min": lambda m: m.min(axis=0),
+    "max": lambda m: m.max(axis=0),
+    "mean": lambda m: m.mean(axis=0),
+}
+
+
+class SnapshotHistory:
+    """Daily SPOT account snapshots kept locally as columns.
+
+    account_snapshot costs 2400 weight and returns at most 30 days, so `sync` asks only
+    for the days not stored yet, in as few 30 day windows as possible. Days are rows
+    and assets columns of two float64 matrices (free, locked) plus a totalAssetOfBtc
+    column; range and aggregate queries are slices of those arrays and cost no weight.
+
+    The exchange only answers for roughly the last month, so the store is what keeps
+    longer history: sync it at least every few weeks. With `path` it is saved to an
+    .npz file after every sync and loaded on start.
+
+    history = SnapshotHistory(client, "snapshots.npz")
+    await history.sync()
+    days, totals = history.series("BTC", start=month_start)
+    history.aggregate("mean", start=month_start)
+    """
+
+    def __init__(self, client: Any, path: Optional[str] = None) -> None:
+        self.client = client
+        self.path = path
+        # day numbers (ms // DAY_MS), ascending
+        self.days = np.zeros(0, np.int64)
+        self.assets: List[str] = []
+        self.asset_index: Dict[str, int] = {}
+        self.free = np.zeros((0, 0))
+        self.locked = np.zeros((0, 0))
+        self.total_btc = np.zeros(0)
+        # days that were asked for but had no snapshot, not asked again
+        self.empty_days: set = set()
+        self.requests = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    # persistence
+
+    def load(self) -> None:
+        with np.load(self.path) as saved:
+            self.days = saved["days"]
+            self.assets = [str(asset) for asset in saved["assets"]]
+            self.free = saved["free"]
+            self.locked = saved["locked"]
+            self.total_btc = saved["total_btc"]
+            self.empty_days = set(int(day) for day in saved["empty_days"])
+        self.asset_index = {asset: i for i, asset in enumerate(self.assets)}
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                days=self.days,
+                assets=np.array(self.assets, dtype=str),
+                free=self.free,
+                locked=self.locked,
+                total_btc=self.total_btc,
+                empty_days=np.array(sorted(self.empty_days), np.int64),
+            )
+        os.replace(tmp, self.path)
+
+    # storing
+
+    def add(self, snapshots: Iterable[Dict[str, Any]]) -> int:
+        """Store snapshotVos entries of an account_snapshot response; return the new days."""
+
+        rows: Dict[int, Tuple[float, Dict[str, Tuple[float, float]]]] = {}
+        for snapshot in snapshots:
+            day = snapshot["updateTime"] // DAY_MS
+            data = snapshot["data"]
+            rows[day] = (
+                float(data.get("totalAssetOfBtc", "nan")),
+                {b["asset"]: (float(b["free"]), float(b["locked"])) for b in data["balances"]},
+            )
+        new = [day for day in rows if day not in self._day_set()]
+        if not rows:
+            return 0
+        for _, balances in rows.values():
+            for asset in balances:
+                if asset not in self.asset_index:
+                    self.asset_index[asset] = len(self.assets)
+                    self.assets.append(asset)
+
+        keep = ~np.isin(self.days, list(rows))
+        days = np.concatenate([self.days[keep], np.array(sorted(rows), np.int64)])
+        free = np.zeros((len(days), len(self.assets)))
+        locked = np.zeros((len(days), len(self.assets)))
+        kept = keep.sum()
+        free[:kept, : self.free.shape[1]] = self.free[keep]
+        locked[:kept, : self.locked.shape[1]] = self.locked[keep]
+        total_btc = np.concatenate([self.total_btc[keep], np.array([rows[day][0] for day in sorted(rows)])])
+        for row, day in enumerate(sorted(rows), kept):
+            for asset, (f, l) in rows[day][1].items():
+                free[row, self.asset_index[asset]] = f
+                locked[row, self.asset_index[asset]] = l
+
+        order = np.argsort(days, kind="stable")
+        self.days, self.free, self.locked, self.total_btc = days[order], free[order], locked[order], total_btc[order]
+        self.empty_days.difference_update(rows)
+        return len(new)
+
+    def _day_set(self) -> set:
+        return set(self.days.tolist())
+
+    def missing_days(self, start_day: int, end_day: int) -> List[int]:
+        stored = self._day_set() | self.empty_days
+        return [day for day in range(start_day, end_day + 1) if day not in stored]
+
+    @staticmethod
+    def windows(days: List[int]) -> List[Tuple[int, int]]:
+        """Cover the given day numbers with as few windows of up to 30 days as possible."""
+
+        windows = []
+        for day in sorted(days):
+            if windows and day < windows[-1][0] + MAX_DAYS_PER_REQUEST:
+                windows[-1] = (windows[-1][0], day)
+            else:
+                windows.append((day, day))
+        return windows
+
+    async def sync(self, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        """Fetch the missing days between start and end (ms, default the last 30 days up
+        to yesterday); return the number of account_snapshot calls made."""
+
+        today = int(time.time() * 1000) // DAY_MS
+        end_day = min((end if end is not None else today * DAY_MS) // DAY_MS, today - 1)
+        start_day = start // DAY_MS if start is not None else end_day - MAX_DAYS_PER_REQUEST + 1
+        calls = 0
+        for first, last in self.windows(self.missing_days(start_day, end_day)):
+            response = await self.client.account_snapshot(
+                "SPOT", startTime=first * DAY_MS, endTime=(last + 1) * DAY_MS - 1, limit=MAX_DAYS_PER_REQUEST
+            )
+            calls += 1
+            self.add(response.get("snapshotVos", ()))
+            stored = self._day_set()
+            # recent days may still be published later, older gaps are final
+            self.empty_days.update(day for day in range(first, last + 1) if day not in stored and day < today - 1)
+        self.requests += calls
+        if calls and self.path is not None:
+            self.save()
+        return calls
+
+    # queries
+
+    def _slice(self, start: Optional[int], end: Optional[int]) -> slice:
+        lo = 0 if start is None else np.searchsorted(self.days, start // DAY_MS, "left")
+        hi = len(self.days) if end is None else np.searchsorted(self.days, end // DAY_MS, "right")
+        return slice(lo, hi)
+
+    def totals(
+        self, start: Optional[int] = None, end: Optional[int] = None, assets: Optional[List[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Day start times (ms) and the (days x assets) free + locked matrix between start and end."""
+
+        rows = self._slice(start, end)
+        totals = self.free[rows] + self.locked[rows]
+        if assets is not None:
+            totals = totals[:, [self.asset_index[asset] for asset in assets]]
+        return self.days[rows] * DAY_MS, totals
+
+    def series(self, asset: str, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        days, totals = self.totals(start, end, [asset])
+        return days, totals[:, 0]
+
+    def btc_series(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        rows = self._slice(start, end)
+        return self.days[rows] * DAY_MS, self.total_btc[rows]
+
+    def balances(self, day: int) -> Dict[str, float]:
+        """Non zero free + locked amounts of the day containing `day` (ms)."""
+
+        rows = self._slice(day, day)
+        if rows.start == rows.stop:
+            return {}
+        totals = self.free[rows.start] + self.locked[rows.start]
+        return {self.assets[i]: float(totals[i]) for i in np.flatnonzero(totals)}
+
+    def aggregate(self, how: str = "mean", start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, float]:
+        """Per asset first / last / min / max / mean of the daily totals between start and end."""
+
+        _, totals = self.totals(start, end)
+        if not len(totals):
+            return {}
+        values = AGGREGATES[how](totals)
+        return {asset: float(values[i]) for i, asset in enumerate(self.assets) if values[i]}
+
+    def change(self, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, float]:
+        """Per asset difference between the last and the first day between start and end."""
+
+        _, totals = self.totals(start, end)
+        if not len(totals):
+            return {}
+        values = totals[-1] - totals[0]
+        return {asset: float(values[i]) for i, asset in enumerate(self.assets) if values[i]}
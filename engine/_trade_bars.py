@@ -0,0 +1,276 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.error import ParameterValueError
+
+BAR_DTYPE = np.dtype(
+    [
+        ("open_time", "i8"),
+        ("close_time", "i8"),
+        ("open", "f8"),
+        ("high", "f8"),
+        ("low", "f8"),
+        ("close", "f8"),
+        ("volume", "f8"),
+        ("dollar", "f8"),
+        ("buy_volume", "f8"),
+        ("trades", "i8"),
+        ("first_id", "i8"),
+        ("last_id", "i8"),
+    ]
+)
+
+KINDS = (
+    "time",
+    "tick",
+    "volume",
+    "dollar",
+    "tick_imbalance",
+    "volume_imbalance",
+    "dollar_imbalance",
+)
+
+
+class TradeArrays:
+    """Columns of an aggTrades page; `side` is +1 for buyer initiated, -1 for seller initiated."""
+
+    __slots__ = ("id", "price", "qty", "time", "side")
+
+    def __init__(self, id: np.ndarray, price: np.ndarray, qty: np.ndarray, time: np.ndarray, side: np.ndarray) -> None:
+        self.id = id
+        self.price = price
+        self.qty = qty
+        self.time = time
+        self.side = side
+
+    @classmethod
+    def from_agg_trades(cls, page: Sequence[Dict[str, Any]]) -> "TradeArrays":
+        n = len(page)
+        return cls(
+            np.fromiter((t["a"] for t in page), "i8", n),
+            np.fromiter((t["p"] for t in page), "f8", n),
+            np.fromiter((t["q"] for t in page), "f8", n),
+            np.fromiter((t["T"] for t in page), "i8", n),
+            np.fromiter((-1 if t["m"] else 1 for t in page), "i1", n),
+        )
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+
+def _aggregate(trades: TradeArrays, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """One bar per [start, stop] (inclusive) segment of trades."""
+
+    bars = np.empty(len(starts), BAR_DTYPE)
+    if not len(starts):
+        return bars
+    dollar = trades.price * trades.qty
+    bars["open_time"] = trades.time[starts]
+    bars["close_time"] = trades.time[stops]
+    bars["open"] = trades.price[starts]
+    bars["close"] = trades.price[stops]
+    bars["high"] = np.maximum.reduceat(trades.price, starts)
+    bars["low"] = np.minimum.reduceat(trades.price, starts)
+    bars["volume"] = np.add.reduceat(trades.qty, starts)
+    bars["dollar"] = np.add.reduceat(dollar, starts)
+    bars["buy_volume"] = np.add.reduceat(np.where(trades.side > 0, trades.qty, 0.0), starts)
+    bars["trades"] = stops - starts + 1
+    bars["first_id"] = trades.id[starts]
+    bars["last_id"] = trades.id[stops]
+    return bars
+
+
+def _merge(first: np.void, second: np.void) -> np.ndarray:
+    bar = np.empty(1, BAR_DTYPE)
+    bar["open_time"] = first["open_time"]
+    bar["close_time"] = second["close_time"]
+    bar["open"] = first["open"]
+    bar["close"] = second["close"]
+    bar["high"] = max(first["high"], second["high"])
+    bar["low"] = min(first["low"], second["low"])
+    for name in ("volume", "dollar", "buy_volume", "trades"):
+        bar[name] = first[name] + second[name]
+    bar["first_id"] = first["first_id"]
+    bar["last_id"] = second["last_id"]
+    return bar
+
+
+class TradeBarBuilder:
+    """Builds time, tick, volume, dollar and imbalance bars from aggTrades.
+
+    Pages are processed as whole NumPy arrays: cumulative sums and searchsorted find
+    the bar boundaries, reduceat aggregates the bars. The open bar at the end of a page
+    is carried into the next one, so bars may span page boundaries.
+
+    For tick/volume/dollar bars a boundary is every multiple of threshold on the running
+    total, a trade crossing it closes the bar and its excess counts towards the next.
+    Imbalance bars close once |sum(side * measure)| since the bar opened reaches threshold.
+
+    builder = TradeBarBuilder("dollar", 1_000_000)
+    async for page in agg_trade_pages(client, "BTCUSDT", start_time, end_time):
+        bars = builder.add(page)
+    """
+
+    def __init__(self, kind: str, threshold: float) -> None:
+        if kind not in KINDS:
+            raise ParameterValueError([kind])
+        self.kind = kind
+        self.threshold = threshold
+        self.partial: Optional[np.ndarray] = None
+        self._carry = 0.0
+        self._buffer: List[Dict[str, Any]] = []
+
+    def _measure(self, trades: TradeArrays) -> np.ndarray:
+        base = self.kind.split("_")[0]
+        if base == "tick":
+            return np.ones(len(trades))
+        if base == "volume":
+            return trades.qty
+        return trades.price * trades.qty
+
+    def _time_stops(self, trades: TradeArrays) -> np.ndarray:
+        bucket = trades.time // int(self.threshold)
+        return np.flatnonzero(np.diff(bucket))
+
+    def _cumulative_stops(self, trades: TradeArrays) -> np.ndarray:
+        total = self._carry + np.cumsum(self._measure(trades))
+        crossed = int(total[-1] // self.threshold)
+        stops = np.searchsorted(total, self.threshold * np.arange(1, crossed + 1), side="left")
+        self._carry = float(total[-1] - crossed * self.threshold)
+        return np.unique(stops)
+
+    def _imbalance_stops(self, trades: TradeArrays) -> np.ndarray:
+        signed = np.cumsum(trades.side * self._measure(trades))
+        n = len(signed)
+        stops = []
+        start, base = 0, self._carry
+        window = 256
+        while start < n:
+            end = min(start + window, n)
+            # theta of every trade since the bar opened
+            theta = base + signed[start:end] - (signed[start - 1] if start else 0.0)
+            hit = np.flatnonzero(np.abs(theta) >= self.threshold)
+            if len(hit):
+                stop = start + int(hit[0])
+                stops.append(stop)
+                start, base, window = stop + 1, 0.0, 256
+            elif end == n:
+                base = float(theta[-1])
+                start = n
+            else:
+                window *= 2
+        self._carry = base
+        return np.asarray(stops, dtype=np.int64)
+
+    def _stops(self, trades: TradeArrays) -> np.ndarray:
+        if self.kind == "time":
+            return self._time_stops(trades)
+        if self.kind.endswith("_imbalance"):
+            return self._imbalance_stops(trades)
+        return self._cumulative_stops(trades)
+
+    def add(self, page: Any) -> np.ndarray:
+        """Add an aggTrades page (list of dicts or TradeArrays), return the bars it closed."""
+
+        trades = page if isinstance(page, TradeArrays) else TradeArrays.from_agg_trades(page)
+        if not len(trades):
+            return np.empty(0, BAR_DTYPE)
+        closed = []
+        if self.kind == "time" and self.partial is not None:
+            interval = int(self.threshold)
+            if self.partial["open_time"][0] // interval != trades.time[0] // interval:
+                closed.append(self.partial)
+                self.partial = None
+
+        stops = self._stops(trades)
+        starts = np.concatenate(([0], stops + 1))
+        ends = np.concatenate((stops, [len(trades) - 1]))
+        if starts[-1] > ends[-1]:
+            # the page ended exactly on a boundary
+            starts, ends = starts[:-1], ends[:-1]
+            remainder = None
+        else:
+            remainder = -1
+        bars = _aggregate(trades, starts, ends)
+        if self.partial is not None and len(bars):
+            bars[0] = _merge(self.partial[0], bars[0])[0]
+        if remainder is not None:
+            self.partial, bars = bars[remainder:], bars[:remainder]
+        else:
+            self.partial = None
+        closed.append(bars)
+        result = np.concatenate(closed)
+        if self.kind == "time":
+            interval = int(self.threshold)
+            result["open_time"] -= result["open_time"] % interval
+            if self.partial is not None:
+                self.partial["open_time"] -= self.partial["open_time"] % interval
+        return result
+
+    def on_event(self, event: Dict[str, Any], batch: int = 1000) -> np.ndarray:
+        """Buffer a streamed aggTrade event, building bars once batch events are queued."""
+
+        self._buffer.append(event)
+        if len(self._buffer) < batch:
+            return np.empty(0, BAR_DTYPE)
+        return self.flush_events()
+
+    def flush_events(self) -> np.ndarray:
+        buffer, self._buffer = self._buffer, []
+        return self.add(buffer)
+
+    def close_partial(self) -> np.ndarray:
+        """Emit the open bar, e.g. at the end of a historical range."""
+
+        bars = self.partial if self.partial is not None else np.empty(0, BAR_DTYPE)
+        self.partial = None
+        self._carry = 0.0
+        return bars
+
+
+async def agg_trade_pages(
+    client: Any,
+    symbol: str,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    from_id: Optional[int] = None,
+    limit: int = 1000,
+    concurrency: int = 4,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield consecutive aggTrades pages in order.
+
+    aggTrade ids are contiguous, so once the first id is known the next `concurrency`
+    pages are requested ahead by fromId.
+    """
+
+    if from_id is None:
+        first = await client.agg_trades(symbol, startTime=start_time, limit=limit)
+        if not first:
+            return
+        if end_time is not None:
+            first = [t for t in first if t["T"] <= end_time]
+        yield first
+        if len(first) < limit:
+            return
+        from_id = first[-1]["a"] + 1
+
+    next_id = from_id
+    pending: List[asyncio.Future] = []
+    try:
+        while True:
+            while len(pending) < concurrency:
+                pending.append(asyncio.ensure_future(client.agg_trades(symbol, fromId=next_id, limit=limit)))
+                next_id += limit
+            page = await pending.pop(0)
+            if end_time is not None:
+                page = [t for t in page if t["T"] <= end_time]
+            if page:
+                yield page
+            if len(page) < limit:
+                return
+    finally:
+        # prefetched pages of a failed, closed or finished iteration
+        for future in pending:
+            future.cancel()
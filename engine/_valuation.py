@@ -0,0 +1,267 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engine._market_snapshot import MAX_SYMBOLS_PER_REQUEST
+from utils.error import ParameterValueError
+
+# assets preferred as the intermediate step of a conversion, in this order
+BRIDGES = ("USDT", "BTC", "BNB", "ETH", "FDUSD", "USDC")
+
+WALLETS = ("spot", "funding", "user_asset")
+
+
+class PortfolioValuation:
+    """Values every balance of an account in one quote asset with NumPy arrays.
+
+    The conversion graph comes from `exchange_info` once: each asset gets the
+    shortest chain of trading pairs to the quote asset (at most `max_hops`, through
+    BRIDGES first), stored as an (assets x hops) array of price indexes and an array
+    of "divide instead of multiply" flags. All prices along those chains are fetched
+    with one `ticker_price` call, balances with `account` (and `funding_wallet` /
+    `user_asset` when listed in `wallets`). Revaluing is then a gather, a product and
+    a multiply over the arrays, which takes microseconds for thousands of assets.
+
+    Between refreshes, `update_price` / `on_ticker` and `update_balance` /
+    `on_account_position` change single cells, the next `values()` picks them up.
+
+    valuation = PortfolioValuation(client, quote="USDT")
+    await valuation.refresh()
+    valuation.on_ticker(event)  # !miniTicker@arr / <symbol>@ticker events
+    valuation.total(), valuation.table()[:10]
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        quote: str = "USDT",
+        wallets: Sequence[str] = ("spot",),
+        max_hops: int = 3,
+        bridges: Sequence[str] = BRIDGES,
+    ) -> None:
+        unknown = set(wallets) - set(WALLETS)
+        if unknown:
+            raise ParameterValueError(sorted(unknown))
+        self.client = client
+        self.quote = quote
+        self.wallets = tuple(wallets)
+        self.max_hops = max_hops
+        self.bridges = tuple(bridges)
+        self.assets: List[str] = []
+        self.asset_index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self.symbol_index: Dict[str, int] = {}
+        # (assets, wallets)
+        self.balances = np.zeros((0, len(self.wallets)))
+        # one slot per symbol plus a trailing 1.0 for unused hops
+        self.prices = np.ones(1)
+        self.hops = np.zeros((0, max_hops), np.intp)
+        self.inverse = np.zeros((0, max_hops), bool)
+        self._unpriced = np.zeros(0, bool)
+
+    # conversion graph
+
+    def build_graph(self, exchange_info: Dict[str, Any]) -> None:
+        """Index every asset of exchange_info with its conversion chain to the quote asset."""
+
+        pairs: Dict[str, List[Tuple[str, str, bool]]] = {}
+        assets = {self.quote}
+        for s in exchange_info["symbols"]:
+            base, quote = s["baseAsset"], s["quoteAsset"]
+            assets.update((base, quote))
+            if s.get("status", "TRADING") != "TRADING":
+                continue
+            # asset -> (neighbour, symbol, price of the neighbour is 1 / symbol price)
+            pairs.setdefault(base, []).append((quote, s["symbol"], False))
+            pairs.setdefault(quote, []).append((base, s["symbol"], True))
+
+        rank = {asset: i for i, asset in enumerate(self.bridges)}
+        # breadth first from the quote asset: parent[asset] = (next asset towards quote, symbol, inverse)
+        parent: Dict[str, Tuple[str, str, bool]] = {}
+        depth = {self.quote: 0}
+        frontier = [self.quote]
+        while frontier and depth[frontier[0]] < self.max_hops:
+            next_frontier = []
+            for asset in sorted(frontier, key=lambda a: rank.get(a, len(rank))):
+                for other, symbol, inverse in pairs.get(asset, ()):
+                    if other in depth:
+                        continue
+                    depth[other] = depth[asset] + 1
+                    # other is priced in asset through symbol, the other way round than seen from asset
+                    parent[other] = (asset, symbol, not inverse)
+                    next_frontier.append(other)
+            frontier = next_frontier
+
+        previous = dict(zip(self.assets, self.balances))
+        self.assets = sorted(assets | set(previous))
+        self.asset_index = {asset: i for i, asset in enumerate(self.assets)}
+        chains = {}
+        symbols = set()
+        for asset in self.assets:
+            chain = []
+            step = asset
+            while step in parent:
+                step, symbol, inverse = parent[step]
+                chain.append((symbol, inverse))
+                symbols.add(symbol)
+            chains[asset] = chain
+        self.symbols = sorted(symbols)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.prices = np.full(len(self.symbols) + 1, np.nan)
+        self.prices[-1] = 1.0
+        self.hops = np.full((len(self.assets), self.max_hops), len(self.symbols), np.intp)
+        self.inverse = np.zeros((len(self.assets), self.max_hops), bool)
+        # no chain and not the quote asset itself: no price at all
+        self._unpriced = np.array([asset != self.quote and not chains[asset] for asset in self.assets], bool)
+        for i, asset in enumerate(self.assets):
+            for hop, (symbol, inverse) in enumerate(chains[asset]):
+                self.hops[i, hop] = self.symbol_index[symbol]
+                self.inverse[i, hop] = inverse
+        self.balances = np.zeros((len(self.assets), len(self.wallets)))
+        for asset, row in previous.items():
+            self.balances[self.asset_index[asset]] = row
+
+    async def load_graph(self) -> None:
+        self.build_graph(await self.client.exchange_info())
+
+    def chain(self, asset: str) -> List[Tuple[str, bool]]:
+        """The (symbol, inverse) hops that convert asset into the quote asset."""
+
+        i = self.asset_index[asset]
+        return [
+            (self.symbols[index], bool(inverse))
+            for index, inverse in zip(self.hops[i], self.inverse[i])
+            if index < len(self.symbols)
+        ]
+
+    # inputs
+
+    def _ensure_asset(self, asset: str) -> int:
+        i = self.asset_index.get(asset)
+        if i is None:
+            # listed after the graph was built, it stays unpriced until the next load_graph
+            i = self.asset_index[asset] = len(self.assets)
+            self.assets.append(asset)
+            self.balances = np.vstack([self.balances, np.zeros((1, len(self.wallets)))])
+            self.hops = np.vstack([self.hops, np.full((1, self.max_hops), len(self.symbols), np.intp)])
+            self.inverse = np.vstack([self.inverse, np.zeros((1, self.max_hops), bool)])
+            self._unpriced = np.append(self._unpriced, asset != self.quote)
+        return i
+
+    def update_price(self, symbol: str, price: Any) -> None:
+        i = self.symbol_index.get(symbol)
+        if i is not None:
+            self.prices[i] = float(price)
+
+    def set_prices(self, tickers: Iterable[Dict[str, Any]]) -> int:
+        """Apply ticker_price results; return how many symbols of the graph were updated."""
+
+        index = self.symbol_index
+        updated = [(index[t["symbol"]], float(t["price"])) for t in tickers if t["symbol"] in index]
+        if updated:
+            rows, values = zip(*updated)
+            self.prices[list(rows)] = values
+        return len(updated)
+
+    def on_ticker(self, event: Any) -> None:
+        """Apply a 24hr ticker / mini ticker stream event, or a list of them."""
+
+        for item in event if isinstance(event, list) else (event,):
+            self.update_price(item["s"], item["c"])
+
+    def update_balance(self, asset: str, free: Any, locked: Any = 0, wallet: str = "spot") -> None:
+        i = self._ensure_asset(asset)
+        self.balances[i, self.wallets.index(wallet)] = float(free) + float(locked)
+
+    def set_balances(self, balances: Iterable[Dict[str, Any]], wallet: str = "spot") -> None:
+        """Replace one wallet column with account / funding_wallet / user_asset balances."""
+
+        column = self.wallets.index(wallet)
+        self.balances[:, column] = 0.0
+        for b in balances:
+            # funding_wallet and user_asset also report frozen and withdrawing amounts
+            amount = float(b["free"]) + float(b["locked"]) + float(b.get("freeze", 0)) + float(b.get("withdrawing", 0))
+            if amount:
+                i = self._ensure_asset(b["asset"])
+                self.balances[i, column] = amount
+
+    def on_account_position(self, event: Dict[str, Any]) -> None:
+        """Apply an outboundAccountPosition event of the user data stream to the spot wallet."""
+
+        for b in event["B"]:
+            self.update_balance(b["a"], b["f"], b["l"], "spot")
+
+    # refreshing over REST
+
+    async def refresh_prices(self) -> int:
+        if len(self.symbols) > MAX_SYMBOLS_PER_REQUEST:
+            # the whole market weighs 4, like any symbols list, and needs no long query string
+            tickers = await self.client.ticker_price()
+        elif self.symbols:
+            tickers = await self.client.ticker_price(symbols=self.symbols)
+        else:
+            tickers = []
+        return self.set_prices(tickers)
+
+    async def refresh_balances(self) -> None:
+        if "spot" in self.wallets:
+            self.set_balances((await self.client.account())["balances"], "spot")
+        if "funding" in self.wallets:
+            self.set_balances(await self.client.funding_wallet(), "funding")
+        if "user_asset" in self.wallets:
+            self.set_balances(await self.client.user_asset(), "user_asset")
+
+    async def refresh(self) -> float:
+        """Load the graph on first use, then prices and balances; return the total value."""
+
+        if not self.symbol_index:
+            await self.load_graph()
+        await self.refresh_balances()
+        await self.refresh_prices()
+        return self.total()
+
+    # results
+
+    def asset_prices(self) -> np.ndarray:
+        """Price of every asset in the quote asset, NaN where it can't be converted."""
+
+        hop_prices = self.prices[self.hops]
+        factors = np.where(self.inverse, 1.0 / hop_prices, hop_prices)
+        prices = factors.prod(axis=1)
+        prices[self._unpriced] = np.nan
+        return prices
+
+    def values(self, by_wallet: bool = False) -> np.ndarray:
+        """Value of every asset (per wallet with by_wallet) in the quote asset."""
+
+        prices = self.asset_prices()
+        if by_wallet:
+            return self.balances * prices[:, None]
+        return self.balances.sum(axis=1) * prices
+
+    def total(self) -> float:
+        return float(np.nansum(self.values()))
+
+    def unpriced(self) -> List[str]:
+        """Held assets without a price, their value is missing from total()."""
+
+        held = self.balances.sum(axis=1) > 0
+        return [self.assets[i] for i in np.flatnonzero(held & np.isnan(self.asset_prices()))]
+
+    def table(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Held assets by value, largest first."""
+
+        prices = self.asset_prices()
+        amounts = self.balances.sum(axis=1)
+        values = amounts * prices
+        held = np.flatnonzero(amounts > 0)
+        order = held[np.argsort(-np.nan_to_num(values[held], nan=-1.0), kind="stable")]
+        if limit is not None:
+            order = order[:limit]
+        rows = []
+        for i in order:
+            row = {"asset": self.assets[i], "amount": float(amounts[i]), "price": float(prices[i]), "value": float(values[i])}
+            for column, wallet in enumerate(self.wallets):
+                row[wallet] = float(self.balances[i, column])
+            rows.append(row)
+        return rows
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# dataset -> client method, seconds it stays fresh
+DATASETS = {
+    "coin_info": ("coin_info", 3600),
+    "trade_fee": ("trade_fee", 3600),
+    "asset_detail": ("asset_detail", 6 * 3600),
+}
+
+
+class WalletMetadata:
+    """Cache of the slow changing wallet documents: coin_info, trade_fee, asset_detail.
+
+    Each dataset has a TTL (`ttls` overrides DATASETS). A dataset is refreshed in the
+    background once `refresh_ahead` of its TTL is left, and an expired one is still
+    served for up to `max_stale` seconds while the refresh runs, so lookups only wait
+    for the network when nothing usable is cached. With `path` every refresh is
+    written to a JSON file that the next instance starts from.
+
+    Lookups are dict reads on indexes rebuilt at each refresh: `fee(symbol)` from
+    trade_fee, `network(coin, network)` / `networks(coin)` from coin_info and
+    `asset(asset)` from asset_detail.
+
+    metadata = WalletMetadata(client, path="wallet_metadata.json")
+    await metadata.warm()
+    taker = metadata.fee("BTCUSDT")["taker"]
+    fee = metadata.network("USDT", "TRX")["withdrawFee"]
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        path: Optional[str] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        refresh_ahead: float = 0.2,
+        max_stale: float = 24 * 3600,
+    ) -> None:
+        self.client = client
+        self.path = path
+        self.ttls = {name: ttl for name, (_, ttl) in DATASETS.items()}
+        self.ttls.update(ttls or {})
+        self.refresh_ahead = refresh_ahead
+        self.max_stale = max_stale
+        self.data: Dict[str, Any] = {}
+        # wall clock time of the fetch, so ages survive a restart
+        self.fetched_at: Dict[str, float] = {}
+        self.fees: Dict[str, Dict[str, float]] = {}
+        self.coins: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.assets: Dict[str, Dict[str, Any]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        # dataset -> (monotonic time of the last failed fetch, failures in a row)
+        self._failures: Dict[str, Tuple[float, int]] = {}
+        self._save_lock = asyncio.Lock()
+        self._logger = logging.getLogger(__name__)
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    # persistence
+
+    def load(self) -> None:
+        with open(self.path) as f:
+            saved = json.load(f)
+        for name, entry in saved.items():
+            if name in DATASETS:
+                self._set(name, entry["data"], entry["fetched_at"])
+
+    def _saved(self) -> Dict[str, Any]:
+        return {name: {"fetched_at": self.fetched_at[name], "data": data} for name, data in self.data.items()}
+
+    def save(self) -> None:
+        self._write(self._saved())
+
+    def _write(self, saved: Dict[str, Any]) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(saved, f)
+        # readers never see a half written file
+        os.replace(tmp, self.path)
+
+    # datasets
+
+    def _set(self, name: str, data: Any, fetched_at: float) -> None:
+        self.data[name] = data
+        self.fetched_at[name] = fetched_at
+        if name == "trade_fee":
+            self.fees = {
+                f["symbol"]: {"maker": float(f["makerCommission"]), "taker": float(f["takerCommission"])} for f in data
+            }
+        elif name == "coin_info":
+            self.coins = {c["coin"]: {n["network"]: n for n in c.get("networkList", ())} for c in data}
+        elif name == "asset_detail":
+            self.assets = data
+
+    def age(self, name: str) -> float:
+        if name not in self.fetched_at:
+            return float("inf")
+        return time.time() - self.fetched_at[name]
+
+    async def refresh(self, name: str) -> Any:
+        """Fetch a dataset now, sharing a refresh already running."""
+
+        task = self._refreshing.get(name)
+        if task is None or task.done():
+            task = self._refreshing[name] = asyncio.ensure_future(self._fetch(name))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, name: str) -> Any:
+        method, _ = DATASETS[name]
+        try:
+            data = await getattr(self.client, method)()
+        except Exception:
+            _, failures = self._failures.get(name, (0.0, 0))
+            self._failures[name] = (time.monotonic(), failures + 1)
+            raise
+        self._failures.pop(name, None)
+        self._set(name, data, time.time())
+        if self.path is not None:
+            # one write at a time, each with the datasets as they are when it starts
+            async with self._save_lock:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, self._saved())
+        return data
+
+    def _on_background_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self._logger.warning("background refresh of wallet metadata failed: %r", task.exception())
+
+    def _retry_delay(self, name: str) -> float:
+        """Seconds left before a failed dataset is fetched again in the background."""
+
+        if name not in self._failures:
+            return 0.0
+        failed_at, failures = self._failures[name]
+        ttl = self.ttls[name]
+        backoff = min(ttl * self.refresh_ahead * 2 ** (failures - 1), ttl)
+        return failed_at + backoff - time.monotonic()
+
+    def _revalidate(self, name: str) -> None:
+        """Start a background refresh when the dataset is due, if a loop is running."""
+
+        if self.age(name) < self.ttls[name] * (1 - self.refresh_ahead):
+            return
+        if self._retry_delay(name) > 0:
+            return
+        task = self._refreshing.get(name)
+        if task is not None and not task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # no running event loop, the next async get refreshes
+            return
+        task = self._refreshing[name] = loop.create_task(self._fetch(name))
+        task.add_done_callback(self._on_background_done)
+
+    async def get(self, name: str) -> Any:
+        """The dataset, fetched first only when missing or stale beyond max_stale."""
+
+        if self.age(name) >= self.ttls[name] + self.max_stale:
+            return await self.refresh(name)
+        self._revalidate(name)
+        return self.data[name]
+
+    async def warm(self) -> None:
+        """Fetch every dataset that is not usable from the on-disk copy."""
+
+        await asyncio.gather(*(self.get(name) for name in DATASETS))
+
+    # lookups
+
+    def fee(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Maker and taker commission of symbol, e.g. {"maker": 0.001, "taker": 0.001}."""
+
+        self._revalidate("trade_fee")
+        return self.fees.get(symbol)
+
+    def networks(self, coin: str) -> List[Dict[str, Any]]:
+        self._revalidate("coin_info")
+        return list(self.coins.get(coin, {}).values())
+
+    def network(self, coin: str, network: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Network entry of coin from coin_info; the default network when none is given."""
+
+        self._revalidate("coin_info")
+        networks = self.coins.get(coin, {})
+        if network is not None:
+            return networks.get(network)
+        return next((n for n in networks.values() if n.get("isDefault")), None)
+
+    def asset(self, asset: str) -> Optional[Dict[str, Any]]:
+        self._revalidate("asset_detail")
+        return self.assets.get(asset)
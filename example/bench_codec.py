@@ -0,0 +1,74 @@
+"""Compare the installed json codecs on depth, book_ticker and klines payloads.
+
+python example/bench_codec.py [recorded_dir]
+
+recorded_dir may contain depth.json, book_ticker.json and klines.json captured from the
+API; synthetic payloads of the same shape are used for any file that is missing.
+"""
+import json
+import os
+import random
+import sys
+import time
+
+try:
+    from utils.codec import CODECS
+except ModuleNotFoundError:
+    current_path = os.path.abspath(os.path.dirname(__file__))
+    root_path = os.path.split(current_path)[0]
+    if root_path not in sys.path:
+        sys.path.append(root_path)
+
+    from utils.codec import CODECS
+
+
+def synthetic_payloads():
+    price = lambda: f"{random.uniform(1, 50000):.8f}"
+    depth = {
+        "lastUpdateId": 1027024,
+        "bids": [[price(), price()] for _ in range(1000)],
+        "asks": [[price(), price()] for _ in range(1000)],
+    }
+    book_ticker = [
+        {"symbol": f"SYM{i}USDT", "bidPrice": price(), "bidQty": price(), "askPrice": price(), "askQty": price()}
+        for i in range(2000)
+    ]
+    klines = [
+        [1499040000000 + i * 60000, price(), price(), price(), price(), price(),
+         1499040059999 + i * 60000, price(), 308, price(), price(), "0"]
+        for i in range(1000)
+    ]
+    return {"depth": depth, "book_ticker": book_ticker, "klines": klines}
+
+
+def load_payloads(recorded_dir=None):
+    payloads = {name: json.dumps(obj).encode() for name, obj in synthetic_payloads().items()}
+    if recorded_dir:
+        for name in payloads:
+            path = os.path.join(recorded_dir, name + ".json")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    payloads[name] = f.read()
+    return payloads
+
+
+def bench(func, data, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(data)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main(recorded_dir=None, rounds=50):
+    payloads = load_payloads(recorded_dir)
+    print(f"{'codec':<16} {'schema':<12} {'size':>9} {'generic us':>12} {'typed us':>12}")
+    for name, factory in CODECS.items():
+        codec = factory()
+        for schema, data in payloads.items():
+            generic = bench(codec.decode, data, rounds)
+            typed = bench(lambda d: codec.decode(d, schema), data, rounds)
+            print(f"{name:<16} {schema:<12} {len(data):>9} {generic:>12.1f} {typed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,82 @@
+import json
+import random
+import time
+import tracemalloc
+
+try:
+    from utils.models import Order, Ticker24hr, TickerTable
+except ModuleNotFoundError:
+    import os
+    import sys
+    current_path = os.path.abspath(os.path.dirname(__file__))
+    root_path = os.path.split(current_path)[0]
+    if root_path not in sys.path:
+        sys.path.append(root_path)
+
+    from utils.models import Order, Ticker24hr, TickerTable
+
+
+def fake_price():
+    return f"{random.uniform(0.0001, 50000):.8f}"
+
+
+def fake_ticker(i):
+    row = {"symbol": f"SYM{i}USDT"}
+    for key, kind in Ticker24hr._fields:
+        if kind is not None:
+            row[key] = fake_price()
+    row.update(openTime=1700000000000, closeTime=1700086400000, firstId=i, lastId=i + 1000, count=1000)
+    return row
+
+
+def fake_order(i):
+    return {
+        "symbol": "BTCUSDT", "orderId": i, "orderListId": -1, "clientOrderId": f"cid{i}",
+        "price": fake_price(), "origQty": fake_price(), "executedQty": "0.00000000",
+        "cummulativeQuoteQty": "0.00000000", "status": "NEW", "timeInForce": "GTC",
+        "type": "LIMIT", "side": "BUY", "stopPrice": "0.00000000", "icebergQty": "0.00000000",
+        "time": 1700000000000, "updateTime": 1700000000000, "isWorking": True,
+        "workingTime": 1700000000000, "origQuoteOrderQty": "0.00000000",
+        "selfTradePreventionMode": "NONE",
+    }
+
+
+def measure(label, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<36} {size / 1024:>10.1f} KiB {elapsed * 1000:>9.2f} ms")
+    return result
+
+
+def main(n_tickers=2000, n_orders=20000):
+    tickers = json.dumps([fake_ticker(i) for i in range(n_tickers)])
+    order_list = json.dumps([fake_order(i) for i in range(n_orders)])
+
+    print(f"{'case':<36} {'memory':>14} {'decode':>12}")
+    measure(f"ticker_24hr x{n_tickers} dicts", lambda: json.loads(tickers))
+    measure(f"ticker_24hr x{n_tickers} Ticker24hr", lambda: Ticker24hr.from_list(json.loads(tickers)))
+    measure(f"ticker_24hr x{n_tickers} TickerTable", lambda: TickerTable.from_list(json.loads(tickers)))
+    measure(
+        f"ticker_24hr x{n_tickers} TickerTable(3)",
+        lambda: TickerTable.from_list(json.loads(tickers), ("lastPrice", "bidPrice", "askPrice")),
+    )
+    measure(f"orders x{n_orders} dicts", lambda: json.loads(order_list))
+    records = measure(f"orders x{n_orders} Order", lambda: Order.from_list(json.loads(order_list)))
+
+    start = time.perf_counter()
+    for record in records:
+        record.price
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for record in records:
+        record.price
+    second = time.perf_counter() - start
+    print(f"Order.price first access {first * 1000:.2f} ms, cached access {second * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare the aiohttp (HTTP/1.1) and httpx (HTTP/2) transports against the local mock server.
+
+python example/bench_transport.py [--requests 2000] [--latency 0.005]
+
+For 1, 10, 100 and 1000 requests in flight it sends a mix of unsigned (book_ticker)
+and signed (account) calls through BinanceBase and reports throughput, latency
+percentiles and how many connections the server saw. The mock server runs under
+hypercorn, which speaks both HTTP/1.1 and h2c, so both transports hit the same server.
+Needs httpx[http2] and hypercorn.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+try:
+    from binance_api import BinanceBase
+except ModuleNotFoundError:
+    current_path = os.path.abspath(os.path.dirname(__file__))
+    root_path = os.path.split(current_path)[0]
+    if root_path not in sys.path:
+        sys.path.append(root_path)
+
+    from binance_api import BinanceBase
+
+from mock_server import start
+from spot import SpotMarket, SpotOrder
+from utils.transport import AiohttpTransport, HttpxTransport
+
+CONCURRENCY = (1, 10, 100, 1000)
+
+
+class Client(BinanceBase, SpotMarket, SpotOrder):
+    pass
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def run(name, transport, base_url, exchange, concurrency, requests):
+    latencies = []
+    async with Client("key", "secret", base_url=base_url, transport=transport) as client:
+        queue = iter(range(requests))
+
+        async def worker():
+            for i in queue:
+                start = time.perf_counter()
+                if i % 2:
+                    await client.account()
+                else:
+                    await client.book_ticker("BTCUSDT")
+                latencies.append(time.perf_counter() - start)
+
+        exchange.connections.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    await transport.close()
+    print(
+        f"{name:<16}{concurrency:>6}{requests / elapsed:>12.0f}"
+        f"{percentile(latencies, 0.5) * 1000:>10.2f}{percentile(latencies, 0.99) * 1000:>10.2f}"
+        f"{len(exchange.connections):>8}"
+    )
+
+
+async def main(args):
+    exchange, stop = await start(port=args.port, http2=True, latency=args.latency)
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{'transport':<16}{'conc':>6}{'req/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'conns':>8}")
+    try:
+        for concurrency in CONCURRENCY:
+            requests = max(args.requests, concurrency)
+            await run("aiohttp http/1.1", AiohttpTransport(), base_url, exchange, concurrency, requests)
+            await run("httpx http/2", HttpxTransport(http1=False), base_url, exchange, concurrency, requests)
+    finally:
+        await stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,262 @@
+"""Local stand-in for the Binance spot REST API, for benchmarks and soak tests.
+
+Answers a handful of public and signed endpoints with canned data, reports request
+weight in x-mbx-used-weight-1m and counts the client connections it has seen.
+Signatures are not checked.
+
+    python example/mock_server.py --port 8080            # HTTP/1.1 (aiohttp)
+    python example/mock_server.py --port 8080 --http2    # HTTP/1.1 + h2c (hypercorn)
+
+`--latency` adds a fixed delay to every response, `--error-rate` answers that share
+of requests with 503.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from utils.weights import request_weight
+except ModuleNotFoundError:
+    current_path = os.path.abspath(os.path.dirname(__file__))
+    root_path = os.path.split(current_path)[0]
+    if root_path not in sys.path:
+        sys.path.append(root_path)
+
+    from utils.weights import request_weight
+
+SYMBOLS = ("BTCUSDT", "ETHUSDT", "BNBUSDT", "ETHBTC", "BNBBTC")
+
+
+class MockExchange:
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.connections = set()
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self._weight_window = 0
+        self._weight = 0
+        self._order_id = 0
+
+    def _price(self, symbol: str) -> float:
+        base = {"BTCUSDT": 60000.0, "ETHUSDT": 3000.0, "BNBUSDT": 500.0, "ETHBTC": 0.05, "BNBBTC": 0.008}
+        return base.get(symbol, 1.0) * (1 + random.uniform(-0.001, 0.001))
+
+    def _book(self, symbol: str) -> Dict[str, Any]:
+        price = self._price(symbol)
+        return {
+            "symbol": symbol,
+            "bidPrice": f"{price * 0.9999:.8f}",
+            "bidQty": "1.00000000",
+            "askPrice": f"{price * 1.0001:.8f}",
+            "askQty": "1.00000000",
+        }
+
+    def _symbols(self, query: Dict[str, str]):
+        if "symbol" in query:
+            return query["symbol"], [query["symbol"]]
+        if "symbols" in query:
+            return None, json.loads(query["symbols"])
+        return None, list(SYMBOLS)
+
+    def _order(self, method: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        if method == "POST":
+            self._order_id += 1
+            order = {
+                "symbol": query.get("symbol"),
+                "orderId": self._order_id,
+                "clientOrderId": query.get("newClientOrderId") or f"mock{self._order_id}",
+                "transactTime": int(time.time() * 1000),
+                "price": query.get("price", "0"),
+                "origQty": query.get("quantity", "0"),
+                "executedQty": "0",
+                "status": "NEW",
+                "type": query.get("type"),
+                "side": query.get("side"),
+            }
+            self.orders[self._order_id] = order
+            return 200, order
+        order = self.orders.get(int(query.get("orderId", 0)))
+        if order is None:
+            return 400, {"code": -2013, "msg": "Order does not exist."}
+        if method == "DELETE":
+            order = dict(order, status="CANCELED")
+            del self.orders[order["orderId"]]
+        return 200, order
+
+    def route(self, method: str, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        if path in ("/api/v3/ping", "/api/v3/order/test"):
+            return 200, {}
+        if path == "/api/v3/time":
+            return 200, {"serverTime": int(time.time() * 1000)}
+        if path == "/sapi/v1/system/status":
+            return 200, {"status": 0, "msg": "normal"}
+        if path == "/api/v3/depth":
+            limit = int(query.get("limit", 100))
+            price = self._price(query.get("symbol", ""))
+            return 200, {
+                "lastUpdateId": self.requests,
+                "bids": [[f"{price - i * 0.01:.8f}", "1.00000000"] for i in range(1, limit + 1)],
+                "asks": [[f"{price + i * 0.01:.8f}", "1.00000000"] for i in range(1, limit + 1)],
+            }
+        if path == "/api/v3/ticker/bookTicker":
+            single, symbols = self._symbols(query)
+            books = [self._book(symbol) for symbol in symbols]
+            return 200, books[0] if single else books
+        if path == "/api/v3/ticker/price":
+            single, symbols = self._symbols(query)
+            prices = [{"symbol": symbol, "price": f"{self._price(symbol):.8f}"} for symbol in symbols]
+            return 200, prices[0] if single else prices
+        if path == "/api/v3/order":
+            return self._order(method, query)
+        if path == "/api/v3/order/cancelReplace":
+            status, canceled = self._order("DELETE", dict(query, orderId=query.get("cancelOrderId", 0)))
+            if status != 200:
+                return 400, {
+                    "code": -2022,
+                    "msg": "Order cancel-replace failed.",
+                    "data": {"cancelResult": "FAILURE", "newOrderResult": "NOT_ATTEMPTED", "cancelResponse": canceled},
+                }
+            _, placed = self._order("POST", query)
+            return 200, {
+                "cancelResult": "SUCCESS",
+                "newOrderResult": "SUCCESS",
+                "cancelResponse": canceled,
+                "newOrderResponse": placed,
+            }
+        if path == "/api/v3/openOrders":
+            orders = [o for o in self.orders.values() if o["symbol"] == query.get("symbol", o["symbol"])]
+            if method == "DELETE":
+                if not orders:
+                    return 400, {"code": -2011, "msg": "Unknown order sent."}
+                for order in orders:
+                    del self.orders[order["orderId"]]
+                return 200, [dict(order, status="CANCELED") for order in orders]
+            return 200, orders
+        if path == "/api/v3/account":
+            return 200, {
+                "accountType": "SPOT",
+                "updateTime": int(time.time() * 1000),
+                "balances": [{"asset": "USDT", "free": "10000.00000000", "locked": "0.00000000"}],
+            }
+        return 404, {"code": -1100, "msg": f"{method} {path} is not mocked"}
+
+    async def handle(self, method: str, path: str, query: Dict[str, str], peer: Any) -> Tuple[int, bytes, Dict[str, str]]:
+        self.requests += 1
+        self.connections.add(peer)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        window = int(time.time() // 60)
+        if window != self._weight_window:
+            self._weight_window, self._weight = window, 0
+        params = dict(query, limit=int(query["limit"])) if "limit" in query else query
+        self._weight += request_weight(method, path, params)
+        headers = {"Content-Type": "application/json", "x-mbx-used-weight-1m": str(self._weight)}
+        if self.error_rate and random.random() < self.error_rate:
+            return 503, b"Service Unavailable", headers
+        status, data = self.route(method, path, query)
+        return status, json.dumps(data).encode(), headers
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "connections": len(self.connections)}
+
+
+def aiohttp_app(exchange: MockExchange):
+    from aiohttp import web
+
+    async def handler(request):
+        peer = request.transport.get_extra_info("peername") if request.transport else None
+        status, body, headers = await exchange.handle(request.method, request.path, dict(request.query), peer)
+        return web.Response(status=status, body=body, headers=headers)
+
+    async def stats(request):
+        return web.json_response(exchange.stats())
+
+    app = web.Application()
+    app.router.add_get("/mock/stats", stats)
+    app.router.add_route("*", "/{tail:.*}", handler)
+    return app
+
+
+def asgi_app(exchange: MockExchange):
+    from urllib.parse import parse_qsl
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        query = dict(parse_qsl(scope["query_string"].decode()))
+        if scope["path"] == "/mock/stats":
+            status, body, headers = 200, json.dumps(exchange.stats()).encode(), {"Content-Type": "application/json"}
+        else:
+            status, body, headers = await exchange.handle(scope["method"], scope["path"], query, tuple(scope.get("client") or ()))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+async def start(
+    host: str = "127.0.0.1", port: int = 8080, http2: bool = False, latency: float = 0.0, error_rate: float = 0.0
+) -> Tuple[MockExchange, Any]:
+    """Start the server in the running loop, return the exchange state and a stop coroutine function."""
+
+    exchange = MockExchange(latency, error_rate)
+    if http2:
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+
+        config = Config()
+        config.bind = [f"{host}:{port}"]
+        config.accesslog = None
+        config.keep_alive_max_requests = 10**9
+        shutdown = asyncio.Event()
+        task = asyncio.ensure_future(serve(asgi_app(exchange), config, shutdown_trigger=shutdown.wait))
+        # give hypercorn time to bind
+        await asyncio.sleep(0.2)
+
+        async def stop() -> None:
+            shutdown.set()
+            await task
+
+        return exchange, stop
+
+    from aiohttp import web
+
+    runner = web.AppRunner(aiohttp_app(exchange), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return exchange, runner.cleanup
+
+
+async def main(args: Optional[argparse.Namespace] = None) -> None:
+    exchange, stop = await start(args.host, args.port, args.http2, args.latency, args.error_rate)
+    print(f"mock exchange on http://{args.host}:{args.port} ({'h2c + http/1.1' if args.http2 else 'http/1.1'})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--http2", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,347 @@
+"""Soak test: thousands of coroutines sharing one client against the local mock server.
+
+python example/soak.py [--duration 600] [--concurrency 1000] [--mix market=80,signed=15,order=5]
+python example/soak.py --report new.json --compare old.json
+
+Every worker loops over a weighted mix of market data (book_ticker, depth,
+ticker_price), signed queries (account, get_open_orders) and orders (new_order then
+cancel_order). Every --interval seconds one line is printed and kept with:
+
+  requests per second (failed ones included), errors, latency p50/p99 of the
+  successful requests per workload (utils.metrics.Histogram)
+  event loop lag: how late a 10ms timer fires, p99 and max
+  RSS, open file descriptors, sockets, connections seen by the server
+  unclosed aiohttp sessions and connectors reported by the garbage collector, counted
+  separately
+
+The JSON report (--report) holds the intervals and a summary; --compare prints the
+summary next to an older report, so two versions of the client can be compared.
+`--leak N` creates N clients per interval without `async with` to check that such
+leaks show up, as one session and one connector each.
+
+The mock server runs in the same process and event loop, so loop lag, RSS and
+descriptors include its share; compare reports made with the same arguments.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+try:
+    from binance_api import BinanceBase
+except ModuleNotFoundError:
+    current_path = os.path.abspath(os.path.dirname(__file__))
+    root_path = os.path.split(current_path)[0]
+    if root_path not in sys.path:
+        sys.path.append(root_path)
+
+    from binance_api import BinanceBase
+
+import aiohttp
+
+from mock_server import SYMBOLS, start
+from spot import SpotMarket, SpotOrder
+from utils.metrics import Histogram
+from utils.transport import AiohttpTransport, HttpxTransport
+
+# summary fields compared between reports, and whether higher is better
+COMPARED = (
+    ("rps", True),
+    ("errors", False),
+    ("market_p99_ms", False),
+    ("signed_p99_ms", False),
+    ("order_p99_ms", False),
+    ("lag_p99_ms", False),
+    ("lag_max_ms", False),
+    ("rss_growth_mb", False),
+    ("fd_growth", False),
+    ("unclosed_sessions", False),
+    ("unclosed_connectors", False),
+)
+
+
+class Client(BinanceBase, SpotMarket, SpotOrder):
+    pass
+
+
+async def market(client):
+    kind = random.random()
+    symbol = random.choice(SYMBOLS)
+    if kind < 0.5:
+        await client.book_ticker(symbol)
+    elif kind < 0.8:
+        await client.depth(symbol, limit=5)
+    else:
+        await client.ticker_price(symbols=list(SYMBOLS[:3]))
+
+
+async def signed(client):
+    if random.random() < 0.5:
+        await client.account()
+    else:
+        await client.get_open_orders(random.choice(SYMBOLS))
+
+
+async def order(client):
+    symbol = random.choice(SYMBOLS)
+    placed = await client.new_order(symbol, "BUY", "LIMIT", quantity=1, price=1, timeInForce="GTC")
+    await client.cancel_order(symbol, orderId=placed["orderId"])
+
+
+WORKLOADS = {"market": market, "signed": signed, "order": order}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, share = part.partition("=")
+        if name not in WORKLOADS:
+            raise argparse.ArgumentTypeError(f"unknown workload {name!r}, expected {sorted(WORKLOADS)}")
+        mix[name] = float(share)
+    return mix
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # peak, not current, where /proc is missing (kB on linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def descriptors():
+    """Open file descriptors and how many of them are sockets."""
+
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return None, None
+    sockets = 0
+    for fd in fds:
+        try:
+            sockets += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            pass
+    return len(fds), sockets
+
+
+def open_sessions():
+    gc.collect()
+    return sum(1 for o in gc.get_objects() if isinstance(o, aiohttp.ClientSession) and not o.closed)
+
+
+def git_revision():
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=root, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Soak:
+    def __init__(self, args, exchange):
+        self.args = args
+        self.exchange = exchange
+        self.names = list(args.mix)
+        self.weights = [args.mix[name] for name in self.names]
+        self.histograms = {name: Histogram() for name in WORKLOADS}
+        self.totals = {name: Histogram() for name in WORKLOADS}
+        self.errors = {name: 0 for name in WORKLOADS}
+        self.error_samples = []
+        self.lag = Histogram()
+        self.unclosed_sessions = 0
+        self.unclosed_connectors = 0
+        self.intervals = []
+        self.running = True
+
+    def exception_handler(self, loop, context):
+        # aiohttp reports sessions and connectors that were garbage collected while open,
+        # an unclosed session reports its connector too
+        message = context.get("message", "")
+        if message.startswith("Unclosed client session"):
+            self.unclosed_sessions += 1
+        elif message.startswith("Unclosed connector"):
+            self.unclosed_connectors += 1
+        else:
+            loop.default_exception_handler(context)
+
+    async def worker(self, client):
+        while self.running:
+            name = random.choices(self.names, self.weights)[0]
+            start_time = time.perf_counter_ns()
+            try:
+                await WORKLOADS[name](client)
+            except Exception as e:
+                self.errors[name] += 1
+                if len(self.error_samples) < 5:
+                    self.error_samples.append(f"{name}: {e!r}")
+                continue
+            elapsed = (time.perf_counter_ns() - start_time) // 1000
+            self.histograms[name].record(elapsed)
+
+    async def probe_lag(self, period=0.01):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            expected = loop.time() + period
+            await asyncio.sleep(period)
+            self.lag.record(max(0, int((loop.time() - expected) * 1e6)))
+
+    async def leak(self, base_url):
+        client = Client("key", "secret", base_url=base_url)
+        await client.ping()
+
+    def sample(self, elapsed, interval, connections):
+        fds, sockets = descriptors()
+        errors = sum(self.errors.values())
+        row = {
+            "t": round(elapsed, 1),
+            # failed requests count as requests, a slower failure rate must not look faster
+            "requests": sum(h.count for h in self.histograms.values()) + errors,
+            "errors": errors,
+            "lag_p99_ms": self.lag.percentile(99) / 1000,
+            "lag_max_ms": (self.lag.max or 0) / 1000,
+            "rss_mb": round(rss_mb(), 1),
+            "fds": fds,
+            "sockets": sockets,
+            "client_connections": connections,
+            "server_connections": len(self.exchange.connections),
+            "unclosed_sessions": self.unclosed_sessions,
+            "unclosed_connectors": self.unclosed_connectors,
+        }
+        row["rps"] = round(row["requests"] / interval, 1)
+        for name, histogram in self.histograms.items():
+            row[name] = histogram.to_dict((50, 99)) if histogram.count else None
+            self.totals[name].merge(histogram)
+            self.histograms[name] = Histogram()
+        self.lag = Histogram()
+        self.exchange.connections.clear()
+        self.errors = {name: 0 for name in WORKLOADS}
+        self.intervals.append(row)
+        return row
+
+    def summary(self):
+        rows = self.intervals
+        # the first interval includes connection setup and warm up
+        steady = rows[1:] or rows
+        summary = {
+            "rps": round(sum(r["requests"] for r in steady) / max(len(steady), 1) / self.args.interval, 1),
+            "errors": sum(r["errors"] for r in rows),
+            "lag_p99_ms": max(r["lag_p99_ms"] for r in steady),
+            "lag_max_ms": max(r["lag_max_ms"] for r in rows),
+            "rss_growth_mb": round(rows[-1]["rss_mb"] - steady[0]["rss_mb"], 1),
+            "fd_growth": (rows[-1]["fds"] - steady[0]["fds"]) if rows[-1]["fds"] is not None else None,
+            "unclosed_sessions": self.unclosed_sessions,
+            "unclosed_connectors": self.unclosed_connectors,
+        }
+        for name, histogram in self.totals.items():
+            summary[name + "_p50_ms"] = histogram.percentile(50) / 1000 if histogram.count else None
+            summary[name + "_p99_ms"] = histogram.percentile(99) / 1000 if histogram.count else None
+        return summary
+
+
+def print_row(row):
+    latency = "".join(
+        f"{(row[name] or {}).get('p50', 0) / 1000:>11.2f}{(row[name] or {}).get('p99', 0) / 1000:>11.2f}"
+        for name in WORKLOADS
+    )
+    print(
+        f"{row['t']:>7.0f}{row['rps']:>9.0f}{row['errors']:>8}{latency}"
+        f"{row['lag_p99_ms']:>9.2f}{row['lag_max_ms']:>9.2f}{row['rss_mb']:>9.1f}"
+        f"{row['fds'] if row['fds'] is not None else '-':>6}{row['sockets'] if row['sockets'] is not None else '-':>6}"
+        f"{row['server_connections']:>7}{row['unclosed_sessions']:>6}{row['unclosed_connectors']:>6}"
+    )
+
+
+def compare(summary, path):
+    with open(path) as f:
+        baseline = json.load(f)
+    old = baseline["summary"]
+    print(f"\ncompared with {path} ({baseline['meta'].get('revision')}, version {baseline['meta'].get('version')})")
+    print(f"{'metric':<16}{'before':>12}{'after':>12}{'change':>10}")
+    for key, higher_is_better in COMPARED:
+        before, after = old.get(key), summary.get(key)
+        if before is None or after is None:
+            continue
+        change = f"{(after - before) / before * 100:+.1f}%" if before else ""
+        worse = (after < before) if higher_is_better else (after > before)
+        print(f"{key:<16}{before:>12}{after:>12}{change:>10}{'  worse' if worse and before != after else ''}")
+
+
+async def main(args):
+    exchange, stop = await start(
+        port=args.port, http2=args.transport == "httpx", latency=args.latency, error_rate=args.error_rate
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    soak = Soak(args, exchange)
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(soak.exception_handler)
+    transport = HttpxTransport(http1=False) if args.transport == "httpx" else AiohttpTransport(connection_limit=args.connections)
+    print(
+        f"{'t':>7}{'req/s':>9}{'errors':>8}"
+        + "".join(f"{name + ' p50':>11}{name + ' p99':>11}" for name in WORKLOADS)
+        + f"{'lag p99':>9}{'lag max':>9}{'rss MB':>9}{'fds':>6}{'socks':>6}{'conns':>7}{'sess':>6}{'conn':>6}"
+    )
+    started = time.monotonic()
+    try:
+        async with Client("key", "secret", base_url=base_url, transport=transport) as client:
+            tasks = [asyncio.ensure_future(soak.worker(client)) for _ in range(args.concurrency)]
+            tasks.append(asyncio.ensure_future(soak.probe_lag()))
+            while time.monotonic() - started < args.duration:
+                await asyncio.sleep(args.interval)
+                for _ in range(args.leak):
+                    await soak.leak(base_url)
+                gc.collect()
+                print_row(soak.sample(time.monotonic() - started, args.interval, len(transport.connection_stats())))
+            soak.running = False
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await transport.close()
+    finally:
+        await stop()
+
+    summary = soak.summary()
+    summary["open_sessions"] = open_sessions()
+    print("\nsummary: " + json.dumps(summary))
+    for sample in soak.error_samples:
+        print("error sample: " + sample)
+    if args.report:
+        report = {
+            "meta": {
+                "version": BinanceBase.__version__,
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "time": int(time.time()),
+                "args": {k: v for k, v in vars(args).items() if k not in ("report", "compare")},
+            },
+            "intervals": soak.intervals,
+            "summary": summary,
+        }
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        compare(summary, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between samples")
+    parser.add_argument("--concurrency", type=int, default=1000, help="worker coroutines")
+    parser.add_argument("--connections", type=int, default=100, help="aiohttp connection limit")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("market=80,signed=15,order=5"))
+    parser.add_argument("--transport", choices=("aiohttp", "httpx"), default="aiohttp")
+    parser.add_argument("--latency", type=float, default=0.001, help="mock server delay per response")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--leak", type=int, default=0, help="clients per interval left unclosed")
+    parser.add_argument("--report", help="write the JSON report here")
+    parser.add_argument("--compare", help="JSON report of an earlier run")
+    asyncio.run(main(parser.parse_args()))
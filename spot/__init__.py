@@ -1,2 +1,3 @@
+from spot._market import SpotMarket
 from spot._order import SpotOrder
 from spot._wallet import SpotWallet
\ No newline at end of file
@@ -3,10 +3,12 @@ from utils.util import (
     check_required_parameter,
     check_required_parameters,
     check_enum_parameter,
+    check_type_parameter,
+    convert_list_to_json_array,
 )
 
 class SpotMarket:
-    async def ping(self):
+    async def ping(self, **kwargs):
         """Test Connectivity
         Test connectivity to the Rest API.
 
@@ -14,13 +16,15 @@ class SpotMarket:
 
         https://binance-docs.github.io/apidocs/spot/en/#test-connectivity
 
+        Keyword Args:
+            deadline (float, optional): seconds the whole call may take, see utils.deadline
         """
 
         url_path = "/api/v3/ping"
-        return await self.query(url_path)
+        return await self.query(url_path, kwargs)
 
 
-    async def time(self):
+    async def time(self, **kwargs):
         """Check Server Time
         Test connectivity to the Rest API and get the current server time.
 
@@ -28,10 +32,12 @@ class SpotMarket:
 
         https://binance-docs.github.io/apidocs/spot/en/#check-server-time
 
+        Keyword Args:
+            deadline (float, optional): seconds the whole call may take, see utils.deadline
         """
 
         url_path = "/api/v3/time"
-        return await self.query(url_path)
+        return await self.query(url_path, kwargs)
 
 
     async def exchange_info(
@@ -83,7 +89,7 @@ class SpotMarket:
 
         check_required_parameter(symbol, "symbol")
         params = {"symbol": symbol, **kwargs}
-        return await self.query("/api/v3/depth", params)
+        return await self.query("/api/v3/depth", params, schema="depth")
 
 
     async def trades(self, symbol: str, **kwargs):
@@ -162,7 +168,7 @@ class SpotMarket:
         check_required_parameters([[symbol, "symbol"], [interval, "interval"]])
 
         params = {"symbol": symbol, "interval": interval, **kwargs}
-        return await self.query("/api/v3/klines", params)
+        return await self.query("/api/v3/klines", params, schema="klines")
 
 
     async def ui_klines(self, symbol: str, interval: str, **kwargs):
@@ -186,7 +192,7 @@ class SpotMarket:
         return await self.query("/api/v3/uiKlines", params)
 
 
-    async def avg_price(self, symbol: str):
+    async def avg_price(self, symbol: str, **kwargs):
         """Current Average Price
 
         GET /api/v3/avgPrice
@@ -195,11 +201,14 @@ class SpotMarket:
 
         Args:
             symbol (str): the trading pair
+        Keyword Args:
+            deadline (float, optional): seconds the whole call may take, see utils.deadline
         """
 
         check_required_parameter(symbol, "symbol")
         params = {
             "symbol": symbol,
+            **kwargs,
         }
         return await self.query("/api/v3/avgPrice", params)
 
@@ -227,7 +236,7 @@ class SpotMarket:
         return await self.query("/api/v3/ticker/24hr", params)
 
 
-    async def ticker_price(self, symbol: str = None, symbols: list = None):
+    async def ticker_price(self, symbol: str = None, symbols: list = None, **kwargs):
         """Symbol Price Ticker
 
         GET /api/v3/ticker/price
@@ -237,16 +246,18 @@ class SpotMarket:
         Args:
             symbol (str, optional): the trading pair
             symbols (list, optional): list of trading pairs
+        Keyword Args:
+            deadline (float, optional): seconds the whole call may take, see utils.deadline
         """
 
         if symbol and symbols:
             raise ParameterArgumentError("symbol and symbols cannot be sent together.")
         check_type_parameter(symbols, "symbols", list)
-        params = {"symbol": symbol, "symbols": convert_list_to_json_array(symbols)}
+        params = {"symbol": symbol, "symbols": convert_list_to_json_array(symbols), **kwargs}
         return await self.query("/api/v3/ticker/price", params)
 
 
-    async def book_ticker(self, symbol: str = None, symbols: list = None):
+    async def book_ticker(self, symbol: str = None, symbols: list = None, **kwargs):
         """Symbol Order Book Ticker
 
         GET /api/v3/ticker/bookTicker
@@ -256,13 +267,15 @@ class SpotMarket:
         Args:
             symbol (str, optional): the trading pair
             symbols (list, optional): list of trading pairs
+        Keyword Args:
+            deadline (float, optional): seconds the whole call may take, see utils.deadline
         """
 
         if symbol and symbols:
             raise ParameterArgumentError("symbol and symbols cannot be sent together.")
         check_type_parameter(symbols, "symbols", list)
-        params = {"symbol": symbol, "symbols": convert_list_to_json_array(symbols)}
-        return await self.query("/api/v3/ticker/bookTicker", params)
+        params = {"symbol": symbol, "symbols": convert_list_to_json_array(symbols), **kwargs}
+        return await self.query("/api/v3/ticker/bookTicker", params, schema="book_ticker")
 
 
     async def rolling_window_ticker(self, symbol: str = None, symbols: list = None, **kwargs):
@@ -7,16 +7,19 @@ from utils.util import (
 
 
 class SpotWallet:
-    async def system_status(self):
+    async def system_status(self, **kwargs):
         """System Status (System)
         Fetch system status.
 
         GET /sapi/v1/system/status
 
         https://binance-docs.github.io/apidocs/spot/en/#system-status-sapi-system
+
+        Keyword Args:
+            deadline (float, optional): seconds the whole call may take, see utils.deadline
         """
 
-        return await self.query("/sapi/v1/system/status")
+        return await self.query("/sapi/v1/system/status", kwargs)
 
     async def coin_info(self, **kwargs):
         """All Coins' Information (USER_DATA)
@@ -103,7 +106,7 @@ class SpotWallet:
         """Trade Fee (USER_DATA)
         Fetch trade fee, values in percentage.
 
-        GET /sapi/v1/asset/traasync defee
+        GET /sapi/v1/asset/tradeFee
 
         https://binance-docs.github.io/apidocs/spot/en/#trade-fee-sapi-user_data
 
@@ -112,7 +115,7 @@ class SpotWallet:
             recvWindow (int, optional): The value cannot be greater than 60000
         """
 
-        return await self.sign_request("GET", "/sapi/v1/asset/traasync defee", kwargs)
+        return await self.sign_request("GET", "/sapi/v1/asset/tradeFee", kwargs)
 
     async def funding_wallet(self, **kwargs):
         """Funding Wallet (USER_DATA)
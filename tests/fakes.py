@@ -0,0 +1,48 @@
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.transport import Response, Transport
+
+
+class FakeTransport(Transport):
+    """Answers every request with `respond(method, url)`, {} by default, and keeps the requests."""
+
+    def __init__(self, respond: Optional[Callable[[str, str], Response]] = None) -> None:
+        super().__init__()
+        self.requests: List[Tuple[str, str]] = []
+        self.respond = respond or (lambda method, url: Response(200, {}, b"{}"))
+
+    async def request(
+        self, method: str, url: str, headers: Dict[str, str], timeout: float, proxy: Any = None
+    ) -> Response:
+        self.requests.append((method, url))
+        return self.respond(method, url)
+
+
+class ShardWorkerClient:
+    """Client class for ShardedClient workers; lives here so spawned workers can import it."""
+
+    def __init__(self, weight_limiter: Any = None, **kwargs: Any) -> None:
+        self.weight_limiter = weight_limiter
+
+    async def __aenter__(self) -> "ShardWorkerClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+    async def klines(self, symbol: str, interval: str) -> Tuple[str, str, int]:
+        await self.weight_limiter.acquire(2)
+        return symbol, interval, os.getpid()
+
+    async def hang(self, symbol: str) -> None:
+        await asyncio.sleep(60)
+
+    async def die(self, symbol: str) -> None:
+        os._exit(3)
+
+
+class BrokenShardWorkerClient(ShardWorkerClient):
+    def __init__(self, **kwargs: Any) -> None:
+        raise RuntimeError("cannot start")
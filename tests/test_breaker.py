@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from binance_api import BinanceBase
+from spot import SpotMarket
+from utils.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers
+from utils.error import CircuitOpenError, ClientError, DeadlineExceededError
+from utils.limiter import WeightLimiter
+from utils.transport import Response
+
+from fakes import FakeTransport
+
+
+class Client(BinanceBase, SpotMarket):
+    pass
+
+
+def half_open(calls=2):
+    breaker = CircuitBreaker("GET /api/v3/depth", half_open_calls=calls, open_for=10)
+    breaker.open()
+    breaker.half_open()
+    return breaker
+
+
+def test_failures_open_the_breaker():
+    breaker = CircuitBreaker("GET /api/v3/depth", window=4, min_calls=4, failure_rate=0.5)
+    for error in (None, ClientError(400, -1100, "bad", {}), ConnectionError(), asyncio.TimeoutError()):
+        breaker.allow()
+        breaker.record(0.01, error)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_check_takes_no_trial():
+    breaker = half_open(calls=1)
+    for _ in range(3):
+        breaker.check()
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_trials_close_or_reopen():
+    breaker = half_open(calls=2)
+    breaker.allow()
+    breaker.allow()
+    breaker.record(0.01)
+    assert breaker.state == HALF_OPEN
+    breaker.record(0.01)
+    assert breaker.state == CLOSED
+
+    breaker = half_open(calls=2)
+    breaker.allow()
+    breaker.record(0.01, ConnectionError())
+    assert breaker.state == OPEN
+
+
+@pytest.mark.parametrize("error", [asyncio.CancelledError(), DeadlineExceededError("http", 0.1)])
+def test_abandoned_trial_is_given_back(error):
+    breaker = half_open(calls=1)
+    breaker.allow()
+    breaker.record(0.01, error)
+    assert breaker.state == HALF_OPEN
+    breaker.allow()
+
+
+def test_stalled_trials_are_given_back():
+    breaker = half_open(calls=1)
+    breaker.allow()
+    assert not breaker.stalled()
+    breaker._trial_at -= breaker.open_for
+    assert breaker.stalled()
+    breaker.check()
+    breaker.allow()
+
+
+def test_call_stopped_before_sending_keeps_the_trial():
+    breakers = CircuitBreakers(half_open_calls=1)
+    transport = FakeTransport()
+    limiter = WeightLimiter(1)
+    client = Client(transport=transport, breakers=breakers, weight_limiter=limiter)
+    breaker = breakers.breaker("GET", "/api/v3/ping")
+    breaker.open()
+    breaker.half_open()
+
+    async def main():
+        # the budget is spent, the deadline runs out in the rate limiter
+        limiter.charge(1)
+        with pytest.raises(DeadlineExceededError):
+            await client.send_request("GET", "/api/v3/ping", {"deadline": 0.01})
+        assert breaker._trials == 0
+        client.weight_limiter = None
+        await client.ping()
+
+    asyncio.run(main())
+    assert len(transport.requests) == 1
+    assert breaker.state == CLOSED
@@ -0,0 +1,37 @@
+import asyncio
+
+from binance_api import BinanceBase
+from spot import SpotMarket, SpotOrder
+from utils.concurrency import AdaptiveConcurrency, endpoint_class
+
+
+class Client(BinanceBase, SpotMarket, SpotOrder):
+    pass
+
+
+def test_endpoint_class():
+    assert endpoint_class("POST", "/api/v3/order", True) == "order"
+    assert endpoint_class("DELETE", "/api/v3/orderList", True) == "order"
+    assert endpoint_class("GET", "/api/v3/allOrders", True) == "signed"
+    assert endpoint_class("GET", "/api/v3/depth") == "market"
+
+
+class RecordingConcurrency(AdaptiveConcurrency):
+    def __init__(self) -> None:
+        super().__init__()
+        self.classes = []
+
+    def slot(self, name, weight_limiter=None):
+        self.classes.append(name)
+        return super().slot(name, weight_limiter)
+
+
+def test_signed_requests_take_a_signed_slot(transport):
+    async def main():
+        concurrency = RecordingConcurrency()
+        client = Client("key", "secret", transport=transport, concurrency=concurrency)
+        await client.get_orders("BTCUSDT")
+        await client.depth("BTCUSDT")
+        return concurrency.classes
+
+    assert asyncio.run(main()) == ["signed", "market"]
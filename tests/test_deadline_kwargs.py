@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from binance_api import BinanceBase
+from spot import SpotMarket, SpotWallet
+from utils.error import DeadlineExceededError
+
+from fakes import FakeTransport
+
+
+class Client(BinanceBase, SpotMarket, SpotWallet):
+    pass
+
+
+CALLS = [
+    ("ping", ()),
+    ("time", ()),
+    ("avg_price", ("BTCUSDT",)),
+    ("ticker_price", ("BTCUSDT",)),
+    ("book_ticker", ("BTCUSDT",)),
+    ("system_status", ()),
+]
+
+
+@pytest.mark.parametrize("method, args", CALLS)
+def test_deadline_is_accepted_and_not_sent(method, args):
+    transport = FakeTransport()
+    client = Client(transport=transport)
+
+    asyncio.run(getattr(client, method)(*args, deadline=1.0))
+    (_, url), = transport.requests
+    assert "deadline" not in url
+
+
+@pytest.mark.parametrize("method, args", CALLS)
+def test_deadline_bounds_the_call(method, args):
+    transport = FakeTransport()
+    client = Client(transport=transport)
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(getattr(client, method)(*args, deadline=0))
+    assert transport.requests == []
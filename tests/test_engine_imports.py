@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+import engine
+from engine._market_snapshot import MarketSnapshot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WITHOUT_NUMPY = """
+import sys
+sys.modules["numpy"] = None
+from engine import AccountPool, KillSwitch, QuoteEngine, ShardedClient
+try:
+    from engine import MarketSnapshot
+except ImportError:
+    print("lazy")
+"""
+
+
+def test_numpy_engines_are_imported_on_first_use():
+    assert engine.MarketSnapshot is MarketSnapshot
+    assert "SnapshotHistory" in dir(engine)
+
+
+def test_engines_without_numpy_import_without_it():
+    result = subprocess.run([sys.executable, "-c", WITHOUT_NUMPY], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "lazy"
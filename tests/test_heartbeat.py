@@ -0,0 +1,46 @@
+import asyncio
+
+from binance_api import BinanceBase
+from spot import SpotMarket
+
+from fakes import FakeTransport
+
+
+class Client(BinanceBase, SpotMarket):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prewarms = []
+
+    async def prewarm(self, connections=None):
+        self.prewarms.append(connections)
+        return await super().prewarm(connections)
+
+
+def test_heartbeat_sends_one_ping_per_idle_interval():
+    transport = FakeTransport()
+    client = Client(transport=transport, prewarm_connections=4, heartbeat_interval=0.01)
+
+    async def main():
+        async with client:
+            assert len(transport.requests) == 4
+            await asyncio.sleep(0.055)
+
+    asyncio.run(main())
+    heartbeats = client.prewarms[1:]
+    assert 1 <= len(heartbeats) <= 6
+    assert set(heartbeats) == {1}
+    assert len(transport.requests) == 4 + len(heartbeats)
+
+
+def test_no_heartbeat_while_busy():
+    transport = FakeTransport()
+    client = Client(transport=transport, heartbeat_interval=0.02)
+
+    async def main():
+        async with client:
+            for _ in range(10):
+                await client.time()
+                await asyncio.sleep(0.005)
+
+    asyncio.run(main())
+    assert client.prewarms == []
@@ -0,0 +1,76 @@
+import asyncio
+
+from engine._kill_switch import SYNC, KillSwitch
+from utils.error import ClientError
+
+
+class Account:
+    """Open orders per symbol; `failures` maps a symbol (or SYNC for get_open_orders)
+    to how many calls fail before one succeeds."""
+
+    def __init__(self, open_orders, failures=None):
+        self.open_orders = open_orders
+        self.failures = dict(failures or {})
+        self.cancels = []
+
+    def _maybe_fail(self, key):
+        if self.failures.get(key, 0) > 0:
+            self.failures[key] -= 1
+            raise ConnectionError(key)
+
+    async def get_open_orders(self):
+        self._maybe_fail(SYNC)
+        return [{"symbol": s, "orderId": i} for s, ids in self.open_orders.items() for i in ids]
+
+    async def cancel_open_orders(self, symbol):
+        self.cancels.append(symbol)
+        self._maybe_fail(symbol)
+        if not self.open_orders.get(symbol):
+            raise ClientError(400, -2011, "Unknown order sent.", {})
+        return [{"orderId": i} for i in self.open_orders.pop(symbol)]
+
+
+def fire(account, retries=5):
+    fired = []
+
+    async def main():
+        kill = KillSwitch(account, on_fire=fired.append, retries=retries, retry_delay=0.001)
+        kill.arm(0.001)
+        while not fired:
+            await asyncio.sleep(0.001)
+        return kill
+
+    kill = asyncio.run(main())
+    return kill, fired[0]
+
+
+def test_failed_symbols_are_retried_alone():
+    account = Account({"BTCUSDT": [1, 2], "ETHUSDT": [3]}, failures={"ETHUSDT": 2})
+    kill, results = fire(account)
+
+    assert kill.failed(results) == []
+    assert results["BTCUSDT"] == [{"orderId": 1}, {"orderId": 2}]
+    assert account.cancels == ["BTCUSDT", "ETHUSDT", "ETHUSDT", "ETHUSDT"]
+    assert account.open_orders == {}
+
+
+def test_failed_sync_is_retried():
+    account = Account({"BTCUSDT": [1]}, failures={SYNC: 2})
+    kill, results = fire(account)
+
+    assert SYNC not in results
+    assert results == {"BTCUSDT": [{"orderId": 1}]}
+
+
+def test_retries_are_bounded():
+    account = Account({"BTCUSDT": [1]}, failures={"BTCUSDT": 10})
+    kill, results = fire(account, retries=2)
+
+    assert kill.failed(results) == ["BTCUSDT"]
+    assert isinstance(results["BTCUSDT"], ConnectionError)
+    assert len(account.cancels) == 3
+
+    account = Account({"BTCUSDT": [1]}, failures={SYNC: 10})
+    kill, results = fire(account, retries=2)
+    assert list(results) == [SYNC]
+    assert account.cancels == []
@@ -0,0 +1,67 @@
+import asyncio
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from binance_api import BinanceBase
+from engine._market_snapshot import PATHS, MarketSnapshot, plan_requests, symbol_params
+from spot import SpotMarket
+from utils.transport import Response
+from utils.weights import request_weight
+
+from fakes import FakeTransport
+
+SYMBOLS = ["S%03d" % i for i in range(250)]
+
+
+class Client(BinanceBase, SpotMarket):
+    pass
+
+
+@pytest.mark.parametrize("count", [1, 2, 20, 21, 100, 250])
+@pytest.mark.parametrize(
+    "fields",
+    [
+        ["lastPrice"],
+        ["bidPrice", "askPrice"],
+        ["lastPrice", "bidPrice", "askPrice"],
+        ["lastPrice", "volume"],
+    ],
+)
+def test_planned_weights_are_request_weights(count, fields):
+    for request in plan_requests(SYMBOLS[:count], fields):
+        assert request.weight == request_weight("GET", PATHS[request.endpoint], symbol_params(request.symbols))
+
+
+def test_prices_and_books_of_few_symbols_come_from_one_24hr_request():
+    plan = plan_requests(SYMBOLS[:20], ["lastPrice", "bidPrice", "askPrice"])
+    assert [(r.endpoint, r.weight) for r in plan] == [("ticker_24hr", 2)]
+
+
+def test_whole_market_is_cheaper_than_long_symbol_lists():
+    plan = plan_requests(SYMBOLS, ["lastPrice"])
+    assert [(r.endpoint, r.symbols, r.weight) for r in plan] == [("ticker_price", None, 4)]
+
+
+def test_rolling_window_is_chunked():
+    plan = plan_requests(SYMBOLS, ["volume"], window_size="4h")
+    assert {r.endpoint for r in plan} == {"rolling_window_ticker"}
+    assert [len(r.symbols) for r in plan] == [100, 100, 50]
+
+
+@pytest.mark.parametrize("count", [1, 20, 250])
+def test_reported_weight_is_what_the_requests_cost(count):
+    transport = FakeTransport(lambda method, url: Response(200, {}, b"[]"))
+
+    async def main():
+        snapshot = MarketSnapshot(Client(transport=transport), SYMBOLS[:count], ["lastPrice", "bidPrice", "volume"])
+        await snapshot.refresh()
+        return snapshot.weight
+
+    weight = asyncio.run(main())
+    spent = 0
+    for method, url in transport.requests:
+        parts = urlsplit(url)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        spent += request_weight(method, parts.path, params)
+    assert spent == weight
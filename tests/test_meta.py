@@ -0,0 +1,15 @@
+import asyncio
+
+from utils.meta import async_delayed_notification
+
+
+class Orders:
+    @async_delayed_notification(0.01)
+    async def slow(self):
+        await asyncio.sleep(0.05)
+        return "filled"
+
+
+def test_call_slower_than_the_watchdog_still_completes(capsys):
+    assert asyncio.run(Orders().slow()) == "filled"
+    assert "slow took too long" in capsys.readouterr().out
@@ -0,0 +1,86 @@
+import asyncio
+
+from engine._order_lists import OrderListManager
+
+
+def list_status(list_id, status="EXEC_STARTED", legs=(11, 12), symbol="BTCUSDT"):
+    return {
+        "e": "listStatus",
+        "g": list_id,
+        "s": symbol,
+        "c": "OCO",
+        "l": "EXEC_STARTED",
+        "L": status,
+        "C": "list-%d" % list_id,
+        "T": 1,
+        "O": [{"s": symbol, "i": order_id, "c": "leg-%d" % order_id} for order_id in legs],
+    }
+
+
+def execution_report(list_id, order_id, status="NEW", side="SELL", order_type="STOP_LOSS_LIMIT"):
+    return {
+        "e": "executionReport",
+        "g": list_id,
+        "i": order_id,
+        "c": "leg-%d" % order_id,
+        "S": side,
+        "o": order_type,
+        "p": "90",
+        "P": "91",
+        "q": "1",
+        "X": status,
+    }
+
+
+class OpenListsClient:
+    def __init__(self, open_lists):
+        self.open_lists = open_lists
+
+    async def get_oco_open_orders(self):
+        return self.open_lists
+
+    async def get_open_orders(self):
+        return []
+
+
+def test_lists_are_indexed_by_symbol_and_leg():
+    lists = OrderListManager(None)
+    lists.on_event(list_status(1))
+    lists.on_event(execution_report(1, 11))
+    lists.on_event(execution_report(1, 12, side="BUY", order_type="LIMIT_MAKER"))
+    lists.on_event(list_status(2, legs=(21, 22), symbol="ETHUSDT"))
+
+    assert lists.symbols() == ["BTCUSDT", "ETHUSDT"]
+    assert lists.list_of_order(12)["orderListId"] == 1
+    assert [leg["orderId"] for leg in lists.protective_orders("BTCUSDT", side="SELL")] == [11]
+
+    lists.on_event(list_status(1, status="ALL_DONE"))
+    assert not lists.is_protected("BTCUSDT")
+    assert lists.list_of_order(11) is None
+
+
+def test_leg_reports_before_the_list_are_merged():
+    lists = OrderListManager(None)
+    lists.on_event(execution_report(1, 11))
+    lists.on_event(execution_report(1, 12, side="BUY", order_type="LIMIT_MAKER"))
+    assert lists.order_list(1) is None
+
+    lists.on_event(list_status(1))
+    legs = lists.order_list(1)["legs"]
+    assert legs[11]["type"] == "STOP_LOSS_LIMIT"
+    assert legs[12]["side"] == "BUY"
+    assert [leg["orderId"] for leg in lists.protective_orders("BTCUSDT", side="SELL")] == [11]
+    assert not lists._pending
+
+
+def test_reports_of_finished_lists_are_dropped():
+    lists = OrderListManager(OpenListsClient([]))
+    lists.on_event(execution_report(1, 11, status="FILLED"))
+    lists.on_event(list_status(1, status="ALL_DONE"))
+    assert lists.order_list(1) is None
+    assert not lists._pending
+
+    # a list that never shows up is dropped by the next sync
+    lists.on_event(execution_report(3, 31))
+    asyncio.run(lists.sync())
+    assert not lists._pending
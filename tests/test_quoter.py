@@ -0,0 +1,78 @@
+import asyncio
+from decimal import Decimal
+
+from engine._quoter import QuoteEngine
+from utils.error import ClientError
+
+
+class Exchange:
+    """Order book of one account; `failures` are raised by the next new_order calls,
+    timeouts after the order was placed."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.orders = {}
+        self.new_orders = 0
+        self.lookups = 0
+
+    async def new_order(self, symbol, side, type, **kwargs):
+        self.new_orders += 1
+        failure = self.failures.pop(0) if self.failures else None
+        if isinstance(failure, ClientError):
+            raise failure
+        order = {"orderId": len(self.orders) + 1, "status": "NEW", "clientOrderId": kwargs["newClientOrderId"]}
+        self.orders[kwargs["newClientOrderId"]] = order
+        if failure is not None:
+            raise failure
+        return order
+
+    async def get_order(self, symbol, origClientOrderId):
+        self.lookups += 1
+        if origClientOrderId not in self.orders:
+            raise ClientError(400, -2013, "Order does not exist.", {})
+        return self.orders[origClientOrderId]
+
+
+def quote(exchange):
+    async def main():
+        quoter = QuoteEngine(exchange, tick_sizes={"BTCUSDT": "0.01"}, retry_delay=0.001)
+        quoter.set_target("BTCUSDT", bids=[(100, 1)])
+        await quoter.flush()
+        return quoter
+
+    return asyncio.run(main())
+
+
+def test_failed_operations_are_retried():
+    exchange = Exchange([ClientError(429, -1003, "Too many requests.", {})] * 2)
+    quoter = quote(exchange)
+
+    assert exchange.new_orders == 3
+    assert quoter.stats["errors"] == 2
+    assert [(o["side"], o["price"]) for o in quoter.live_orders()] == [("BUY", Decimal("100.00"))]
+
+
+def test_timed_out_order_on_the_book_is_adopted():
+    exchange = Exchange([asyncio.TimeoutError()])
+    quoter = quote(exchange)
+
+    assert exchange.new_orders == 1
+    assert exchange.lookups == 1
+    assert len(exchange.orders) == 1
+    assert [o["orderId"] for o in quoter.live_orders()] == [1]
+
+
+def test_timed_out_order_missing_from_the_book_is_placed_again():
+    exchange = Exchange([asyncio.TimeoutError()])
+
+    async def lose(symbol, origClientOrderId):
+        exchange.lookups += 1
+        exchange.orders.pop(origClientOrderId)
+        raise ClientError(400, -2013, "Order does not exist.", {})
+
+    exchange.get_order = lose
+    quoter = quote(exchange)
+
+    assert exchange.new_orders == 2
+    assert exchange.lookups == 1
+    assert len(quoter.live_orders()) == 1
@@ -0,0 +1,81 @@
+import asyncio
+
+from engine._reconcile import Reconciler
+
+
+class Account:
+    """my_trades and get_orders of one symbol; trade and order i happen at time 1000 * i."""
+
+    def __init__(self, trades=10, orders=10, open_orders=()):
+        self.trades = [{"id": i, "orderId": i, "time": 1000 * i} for i in range(trades)]
+        self.orders = [
+            {"orderId": i, "clientOrderId": "c%d" % i, "time": 1000 * i, "status": "FILLED"} for i in range(orders)
+        ]
+        for i in open_orders:
+            self.orders[i]["status"] = "NEW"
+        self.calls = []
+
+    @staticmethod
+    def _page(items, key, limit, start=None, startTime=None):
+        if startTime is not None:
+            items = [item for item in items if item["time"] >= startTime]
+        else:
+            items = [item for item in items if item[key] >= start]
+        return items[:limit]
+
+    async def my_trades(self, symbol, limit=500, fromId=None, startTime=None):
+        self.calls.append(("my_trades", fromId, startTime))
+        return self._page(self.trades, "id", limit, fromId, startTime)
+
+    async def get_orders(self, symbol, limit=500, orderId=None, startTime=None):
+        self.calls.append(("get_orders", orderId, startTime))
+        return self._page(self.orders, "orderId", limit, orderId, startTime)
+
+
+def test_since_starts_a_symbol_without_cursor():
+    account = Account()
+    reconciler = Reconciler(account, page_limit=4)
+
+    assert asyncio.run(reconciler.sync_trades("BTCUSDT", since=5000)) == 5
+    assert [t["id"] for t in reconciler.trades("BTCUSDT")] == [5, 6, 7, 8, 9]
+    assert account.calls == [("my_trades", None, 5000), ("my_trades", 9, None)]
+    assert reconciler.cursor("BTCUSDT", "trades") == 10
+
+    # the cursor wins over since from now on
+    account.calls.clear()
+    assert asyncio.run(reconciler.sync_trades("BTCUSDT", since=0)) == 0
+    assert account.calls == [("my_trades", 10, None)]
+
+
+def test_orders_cursor_stays_at_the_oldest_open_order():
+    account = Account(open_orders=(3, 7))
+    reconciler = Reconciler(account, page_limit=4)
+
+    assert asyncio.run(reconciler.sync_orders("BTCUSDT")) == 10
+    assert reconciler.cursor("BTCUSDT", "orders") == 3
+    assert reconciler.order_by_client_id("c7")["status"] == "NEW"
+
+
+def test_no_orders_since_keeps_no_cursor():
+    reconciler = Reconciler(Account(), page_limit=4)
+
+    assert asyncio.run(reconciler.sync_orders("BTCUSDT", since=10 ** 6)) == 0
+    assert reconciler.cursor("BTCUSDT", "orders") is None
+
+
+def test_pages_go_through_fetch():
+    account = Account()
+    reconciler = Reconciler(account, page_limit=4)
+    fetched = []
+
+    async def fetch(method, *args, **kwargs):
+        fetched.append(method)
+        return await getattr(account, method)(*args, **kwargs)
+
+    async def main():
+        await reconciler.sync_trades("BTCUSDT", fetch=fetch)
+        await reconciler.sync_orders("BTCUSDT", fetch=fetch)
+
+    asyncio.run(main())
+    assert fetched == ["my_trades"] * 3 + ["get_orders"] * 3
+    assert len(reconciler.orders("BTCUSDT")) == 10
@@ -0,0 +1,67 @@
+import pytest
+
+from engine._replay import MatchingSimulator, ReplayStore
+from utils.error import ClientError
+
+
+def simulator():
+    store = ReplayStore()
+    store.add(1000, "bookTicker", "BTCUSDT", {"bidPrice": "100", "bidQty": "5", "askPrice": "101", "askQty": "5"})
+    store.add(1000, "trade", "BTCUSDT", {"price": "100", "qty": "1", "isBuyerMaker": True})
+    store.add(2000, "bookTicker", "BTCUSDT", {"bidPrice": "95", "bidQty": "5", "askPrice": "96", "askQty": "5"})
+    store.add(2000, "trade", "BTCUSDT", {"price": "95", "qty": "1", "isBuyerMaker": True})
+    sim = MatchingSimulator(store)
+    sim.advance_to(1000)
+    return sim
+
+
+def test_stop_loss_rests_until_the_trade_price_reaches_stop_price():
+    sim = simulator()
+    order = sim.new_order(
+        {"symbol": "BTCUSDT", "side": "SELL", "type": "STOP_LOSS", "quantity": "1", "stopPrice": "97"}
+    )
+    assert order["status"] == "NEW"
+    assert order["fills"] == []
+    assert order["isWorking"] is False
+
+    sim.advance_to(2000)
+    stopped = sim.orders[order["orderId"]]
+    assert stopped.status == "FILLED"
+    assert stopped.isWorking
+    assert sim.trades[-1]["price"] == "95.00000000"
+
+
+def test_stop_loss_limit_rests_as_limit_order_once_triggered():
+    sim = simulator()
+    order = sim.new_order(
+        {
+            "symbol": "BTCUSDT",
+            "side": "SELL",
+            "type": "STOP_LOSS_LIMIT",
+            "timeInForce": "GTC",
+            "quantity": "1",
+            "price": "98",
+            "stopPrice": "97",
+        }
+    )
+    sim.advance_to(2000)
+    working = sim.orders[order["orderId"]]
+    assert working.isWorking
+    assert working.status == "NEW"
+    assert order["orderId"] in sim.open_orders["BTCUSDT"]
+
+
+def test_stop_that_would_trigger_immediately_is_rejected():
+    sim = simulator()
+    with pytest.raises(ClientError) as error:
+        sim.new_order(
+            {"symbol": "BTCUSDT", "side": "SELL", "type": "TAKE_PROFIT", "quantity": "1", "stopPrice": "99"}
+        )
+    assert error.value.error_code == -2010
+
+
+def test_unknown_order_type_is_rejected():
+    sim = simulator()
+    with pytest.raises(ClientError) as error:
+        sim.new_order({"symbol": "BTCUSDT", "side": "SELL", "type": "TRAILING", "quantity": "1"})
+    assert error.value.error_code == -1116
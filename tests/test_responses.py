@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from binance_api import BinanceBase
+from spot import SpotMarket
+from utils.error import ClientError, ServerError
+from utils.transport import Response
+
+from fakes import FakeTransport
+
+
+class Client(BinanceBase, SpotMarket):
+    pass
+
+
+def call(status, body, **kwargs):
+    transport = FakeTransport(lambda method, url: Response(status, {}, body))
+
+    async def main():
+        return await Client(transport=transport, **kwargs).depth("BTCUSDT")
+
+    return asyncio.run(main())
+
+
+def test_api_error_is_a_client_error():
+    with pytest.raises(ClientError) as error:
+        call(400, b'{"code": -1121, "msg": "Invalid symbol."}')
+    assert (error.value.error_code, error.value.error_message) == (-1121, "Invalid symbol.")
+
+
+@pytest.mark.parametrize("body", [b'{"error": "blocked"}', b'["blocked"]', b'"blocked"', b"<html>blocked</html>"])
+def test_other_4xx_bodies_are_client_errors(body):
+    with pytest.raises(ClientError) as error:
+        call(403, body)
+    assert error.value.status_code == 403
+    assert error.value.error_code is None
+
+
+def test_5xx_is_a_server_error():
+    with pytest.raises(ServerError):
+        call(503, b"unavailable")
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson"])
+def test_typed_decode_falls_back_to_plain_json(codec):
+    pytest.importorskip(codec)
+    # a depth answer missing its asks does not fit the typed schema
+    data = call(200, b'{"lastUpdateId": 1, "bids": []}', codec=codec, typed_responses=True)
+    assert data == {"lastUpdateId": 1, "bids": []}
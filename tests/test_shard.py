@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from engine import ShardedClient
+from utils.error import ShardError
+
+from fakes import BrokenShardWorkerClient, ShardWorkerClient
+
+
+def other_symbol(sharded, symbol):
+    return next(s for s in ("B", "C", "D", "E", "F") if sharded.shard_of(s) != sharded.shard_of(symbol))
+
+
+def test_calls_are_routed_by_symbol_and_share_the_weight_budget():
+    async def main():
+        async with ShardedClient(ShardWorkerClient, workers=2) as sharded:
+            pids = {}
+            async for symbol, (_, interval, pid) in sharded.map("klines", ["A", "B", "C", "D"], "1m"):
+                assert interval == "1m"
+                pids[symbol] = pid
+            assert sharded.weight_limiter.used == 8
+            return sharded, pids
+
+    sharded, pids = asyncio.run(main())
+    for a in pids:
+        for b in pids:
+            assert (pids[a] == pids[b]) == (sharded.shard_of(a) == sharded.shard_of(b))
+
+
+def test_dead_worker_fails_its_calls():
+    async def main():
+        async with ShardedClient(ShardWorkerClient, workers=2) as sharded:
+            pending = sharded.submit("hang", "A")
+            with pytest.raises(ShardError, match="exited with code 3"):
+                await asyncio.wait_for(sharded.die("A"), 10)
+            with pytest.raises(ShardError):
+                await asyncio.wait_for(pending, 10)
+            with pytest.raises(ShardError):
+                sharded.submit("klines", "A", "1m")
+            # the other shard keeps serving
+            symbol = other_symbol(sharded, "A")
+            assert (await sharded.klines(symbol, "1m"))[0] == symbol
+
+    asyncio.run(main())
+
+
+def test_worker_that_cannot_start_fails_its_calls():
+    async def main():
+        async with ShardedClient(BrokenShardWorkerClient, workers=1) as sharded:
+            with pytest.raises(ShardError):
+                await asyncio.wait_for(sharded.klines("A", "1m"), 10)
+
+    asyncio.run(main())
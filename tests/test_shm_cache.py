@@ -0,0 +1,102 @@
+import asyncio
+import itertools
+import os
+from multiprocessing import resource_tracker
+
+import pytest
+
+from engine._shm_cache import MarketDataFeeder, SharedMarketData
+from utils.codec import BookTicker
+from utils.error import ParameterArgumentError, ParameterValueError
+
+_names = itertools.count()
+
+
+def unique_name():
+    return f"test_md_{os.getpid()}_{next(_names)}"
+
+
+def book(symbol, bid="100", ask="101"):
+    return {"symbol": symbol, "bidPrice": bid, "bidQty": "1", "askPrice": ask, "askQty": "2"}
+
+
+class TypedClient:
+    """typed_responses client: book_ticker returns BookTicker objects."""
+
+    def __init__(self):
+        self.depth_limits = []
+
+    async def book_ticker(self, symbol=None, symbols=None):
+        books = [BookTicker(**book(s, "1", "2")) for s in ([symbol] if symbol else symbols or ["BTCUSDT", "ETHUSDT"])]
+        return books[0] if symbol else books
+
+    async def depth(self, symbol, limit=100):
+        self.depth_limits.append(limit)
+        return {"lastUpdateId": 7, "bids": [["100", "1"]] * limit, "asks": [["101", "1"]] * limit}
+
+
+@pytest.fixture
+def feeder():
+    feeder = MarketDataFeeder(TypedClient(), ["BTCUSDT", "ETHUSDT"], levels=20, name=unique_name())
+    yield feeder
+    feeder.close()
+
+
+@pytest.fixture
+def market(feeder):
+    market = SharedMarketData(feeder.name, fallback=TypedClient())
+    # the reader unregistered the block from this process' resource tracker, which the feeder unlinks
+    resource_tracker.register(feeder.shm._name, "shared_memory")
+    yield market
+    market.close()
+
+
+def test_books_and_depth_round_trip(feeder, market):
+    async def main():
+        assert await feeder.refresh_books() == 2
+        assert await feeder.refresh_depth() == 2
+        return await market.book_ticker("ETHUSDT"), await market.depth("BTCUSDT", limit=10)
+
+    ticker, depth = asyncio.run(main())
+    assert ticker["bidPrice"] == "1.00000000"
+    assert feeder.client.depth_limits == [20, 20]
+    assert depth["lastUpdateId"] == 7 and len(depth["bids"]) == 10
+
+
+def test_typed_fallback_books_are_merged(feeder, market):
+    feeder.write_book("BTCUSDT", book("BTCUSDT"))
+
+    books = asyncio.run(market.book_ticker(symbols=["BTCUSDT", "ETHUSDT"]))
+    assert books[0]["bidPrice"] == "100.00000000"
+    assert isinstance(books[1], BookTicker) and books[1].symbol == "ETHUSDT"
+
+
+@pytest.mark.parametrize("levels", [0, 5001])
+def test_levels_beyond_the_depth_limits_are_rejected(levels):
+    with pytest.raises(ParameterValueError):
+        MarketDataFeeder(TypedClient(), ["BTCUSDT"], levels=levels, name=unique_name())
+
+
+def test_read_retries_while_the_slot_is_written(feeder, market):
+    feeder.write_book("BTCUSDT", book("BTCUSDT"))
+    slot = feeder.index["BTCUSDT"]
+
+    async def main():
+        # the feeder is halfway through a write that finishes a little later
+        feeder._layout.seq[slot] += 1
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.005, feeder.write_book, "BTCUSDT", book("BTCUSDT", bid="99"))
+        loop.call_later(0.005, feeder._layout.seq.__setitem__, slot, feeder._layout.seq[slot] + 1)
+        return await market.read_async("BTCUSDT")
+
+    record = asyncio.run(main())
+    assert record["bid_price"] == 99
+    assert feeder._layout.seq[slot] % 2 == 0
+
+
+def test_read_of_a_stuck_slot_gives_up(feeder, market):
+    feeder._layout.seq[feeder.index["BTCUSDT"]] += 1
+    with pytest.raises(ParameterArgumentError):
+        market.read("BTCUSDT", timeout=0.01)
+    with pytest.raises(ParameterArgumentError):
+        asyncio.run(market.read_async("BTCUSDT", timeout=0.01))
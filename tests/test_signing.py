@@ -0,0 +1,57 @@
+import asyncio
+from urllib.parse import parse_qs, urlsplit
+
+from binance_api import BinanceBase
+from spot import SpotOrder
+
+
+class Client(BinanceBase, SpotOrder):
+    pass
+
+
+class SlowLimiter:
+    """Weight limiter that makes every request wait, moving the client's clock meanwhile."""
+
+    def __init__(self, client: "Client") -> None:
+        self.client = client
+        self.acquired = 0
+
+    async def acquire(self, amount: int = 1) -> None:
+        await asyncio.sleep(0.01)
+        self.client.clock += 1000
+        self.acquired += 1
+
+    def update(self, headers) -> None:
+        pass
+
+
+def query(url: str) -> dict:
+    return {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+
+
+def test_timestamp_and_signature_are_made_after_the_limiter_wait(transport):
+    async def main():
+        client = Client("key", "secret", transport=transport)
+        client.clock = 1_000_000
+        client.get_timestamp = lambda: client.clock
+        client.weight_limiter = SlowLimiter(client)
+        await client.get_orders("BTCUSDT")
+        return client
+
+    client = asyncio.run(main())
+    assert client.weight_limiter.acquired == 1
+    params = query(transport.requests[0][1])
+    assert params["timestamp"] == "1001000"
+    assert "signature" in params
+
+
+def test_deadline_recv_window_is_what_is_left_after_the_wait(transport):
+    async def main():
+        client = Client("key", "secret", transport=transport)
+        client.clock = 0
+        client.weight_limiter = SlowLimiter(client)
+        await client.get_orders("BTCUSDT", deadline=1.0)
+
+    asyncio.run(main())
+    recv_window = int(query(transport.requests[0][1])["recvWindow"])
+    assert 0 < recv_window < 1000
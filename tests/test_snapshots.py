@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import numpy as np
+
+from engine._snapshots import DAY_MS, SnapshotHistory
+
+TODAY = int(time.time() * 1000) // DAY_MS
+
+
+class Account:
+    """account_snapshot with a snapshot for every day except `gaps`; BTC grows by one a day."""
+
+    def __init__(self, gaps=()):
+        self.gaps = set(gaps)
+        self.calls = []
+
+    async def account_snapshot(self, type, startTime, endTime, limit):
+        first, last = startTime // DAY_MS, endTime // DAY_MS
+        self.calls.append((first, last))
+        assert last - first < limit
+        return {
+            "snapshotVos": [
+                {
+                    "updateTime": day * DAY_MS + 1000,
+                    "data": {
+                        "totalAssetOfBtc": str(day),
+                        "balances": [{"asset": "BTC", "free": str(day), "locked": "1"}],
+                    },
+                }
+                for day in range(first, last + 1)
+                if day not in self.gaps
+            ]
+        }
+
+
+def test_windows_cover_days_with_few_requests():
+    assert SnapshotHistory.windows([]) == []
+    assert SnapshotHistory.windows(list(range(60))) == [(0, 29), (30, 59)]
+    assert SnapshotHistory.windows([40, 0, 5, 29, 30]) == [(0, 29), (30, 40)]
+    assert SnapshotHistory.windows([0, 45, 46]) == [(0, 0), (45, 46)]
+
+
+def test_missing_days_skip_stored_and_empty_days():
+    history = SnapshotHistory(None)
+    history.add([{"updateTime": 3 * DAY_MS, "data": {"balances": []}}])
+    history.empty_days.add(5)
+    assert history.missing_days(1, 6) == [1, 2, 4, 6]
+
+
+def test_sync_asks_only_for_missing_days(tmp_path):
+    start = TODAY - 100
+    account = Account(gaps={start + 10})
+    path = str(tmp_path / "snapshots.npz")
+    history = SnapshotHistory(account, path)
+
+    assert asyncio.run(history.sync(start * DAY_MS, (start + 44) * DAY_MS)) == 2
+    assert account.calls == [(start, start + 29), (start + 30, start + 44)]
+    assert len(history.days) == 44
+    assert history.empty_days == {start + 10}
+
+    # stored days and the old gap are not asked for again
+    assert asyncio.run(history.sync(start * DAY_MS, (start + 50) * DAY_MS)) == 1
+    assert account.calls[-1] == (start + 45, start + 50)
+
+    loaded = SnapshotHistory(account, path)
+    assert np.array_equal(loaded.days, history.days)
+    assert loaded.empty_days == {start + 10}
+    days, btc = loaded.series("BTC", start=(start + 1) * DAY_MS, end=(start + 3) * DAY_MS)
+    assert days.tolist() == [(start + d) * DAY_MS for d in (1, 2, 3)]
+    assert btc.tolist() == [start + d + 1.0 for d in (1, 2, 3)]
+    assert loaded.change(start * DAY_MS, (start + 50) * DAY_MS) == {"BTC": 50.0}
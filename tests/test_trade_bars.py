@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from engine._trade_bars import agg_trade_pages
+
+
+class AggTrades:
+    """aggTrades of one symbol: ids 0..count-1, one per millisecond from 1000. Pages
+    from `slow_from` take a minute, the page at `fail_at` raises."""
+
+    def __init__(self, count, slow_from=None, fail_at=None):
+        self.count = count
+        self.slow_from = slow_from
+        self.fail_at = fail_at
+        self.started = []
+        self.cancelled = []
+
+    async def agg_trades(self, symbol, fromId=None, startTime=None, limit=500):
+        start = fromId if fromId is not None else max(startTime - 1000, 0)
+        self.started.append(start)
+        try:
+            if self.slow_from is not None and start >= self.slow_from:
+                await asyncio.sleep(60)
+            else:
+                # later pages answer first
+                await asyncio.sleep(0.001 * (10 - len(self.started) % 10))
+        except asyncio.CancelledError:
+            self.cancelled.append(start)
+            raise
+        if start == self.fail_at:
+            raise ConnectionError("page %d" % start)
+        return [{"a": i, "T": 1000 + i} for i in range(start, min(start + limit, self.count))]
+
+
+async def collect(pages):
+    return [trade["a"] async for page in pages for trade in page]
+
+
+def test_pages_are_yielded_in_order():
+    client = AggTrades(2350)
+    ids = asyncio.run(collect(agg_trade_pages(client, "BTCUSDT", start_time=1000, limit=100, concurrency=4)))
+    assert ids == list(range(2350))
+
+
+def test_end_time_stops_the_iteration():
+    client = AggTrades(2350)
+    ids = asyncio.run(collect(agg_trade_pages(client, "BTCUSDT", from_id=0, end_time=1000 + 249, limit=100)))
+    assert ids == list(range(250))
+
+
+def test_closing_early_cancels_prefetched_pages():
+    client = AggTrades(10000, slow_from=100)
+
+    async def main():
+        pages = agg_trade_pages(client, "BTCUSDT", from_id=0, limit=100, concurrency=4)
+        async for page in pages:
+            break
+        await pages.aclose()
+        await asyncio.sleep(0)
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(main()) == set()
+    assert sorted(client.cancelled) == [100, 200, 300]
+
+
+def test_failed_page_cancels_prefetched_pages():
+    client = AggTrades(10000, slow_from=200, fail_at=100)
+
+    async def main():
+        with pytest.raises(ConnectionError):
+            await collect(agg_trade_pages(client, "BTCUSDT", from_id=0, limit=100, concurrency=4))
+        await asyncio.sleep(0)
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(main()) == set()
+    assert sorted(client.cancelled) == [200, 300]
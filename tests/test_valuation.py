@@ -0,0 +1,80 @@
+import asyncio
+import math
+
+import pytest
+
+from engine._valuation import PortfolioValuation
+from utils.error import ParameterValueError
+
+PAIRS = [
+    ("BTCUSDT", "BTC", "USDT"),
+    ("BNBUSDT", "BNB", "USDT"),
+    ("ETHBTC", "ETH", "BTC"),
+    ("ADABNB", "ADA", "BNB"),
+    ("ADABTC", "ADA", "BTC"),
+    ("USDTTRY", "USDT", "TRY"),
+    ("XYZABC", "XYZ", "ABC"),
+]
+PRICES = {"BTCUSDT": 60000, "BNBUSDT": 500, "ETHBTC": 0.05, "ADABNB": 0.001, "ADABTC": 0.00001, "USDTTRY": 40}
+
+
+class Account:
+    def __init__(self):
+        self.ticker_calls = []
+
+    async def exchange_info(self):
+        return {"symbols": [{"symbol": s, "baseAsset": b, "quoteAsset": q, "status": "TRADING"} for s, b, q in PAIRS]}
+
+    async def account(self):
+        balances = {"USDT": 100, "BTC": 0.5, "ETH": 2, "TRY": 400, "XYZ": 7}
+        return {"balances": [{"asset": a, "free": str(v), "locked": "0"} for a, v in balances.items()]}
+
+    async def ticker_price(self, symbols=None):
+        self.ticker_calls.append(symbols)
+        return [{"symbol": s, "price": str(p)} for s, p in PRICES.items() if symbols is None or s in symbols]
+
+
+def test_unknown_wallets_are_rejected():
+    with pytest.raises(ParameterValueError):
+        PortfolioValuation(Account(), wallets=("spot", "margin"))
+
+
+def test_chains_prefer_short_routes_through_bridges():
+    valuation = PortfolioValuation(Account())
+    asyncio.run(valuation.load_graph())
+
+    assert valuation.chain("USDT") == []
+    assert valuation.chain("BTC") == [("BTCUSDT", False)]
+    assert valuation.chain("ETH") == [("ETHBTC", False), ("BTCUSDT", False)]
+    # BTC ranks before BNB among the bridges
+    assert valuation.chain("ADA") == [("ADABTC", False), ("BTCUSDT", False)]
+    # TRY is the quote asset of USDTTRY
+    assert valuation.chain("TRY") == [("USDTTRY", True)]
+    assert valuation.chain("XYZ") == []
+
+
+def test_values_multiply_along_chains_and_divide_inverse_hops():
+    client = Account()
+    valuation = PortfolioValuation(client)
+    total = asyncio.run(valuation.refresh())
+
+    prices = dict(zip(valuation.assets, valuation.asset_prices()))
+    assert prices["USDT"] == 1
+    assert prices["ETH"] == pytest.approx(3000)
+    assert prices["TRY"] == pytest.approx(1 / 40)
+    assert math.isnan(prices["XYZ"])
+    assert total == pytest.approx(100 + 0.5 * 60000 + 2 * 3000 + 400 / 40)
+    assert valuation.unpriced() == ["XYZ"]
+    assert [row["asset"] for row in valuation.table()] == ["BTC", "ETH", "USDT", "TRY", "XYZ"]
+    assert client.ticker_calls == [valuation.symbols]
+
+
+def test_stream_updates_change_single_cells():
+    valuation = PortfolioValuation(Account())
+    asyncio.run(valuation.refresh())
+
+    valuation.on_ticker([{"s": "ETHBTC", "c": "0.1"}])
+    valuation.on_account_position({"B": [{"a": "ETH", "f": "1", "l": "0"}]})
+    row = next(row for row in valuation.table() if row["asset"] == "ETH")
+    assert row["price"] == pytest.approx(6000)
+    assert row["value"] == pytest.approx(6000)
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import threading
+import time
+
+from engine._wallet_cache import WalletMetadata
+
+FEES = [{"symbol": "BTCUSDT", "makerCommission": "0.001", "takerCommission": "0.002"}]
+
+
+class FeeClient:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    async def trade_fee(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("down")
+        return FEES
+
+
+def expired(client, **kwargs):
+    metadata = WalletMetadata(client, ttls={"trade_fee": 100}, **kwargs)
+    metadata._set("trade_fee", FEES, time.time() - 100)
+    return metadata
+
+
+def rewind(metadata, seconds):
+    failed_at, failures = metadata._failures["trade_fee"]
+    metadata._failures["trade_fee"] = (failed_at - seconds, failures)
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_failed_background_refresh_backs_off():
+    client = FeeClient(fail=True)
+    metadata = expired(client, refresh_ahead=0.2)
+
+    async def main():
+        assert metadata.fee("BTCUSDT") == {"maker": 0.001, "taker": 0.002}
+        await settle()
+        for _ in range(5):
+            metadata.fee("BTCUSDT")
+            await settle()
+        assert client.calls == 1
+
+        # first retry after refresh_ahead of the ttl
+        rewind(metadata, 20)
+        metadata.fee("BTCUSDT")
+        await settle()
+        assert client.calls == 2
+
+        # then twice as long
+        rewind(metadata, 30)
+        metadata.fee("BTCUSDT")
+        await settle()
+        assert client.calls == 2
+        rewind(metadata, 10)
+        metadata.fee("BTCUSDT")
+        await settle()
+        assert client.calls == 3
+
+        client.fail = False
+        rewind(metadata, 100)
+        metadata.fee("BTCUSDT")
+        await settle()
+        assert client.calls == 4
+        assert "trade_fee" not in metadata._failures
+        assert metadata.age("trade_fee") < 1
+
+    asyncio.run(main())
+
+
+def test_refresh_is_saved_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "wallet.json")
+    metadata = expired(FeeClient(), path=path)
+    writers = []
+    write = metadata._write
+
+    def recording_write(saved):
+        writers.append(threading.get_ident())
+        write(saved)
+
+    metadata._write = recording_write
+    asyncio.run(metadata.refresh("trade_fee"))
+
+    assert writers and writers[0] != threading.get_ident()
+    with open(path) as f:
+        assert json.load(f)["trade_fee"]["data"] == FEES
+    assert WalletMetadata(FeeClient(), path=path).fee("BTCUSDT")["taker"] == 0.002
@@ -0,0 +1,37 @@
+import pytest
+
+from utils.weights import request_weight
+
+
+@pytest.mark.parametrize(
+    "method, path, params, weight",
+    [
+        ("GET", "/api/v3/exchangeInfo", None, 20),
+        ("GET", "/api/v3/account", None, 20),
+        ("GET", "/api/v3/allOrders", {"symbol": "BTCUSDT"}, 20),
+        ("GET", "/api/v3/myTrades", {"symbol": "BTCUSDT"}, 20),
+        ("GET", "/api/v3/myTrades", {"symbol": "BTCUSDT", "orderId": 1}, 5),
+        ("GET", "/api/v3/openOrderList", None, 6),
+        ("GET", "/api/v3/openOrders", {"symbol": "BTCUSDT"}, 6),
+        ("GET", "/api/v3/openOrders", None, 80),
+        ("DELETE", "/api/v3/openOrders", {"symbol": "BTCUSDT"}, 1),
+        ("GET", "/api/v3/order", {"symbol": "BTCUSDT", "orderId": 1}, 4),
+        ("POST", "/api/v3/order", {"symbol": "BTCUSDT"}, 1),
+        ("DELETE", "/api/v3/order", {"symbol": "BTCUSDT"}, 1),
+        ("GET", "/api/v3/ticker/price", {"symbol": "BTCUSDT"}, 2),
+        ("GET", "/api/v3/ticker/price", {"symbols": ["BTCUSDT", "ETHUSDT"]}, 4),
+        ("GET", "/api/v3/ticker/price", None, 4),
+        ("GET", "/api/v3/ticker/bookTicker", None, 4),
+        ("GET", "/api/v3/depth", {"limit": 100}, 5),
+        ("GET", "/api/v3/depth", {"limit": 5000}, 250),
+        ("GET", "/api/v3/ticker/24hr", {"symbol": "BTCUSDT"}, 2),
+        ("GET", "/api/v3/ticker/24hr", {"symbols": ["S%d" % i for i in range(50)]}, 40),
+        ("GET", "/api/v3/ticker/24hr", None, 80),
+        ("GET", "/api/v3/ticker", {"symbols": ["S%d" % i for i in range(10)]}, 40),
+        ("GET", "/api/v3/ticker", {"symbols": ["S%d" % i for i in range(100)]}, 200),
+        ("GET", "/api/v3/klines", {"symbol": "BTCUSDT"}, 2),
+        ("GET", "/api/v3/trades", {"symbol": "BTCUSDT"}, 25),
+    ],
+)
+def test_request_weight(method, path, params, weight):
+    assert request_weight(method, path, params) == weight
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+from utils.concurrency import is_overload
+from utils.error import CircuitOpenError, DeadlineExceededError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_failure(error: Optional[BaseException]) -> bool:
+    """Outcomes that count against an endpoint: overload, timeouts and broken connections.
+
+    Ordinary 4xx answers (bad parameters, unknown order) mean the endpoint works.
+    """
+
+    return is_overload(error) or isinstance(error, (aiohttp.ClientConnectionError, ConnectionError))
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker of one endpoint.
+
+    Closed: the outcome of the last `window` calls is kept; once at least `min_calls`
+    are in and the share of failures reaches `failure_rate`, or the share of calls
+    slower than `slow_call` seconds reaches `slow_rate`, the breaker opens.
+    Open: `allow` raises CircuitOpenError at once for `open_for` seconds.
+    Half-open: up to `half_open_calls` trial calls go through; all of them succeeding
+    closes the breaker, any failure opens it again. Trials that never report back for
+    `open_for` seconds are given back.
+
+    `check` before waiting on limiters fails fast without using a trial; `allow` right
+    before the call takes one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call: float = 5.0,
+        slow_rate: float = 0.8,
+        open_for: float = 10.0,
+        half_open_calls: int = 3,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.open_for = open_for
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        # (failed, slow) of recent calls
+        self._outcomes: deque = deque(maxlen=window)
+        self._trials = 0
+        self._trial_successes = 0
+        # last trial taken or reported while half-open
+        self._trial_at = 0.0
+
+    def __repr__(self) -> str:
+        return f"CircuitBreaker({self.name!r}, state={self.state})"
+
+    def _update_state(self, now: float) -> None:
+        if self.state == OPEN and now - self.opened_at >= self.open_for:
+            self.half_open()
+        elif self.stalled(now):
+            self.half_open()
+
+    def stalled(self, now: Optional[float] = None) -> bool:
+        """Half-open with every trial out and none of them heard of for open_for seconds."""
+
+        now = time.monotonic() if now is None else now
+        return (
+            self.state == HALF_OPEN
+            and self._trials >= self.half_open_calls
+            and now - self._trial_at >= self.open_for
+        )
+
+    def open(self, now: Optional[float] = None) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic() if now is None else now
+        self._outcomes.clear()
+
+    def half_open(self) -> None:
+        self.state = HALF_OPEN
+        self._trials = 0
+        self._trial_successes = 0
+        self._trial_at = time.monotonic()
+
+    def close(self) -> None:
+        self.state = CLOSED
+        self._outcomes.clear()
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a call could go out now, without taking a trial."""
+
+        now = time.monotonic()
+        self._update_state(now)
+        if self.state == CLOSED:
+            return
+        if self.state == HALF_OPEN and self._trials < self.half_open_calls:
+            return
+        retry_after = max(self.opened_at + self.open_for - now, 0.0) if self.state == OPEN else 0.0
+        raise CircuitOpenError(self.name, retry_after)
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go out now; every allowed call must
+        be followed by `record`."""
+
+        self.check()
+        if self.state == HALF_OPEN:
+            self._trials += 1
+            self._trial_at = time.monotonic()
+
+    def record(self, elapsed: float, error: Optional[BaseException] = None) -> None:
+        if self.state == HALF_OPEN:
+            self._trial_at = time.monotonic()
+        if isinstance(error, (asyncio.CancelledError, DeadlineExceededError)):
+            # says nothing about the endpoint (our caller gave up), just give the trial back
+            if self.state == HALF_OPEN:
+                self._trials = max(self._trials - 1, 0)
+            return
+        failed = is_failure(error)
+        slow = elapsed >= self.slow_call
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self.open()
+                return
+            self._trial_successes += 1
+            if self._trial_successes >= self.half_open_calls:
+                self.close()
+            return
+        if self.state == OPEN:
+            return
+        self._outcomes.append((failed, slow))
+        count = len(self._outcomes)
+        if count < self.min_calls:
+            return
+        failures = sum(1 for f, _ in self._outcomes if f)
+        slows = sum(1 for _, s in self._outcomes if s)
+        if failures / count >= self.failure_rate or slows / count >= self.slow_rate:
+            self.open()
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per endpoint (method and path), created on first use.
+
+    `probe` is an async health check such as SpotWallet.system_status: `monitor` runs
+    it periodically, opens every breaker while it reports maintenance or fails, and
+    moves open breakers to half-open as soon as it is healthy again instead of waiting
+    out `open_for`; stalled half-open breakers get their trials back.
+
+    breakers = CircuitBreakers(open_for=30)
+    client = Spot(api_key, api_secret, timeout=3, breakers=breakers)
+    breakers.probe = client.system_status
+    asyncio.create_task(breakers.monitor(10))
+    """
+
+    def __init__(self, probe: Optional[Callable[[], Awaitable[Any]]] = None, **breaker_kwargs: Any) -> None:
+        self.probe = probe
+        self.breaker_kwargs = breaker_kwargs
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.healthy = True
+
+    def breaker(self, http_method: str, url_path: str) -> CircuitBreaker:
+        name = http_method + " " + url_path
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = self.breakers[name] = CircuitBreaker(name, **self.breaker_kwargs)
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        return {name: breaker.state for name, breaker in self.breakers.items()}
+
+    async def check_health(self) -> bool:
+        try:
+            status = await self.probe()
+            healthy = status.get("status", 0) == 0
+        except Exception:
+            healthy = False
+        self.healthy = healthy
+        for name, breaker in self.breakers.items():
+            if name.endswith("/system/status"):
+                continue
+            if not healthy and breaker.state != OPEN:
+                breaker.open()
+            elif healthy and (breaker.state == OPEN or breaker.stalled()):
+                breaker.half_open()
+        return healthy
+
+    async def monitor(self, interval: float = 10.0) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(interval)
@@ -0,0 +1,197 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from utils.error import ParameterValueError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class SchemaError(ValueError):
+    """Valid JSON that does not fit the typed schema it was decoded with."""
+
+
+@dataclass
+class DepthSnapshot:
+    __slots__ = ("lastUpdateId", "bids", "asks")
+    lastUpdateId: int
+    bids: List[Tuple[str, str]]
+    asks: List[Tuple[str, str]]
+
+
+@dataclass
+class BookTicker:
+    __slots__ = ("symbol", "bidPrice", "bidQty", "askPrice", "askQty")
+    symbol: str
+    bidPrice: str
+    bidQty: str
+    askPrice: str
+    askQty: str
+
+
+class Kline(NamedTuple):
+    open_time: int
+    open: str
+    high: str
+    low: str
+    close: str
+    volume: str
+    close_time: int
+    quote_volume: str
+    trades: int
+    taker_buy_base_volume: str
+    taker_buy_quote_volume: str
+    ignore: str
+
+
+def _depth_from_obj(data: Dict[str, Any]) -> DepthSnapshot:
+    return DepthSnapshot(data["lastUpdateId"], data["bids"], data["asks"])
+
+
+def _book_ticker_from_obj(data: Any) -> Union[BookTicker, List[BookTicker]]:
+    if isinstance(data, list):
+        return [BookTicker(d["symbol"], d["bidPrice"], d["bidQty"], d["askPrice"], d["askQty"]) for d in data]
+    return BookTicker(data["symbol"], data["bidPrice"], data["bidQty"], data["askPrice"], data["askQty"])
+
+
+def _klines_from_obj(data: List[list]) -> List[Kline]:
+    return [Kline(*row) for row in data]
+
+
+# schema name -> (type used by msgspec typed decoding, converter from generic decoded JSON)
+SCHEMAS: Dict[str, Tuple[Any, Callable[[Any], Any]]] = {
+    "depth": (DepthSnapshot, _depth_from_obj),
+    "book_ticker": (Union[List[BookTicker], BookTicker], _book_ticker_from_obj),
+    "klines": (List[Kline], _klines_from_obj),
+}
+
+
+class JsonCodec:
+    """Decodes response bodies straight from bytes.
+
+    `decode(data, schema)` returns plain JSON values when schema is None, or the typed
+    objects registered in SCHEMAS. Every backend raises ValueError on malformed input
+    and SchemaError when well formed JSON does not fit the schema.
+    """
+
+    name = "json"
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
+    def decode(self, data: bytes, schema: Optional[str] = None) -> Any:
+        obj = self.loads(data)
+        if schema is None:
+            return obj
+        try:
+            return SCHEMAS[schema][1](obj)
+        except (KeyError, IndexError, TypeError) as e:
+            raise SchemaError(f"{schema}: {e!r}") from e
+
+
+class UjsonCodec(JsonCodec):
+    name = "ujson"
+
+    def loads(self, data: bytes) -> Any:
+        return ujson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return ujson.dumps(obj)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+
+class MsgspecCodec(JsonCodec):
+    """Generic decoding through msgspec; schema decoding builds the typed objects
+    directly from the bytes, no intermediate dicts or lists are created.
+    """
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+        self._typed = {name: msgspec.json.Decoder(spec[0]) for name, spec in SCHEMAS.items()}
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def dumps(self, obj: Any) -> str:
+        return self._encoder.encode(obj).decode()
+
+    def decode(self, data: bytes, schema: Optional[str] = None) -> Any:
+        decoder = self._decoder if schema is None else self._typed[schema]
+        try:
+            return decoder.decode(data)
+        except msgspec.ValidationError as e:
+            raise SchemaError(f"{schema}: {e}") from e
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+class HybridCodec(OrjsonCodec):
+    """orjson for generic documents, msgspec for schema decoding."""
+
+    name = "orjson+msgspec"
+
+    def __init__(self) -> None:
+        self._typed = MsgspecCodec()
+
+    def decode(self, data: bytes, schema: Optional[str] = None) -> Any:
+        if schema is None:
+            return orjson.loads(data)
+        return self._typed.decode(data, schema)
+
+
+CODECS: Dict[str, Callable[[], JsonCodec]] = {"json": JsonCodec}
+if ujson is not None:
+    CODECS["ujson"] = UjsonCodec
+if msgspec is not None:
+    CODECS["msgspec"] = MsgspecCodec
+if orjson is not None:
+    CODECS["orjson"] = OrjsonCodec
+if orjson is not None and msgspec is not None:
+    CODECS["orjson+msgspec"] = HybridCodec
+
+# fastest first
+PREFERENCE = ("orjson+msgspec", "orjson", "msgspec", "ujson", "json")
+
+
+def get_codec(codec: Union[str, JsonCodec, None] = None) -> JsonCodec:
+    """Return a codec instance by name, or the fastest installed one when codec is None."""
+
+    if isinstance(codec, JsonCodec):
+        return codec
+    if codec is None:
+        codec = next(name for name in PREFERENCE if name in CODECS)
+    try:
+        return CODECS[codec]()
+    except KeyError:
+        raise ParameterValueError([codec])
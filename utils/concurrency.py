@@ -0,0 +1,190 @@
+import asyncio
+import math
+import time
+from typing import Any, Dict, Optional, Union
+
+from utils import deadline
+from utils.error import ClientError, DeadlineExceededError, ParameterValueError, ServerError
+from utils.weights import ORDER_PATHS
+
+ENDPOINT_CLASSES = ("market", "signed", "order")
+
+# ip banned / too many requests
+OVERLOAD_STATUS = (418, 429)
+OVERLOAD_CODES = (-1003,)
+
+
+def is_overload(error: Optional[BaseException]) -> bool:
+    """Whether an error means the server wants less traffic: 418/429, -1003, 5xx or a timeout."""
+
+    if error is None:
+        return False
+    if isinstance(error, ClientError):
+        return error.status_code in OVERLOAD_STATUS or error.error_code in OVERLOAD_CODES
+    return isinstance(error, (ServerError, asyncio.TimeoutError))
+
+
+def endpoint_class(http_method: str, url_path: str, signed: bool = False) -> str:
+    if (http_method, url_path) in ORDER_PATHS or (http_method == "DELETE" and url_path.startswith("/api/v3/order")):
+        return "order"
+    if signed:
+        return "signed"
+    return "market"
+
+
+class ConcurrencyPolicy:
+    """Tuning of one adaptive limit.
+
+    algorithm "aimd": +1 request per round trip while healthy, limit * backoff on overload.
+    algorithm "gradient": limit follows long_rtt / short_rtt, so it shrinks as latency
+    rises above the baseline before errors appear, and grows by sqrt(limit) when it is flat.
+    Both stop growing while the weight headroom (remaining / limit of the weight limiter)
+    is below `headroom`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        algorithm: str = "gradient",
+        backoff: float = 0.5,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        long_window: int = 500,
+        headroom: float = 0.1,
+    ) -> None:
+        if algorithm not in ("aimd", "gradient"):
+            raise ParameterValueError([algorithm])
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.algorithm = algorithm
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.long_window = long_window
+        self.headroom = headroom
+
+
+class AdaptiveLimit:
+    """Number of requests allowed in flight, adjusted from each completed request."""
+
+    def __init__(self, policy: Optional[ConcurrencyPolicy] = None) -> None:
+        self.policy = policy or ConcurrencyPolicy()
+        self.limit = float(self.policy.initial)
+        self.in_flight = 0
+        self.short_rtt: Optional[float] = None
+        self.long_rtt: Optional[float] = None
+        self._cond = asyncio.Condition()
+
+    def __repr__(self) -> str:
+        return f"AdaptiveLimit(limit={self.limit:.1f}, in_flight={self.in_flight})"
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            ready = lambda: self.in_flight < max(int(self.limit), 1)
+            left = deadline.remaining()
+            if left is None or ready():
+                await self._cond.wait_for(ready)
+            else:
+                try:
+                    await asyncio.wait_for(self._cond.wait_for(ready), max(left, 0))
+                except asyncio.TimeoutError:
+                    raise DeadlineExceededError("concurrency", -deadline.remaining()) from None
+            self.in_flight += 1
+
+    async def release(self, rtt: Optional[float], overloaded: bool = False, headroom: Optional[float] = None) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self.sample(rtt, overloaded, headroom)
+            self._cond.notify_all()
+
+    def sample(self, rtt: Optional[float], overloaded: bool = False, headroom: Optional[float] = None) -> None:
+        policy = self.policy
+        if overloaded:
+            self.limit = max(self.limit * policy.backoff, policy.minimum)
+            return
+        if rtt is None:
+            return
+        if self.short_rtt is None:
+            self.short_rtt = self.long_rtt = rtt
+        else:
+            self.short_rtt += policy.smoothing * (rtt - self.short_rtt)
+            self.long_rtt += (rtt - self.long_rtt) / policy.long_window
+        can_grow = headroom is None or headroom >= policy.headroom
+
+        if policy.algorithm == "aimd":
+            if can_grow:
+                self.limit += 1.0 / self.limit
+        else:
+            gradient = max(0.5, min(1.0, policy.tolerance * self.long_rtt / self.short_rtt))
+            target = self.limit * gradient + (math.sqrt(self.limit) if can_grow else 0.0)
+            if not can_grow:
+                target = min(target, self.limit)
+            self.limit += policy.smoothing * (target - self.limit)
+            if self.long_rtt > self.short_rtt:
+                # let the baseline recover quickly after a latency spike
+                self.long_rtt = self.short_rtt
+        self.limit = min(max(self.limit, policy.minimum), policy.maximum)
+
+
+class _Slot:
+    __slots__ = ("limit", "weight_limiter", "_start")
+
+    def __init__(self, limit: AdaptiveLimit, weight_limiter: Any = None) -> None:
+        self.limit = limit
+        self.weight_limiter = weight_limiter
+
+    async def __aenter__(self) -> AdaptiveLimit:
+        await self.limit.acquire()
+        self._start = time.monotonic()
+        return self.limit
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        rtt = time.monotonic() - self._start
+        # errors other than overload still measure a round trip, cancellation does not
+        if isinstance(exc_value, asyncio.CancelledError):
+            rtt = None
+        headroom = None
+        if self.weight_limiter is not None:
+            headroom = self.weight_limiter.remaining / self.weight_limiter.limit
+        await self.limit.release(rtt, is_overload(exc_value), headroom)
+
+
+class AdaptiveConcurrency:
+    """Adaptive in-flight limits per endpoint class (market, signed, order).
+
+    Give it to a client as `concurrency=` and every request waits for a slot of its
+    class; the round trip time and the outcome then move that class' limit, so the
+    client backs off when Binance slows down or answers 429/-1003/5xx and ramps up
+    again when it recovers.
+
+    concurrency = AdaptiveConcurrency({"order": ConcurrencyPolicy(initial=4, algorithm="aimd")})
+    client = Spot(api_key, api_secret, concurrency=concurrency, weight_limiter=WeightLimiter())
+    """
+
+    def __init__(self, policies: Union[ConcurrencyPolicy, Dict[str, ConcurrencyPolicy], None] = None) -> None:
+        if not isinstance(policies, dict):
+            policies = {name: policies for name in ENDPOINT_CLASSES}
+        for name in policies:
+            if name not in ENDPOINT_CLASSES:
+                raise ParameterValueError([name])
+        self.limits = {name: AdaptiveLimit(policies.get(name)) for name in ENDPOINT_CLASSES}
+
+    def __getitem__(self, name: str) -> AdaptiveLimit:
+        return self.limits[name]
+
+    def slot(self, name: str, weight_limiter: Any = None) -> _Slot:
+        """Async context manager holding one in-flight slot of an endpoint class.
+
+        With a weight_limiter the remaining weight is taken into account when growing.
+        """
+
+        return _Slot(self.limits[name], weight_limiter)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"limit": limit.limit, "in_flight": limit.in_flight, "rtt": limit.short_rtt}
+            for name, limit in self.limits.items()
+        }
@@ -0,0 +1,50 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from utils.error import DeadlineExceededError
+
+# absolute time.monotonic() the current call has to finish by
+_deadline: ContextVar[Optional[float]] = ContextVar("binance_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """Bound everything inside, including tasks it starts, to finish within seconds.
+
+    Nested deadlines can only shorten the outer one. None leaves the current one as is.
+
+    with deadline(0.5):
+        await client.new_order("BTCUSDT", "BUY", "LIMIT", ...)
+    """
+
+    if seconds is None:
+        yield remaining()
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None and current < at:
+        at = current
+    token = _deadline.set(at)
+    try:
+        yield at - time.monotonic()
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline, None without one."""
+
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
+
+
+def check(phase: str, needed: float = 0.0) -> None:
+    """Raise DeadlineExceededError if less than needed seconds are left."""
+
+    left = remaining()
+    if left is not None and left <= needed:
+        raise DeadlineExceededError(phase, needed - left)
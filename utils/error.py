@@ -60,3 +60,32 @@ class WebsocketClientError(Error):
 
     def __str__(self):
         return self.error_message
+
+
+class ShardError(Error):
+    def __init__(self, error_message):
+        self.error_message = error_message
+
+    def __str__(self):
+        return self.error_message
+
+
+class CircuitOpenError(Error):
+    def __init__(self, endpoint, retry_after):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        self.error_message = f"circuit for {endpoint} is open, retry in {retry_after:.1f}s"
+
+    def __str__(self):
+        return self.error_message
+
+
+# phase is one of sign, rate_limit, concurrency, http; after http an order may still have reached the exchange
+class DeadlineExceededError(Error):
+    def __init__(self, phase, overshoot):
+        self.phase = phase
+        self.overshoot = overshoot
+        self.error_message = f"deadline exceeded in {phase} phase by {overshoot:.3f}s"
+
+    def __str__(self):
+        return self.error_message
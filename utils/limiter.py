@@ -0,0 +1,166 @@
+import asyncio
+import multiprocessing
+import time
+from typing import Any, Optional
+
+from utils import deadline
+
+
+class RateLimiter:
+    """Counter over fixed windows aligned to UTC, the way Binance counts request
+    weight and orders. `acquire` waits for the next window when the budget is spent,
+    `update` syncs the local count with the usage reported in the response headers.
+    """
+
+    def __init__(self, limit: int, interval: float, header: Optional[str] = None) -> None:
+        self.limit = limit
+        self.interval = interval
+        self.header = header
+        self.used = 0
+        self._window = 0
+
+    def _roll(self, now: float) -> None:
+        window = int(now // self.interval)
+        if window != self._window:
+            self._window = window
+            self.used = 0
+
+    def delay(self, amount: int = 1, now: Optional[float] = None) -> float:
+        """Seconds to wait before amount fits into the budget, 0 if it fits now."""
+
+        now = time.time() if now is None else now
+        self._roll(now)
+        if self.used == 0 or self.used + amount <= self.limit:
+            return 0.0
+        return (self._window + 1) * self.interval - now
+
+    def charge(self, amount: int = 1) -> None:
+        self._roll(time.time())
+        self.used += amount
+
+    @property
+    def remaining(self) -> int:
+        self._roll(time.time())
+        return max(self.limit - self.used, 0)
+
+    async def acquire(self, amount: int = 1) -> None:
+        while True:
+            wait = self.delay(amount)
+            if wait <= 0:
+                self.charge(amount)
+                return
+            # don't sleep past the deadline of the call
+            deadline.check("rate_limit", wait)
+            await asyncio.sleep(wait)
+
+    def update(self, headers: Any) -> None:
+        if self.header is None:
+            return
+        value = headers.get(self.header)
+        if value is None:
+            return
+        self._roll(time.time())
+        self.used = max(self.used, int(value))
+
+
+class WeightLimiter(RateLimiter):
+    """Request weight per IP, shared by every API key used from it."""
+
+    def __init__(self, limit: int = 6000) -> None:
+        super().__init__(limit, 60, "x-mbx-used-weight-1m")
+
+
+class OrderCountLimiter:
+    """Order rate limits of one account: per 10 seconds and per day."""
+
+    def __init__(self, per_10s: int = 50, per_day: int = 160000) -> None:
+        self.limiters = (
+            RateLimiter(per_10s, 10, "x-mbx-order-count-10s"),
+            RateLimiter(per_day, 86400, "x-mbx-order-count-1d"),
+        )
+
+    def delay(self, amount: int = 1, now: Optional[float] = None) -> float:
+        return max(limiter.delay(amount, now) for limiter in self.limiters)
+
+    @property
+    def remaining(self) -> int:
+        return min(limiter.remaining for limiter in self.limiters)
+
+    async def acquire(self, amount: int = 1) -> None:
+        while True:
+            wait = self.delay(amount)
+            if wait <= 0:
+                for limiter in self.limiters:
+                    limiter.charge(amount)
+                return
+            deadline.check("rate_limit", wait)
+            await asyncio.sleep(wait)
+
+    def update(self, headers: Any) -> None:
+        for limiter in self.limiters:
+            limiter.update(headers)
+
+
+class SharedRateLimiter:
+    """RateLimiter whose counter lives in shared memory, so several processes draw
+    from one budget. Pass it to child processes when they are created.
+    """
+
+    def __init__(self, limit: int, interval: float, header: Optional[str] = None, ctx: Any = None) -> None:
+        ctx = ctx or multiprocessing.get_context()
+        self.limit = limit
+        self.interval = interval
+        self.header = header
+        # [window, used]
+        self._state = ctx.Array("q", 2)
+
+    def _roll(self, now: float) -> None:
+        window = int(now // self.interval)
+        if self._state[0] != window:
+            self._state[0] = window
+            self._state[1] = 0
+
+    def try_acquire(self, amount: int = 1, now: Optional[float] = None) -> float:
+        """Charge amount if it fits and return 0, otherwise return seconds to wait."""
+
+        now = time.time() if now is None else now
+        with self._state.get_lock():
+            self._roll(now)
+            used = self._state[1]
+            if used == 0 or used + amount <= self.limit:
+                self._state[1] = used + amount
+                return 0.0
+            return (self._state[0] + 1) * self.interval - now
+
+    @property
+    def used(self) -> int:
+        with self._state.get_lock():
+            self._roll(time.time())
+            return self._state[1]
+
+    @property
+    def remaining(self) -> int:
+        return max(self.limit - self.used, 0)
+
+    async def acquire(self, amount: int = 1) -> None:
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            deadline.check("rate_limit", wait)
+            await asyncio.sleep(wait)
+
+    def update(self, headers: Any) -> None:
+        if self.header is None:
+            return
+        value = headers.get(self.header)
+        if value is None:
+            return
+        with self._state.get_lock():
+            self._roll(time.time())
+            self._state[1] = max(self._state[1], int(value))
+
+
+class SharedWeightLimiter(SharedRateLimiter):
+    def __init__(self, limit: int = 6000, ctx: Any = None) -> None:
+        super().__init__(limit, 60, "x-mbx-used-weight-1m", ctx)
@@ -9,10 +9,9 @@ def async_delayed_notification(timeout: int):
         async def wrapper(self, *args, **kwargs):
             start_time = datetime.now()
             task = asyncio.ensure_future(func(self, *args, **kwargs))
-            try:
-                # Wait for the task to complete with a timeout
-                await asyncio.wait_for(task, timeout)
-            except asyncio.TimeoutError:
+            # Wait for the task to complete with a timeout, unlike wait_for this does not cancel it
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if not done:
                 end_time = datetime.now()
                 duration = (end_time - start_time).total_seconds()
                 print(f"Function {func.__name__} took too long ({duration:.2f} seconds) to complete.")
@@ -0,0 +1,152 @@
+import math
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+
+class Summary:
+    """Count, sum, min, max and last value of an observed quantity."""
+
+    __slots__ = ("count", "total", "min", "max", "last")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last = math.nan
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "min": self.min, "max": self.max, "last": self.last}
+
+
+class Metrics:
+    """Counters and summaries of client calls, keyed by (metric, endpoint).
+
+    Pass one to a client as `metrics=`; it records
+      deadline.leftover  seconds left of the deadline when a response arrived
+      deadline.exceeded.<phase>  calls that ran out of time in that phase
+
+    metrics = Metrics()
+    client = Spot(api_key, api_secret, metrics=metrics)
+    metrics.snapshot()["deadline.leftover"]["POST /api/v3/order"]
+    """
+
+    def __init__(self) -> None:
+        self.counters: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.summaries: Dict[Tuple[str, str], Summary] = defaultdict(Summary)
+
+    def increment(self, metric: str, endpoint: str, amount: int = 1) -> None:
+        self.counters[metric, endpoint] += amount
+
+    def observe(self, metric: str, endpoint: str, value: float) -> None:
+        self.summaries[metric, endpoint].observe(value)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        result: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        for (metric, endpoint), count in self.counters.items():
+            result[metric][endpoint] = count
+        for (metric, endpoint), summary in self.summaries.items():
+            result[metric][endpoint] = summary.to_dict()
+        return dict(result)
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.summaries.clear()
+
+
+class Histogram:
+    """Log-linear histogram in the style of HdrHistogram.
+
+    Values below 2**significant_bits are counted exactly, larger ones in buckets whose
+    width is at most 2**-(significant_bits - 1) of their value (< 1.6% for 7 bits), so
+    memory stays a few KB whatever the range and percentiles keep that precision.
+    Record integers, e.g. latencies in microseconds.
+    """
+
+    __slots__ = ("bits", "sub", "half", "counts", "count", "total", "min", "max")
+
+    def __init__(self, significant_bits: int = 7) -> None:
+        self.bits = significant_bits
+        self.sub = 1 << significant_bits
+        self.half = self.sub >> 1
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value: int) -> int:
+        if value < self.sub:
+            return value
+        shift = value.bit_length() - self.bits
+        return self.sub + (shift - 1) * self.half + (value >> shift) - self.half
+
+    def _value(self, index: int) -> int:
+        """Highest value counted in a bucket."""
+
+        if index < self.sub:
+            return index
+        shift, offset = divmod(index - self.sub, self.half)
+        shift += 1
+        return ((offset + self.half + 1) << shift) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        value = max(int(value), 0)
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        if other.bits != self.bits:
+            raise ValueError("histograms differ in precision")
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q: float) -> int:
+        """Value at percentile q (0-100), within the bucket precision."""
+
+        if not self.count:
+            return 0
+        rank = max(int(math.ceil(q / 100 * self.count)), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._value(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def to_dict(self, percentiles=(50, 90, 99, 99.9)) -> Dict[str, Any]:
+        result = {"count": self.count, "mean": self.mean, "min": self.min, "max": self.max}
+        for q in percentiles:
+            result[f"p{q:g}"] = self.percentile(q)
+        return result
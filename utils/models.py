@@ -0,0 +1,247 @@
+from array import array
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# marks numeric string fields; decoded to Decimal, or scaled int if PRICE_SCALE is set
+NUM = "num"
+
+
+def to_scaled(value: str, scale: int) -> int:
+    """Convert a decimal string such as "0.00123000" into an int scaled by 10**scale,
+    without going through float. Extra fraction digits are truncated.
+    """
+    negative = value.startswith("-")
+    if negative:
+        value = value[1:]
+    whole, _, frac = value.partition(".")
+    frac = (frac + "0" * scale)[:scale]
+    result = int(whole or "0") * 10 ** scale + int(frac or "0")
+    return -result if negative else result
+
+
+class _LazyField:
+    """Reads the raw value from a slot and decodes it on first access."""
+
+    __slots__ = ("slot", "kind")
+
+    def __init__(self, slot, kind):
+        self.slot = slot
+        self.kind = kind
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj, owner)
+        if self.kind is None or type(value) is not str:
+            return value
+        if self.kind is NUM:
+            scale = owner.PRICE_SCALE if owner is not None else type(obj).PRICE_SCALE
+            value = Decimal(value) if scale is None else to_scaled(value, scale)
+        else:
+            value = self.kind(value)
+        self.slot.__set__(obj, value)
+        return value
+
+
+class RecordMeta(type):
+    """Builds a __slots__ record class from its `_fields` spec.
+
+    `_fields` is a sequence of (key, kind) pairs, where key is the field name used by
+    the Binance response and kind is None (keep as is), NUM or a callable decoder.
+    """
+
+    def __new__(cls, name, bases, class_dict):
+        if "_fields" not in class_dict:
+            class_dict.setdefault("__slots__", ())
+            return super().__new__(cls, name, bases, class_dict)
+        fields = class_dict["_fields"]
+        class_dict["__slots__"] = tuple("_" + key for key, _ in fields)
+        record_cls = super().__new__(cls, name, bases, class_dict)
+        slots = []
+        for key, kind in fields:
+            slot = record_cls.__dict__["_" + key]
+            setattr(record_cls, key, _LazyField(slot, kind))
+            slots.append((key, slot))
+        record_cls._slots = tuple(slots)
+        return record_cls
+
+
+class Record(metaclass=RecordMeta):
+    # None: numeric fields decode to Decimal; an int n: decode to int scaled by 10**n
+    PRICE_SCALE: Optional[int] = None
+    _fields: Sequence = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        obj = cls.__new__(cls)
+        get = data.get
+        for key, slot in cls._slots:
+            slot.__set__(obj, get(key))
+        return obj
+
+    @classmethod
+    def from_list(cls, data: Iterable[Dict[str, Any]]) -> List["Record"]:
+        from_dict = cls.from_dict
+        return [from_dict(item) for item in data]
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key, _ in self._slots}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key, _ in self._slots[:4])
+        return f"{type(self).__name__}({fields}, ...)"
+
+
+class Order(Record):
+    """Item of get_order, get_open_orders and get_orders."""
+
+    _fields = (
+        ("symbol", None),
+        ("orderId", None),
+        ("orderListId", None),
+        ("clientOrderId", None),
+        ("price", NUM),
+        ("origQty", NUM),
+        ("executedQty", NUM),
+        ("cummulativeQuoteQty", NUM),
+        ("status", None),
+        ("timeInForce", None),
+        ("type", None),
+        ("side", None),
+        ("stopPrice", NUM),
+        ("icebergQty", NUM),
+        ("time", None),
+        ("updateTime", None),
+        ("isWorking", None),
+        ("workingTime", None),
+        ("origQuoteOrderQty", NUM),
+        ("selfTradePreventionMode", None),
+    )
+
+
+class Trade(Record):
+    """Item of my_trades."""
+
+    _fields = (
+        ("symbol", None),
+        ("id", None),
+        ("orderId", None),
+        ("orderListId", None),
+        ("price", NUM),
+        ("qty", NUM),
+        ("quoteQty", NUM),
+        ("commission", NUM),
+        ("commissionAsset", None),
+        ("time", None),
+        ("isBuyer", None),
+        ("isMaker", None),
+        ("isBestMatch", None),
+    )
+
+
+class Ticker24hr(Record):
+    """Item of ticker_24hr."""
+
+    _fields = (
+        ("symbol", None),
+        ("priceChange", NUM),
+        ("priceChangePercent", NUM),
+        ("weightedAvgPrice", NUM),
+        ("prevClosePrice", NUM),
+        ("lastPrice", NUM),
+        ("lastQty", NUM),
+        ("bidPrice", NUM),
+        ("bidQty", NUM),
+        ("askPrice", NUM),
+        ("askQty", NUM),
+        ("openPrice", NUM),
+        ("highPrice", NUM),
+        ("lowPrice", NUM),
+        ("volume", NUM),
+        ("quoteVolume", NUM),
+        ("openTime", None),
+        ("closeTime", None),
+        ("firstId", None),
+        ("lastId", None),
+        ("count", None),
+    )
+
+
+TICKER_INT_COLUMNS = ("openTime", "closeTime", "firstId", "lastId", "count")
+TICKER_NUM_COLUMNS = tuple(key for key, kind in Ticker24hr._fields if kind is NUM)
+
+
+class TickerTable:
+    """Struct-of-arrays view over a full market ticker_24hr response.
+
+    Each column is a compact `array.array`: numeric string fields are stored as
+    doubles ("d"), or as int64 scaled by 10**scale ("q") when scale is given.
+    Only the requested columns are decoded.
+
+    table = TickerTable.from_list(await client.ticker_24hr())
+    table["lastPrice"][table.index["BTCUSDT"]]
+    """
+
+    __slots__ = ("symbols", "index", "columns", "scale")
+
+    def __init__(self, symbols: List[str], columns: Dict[str, array], scale: Optional[int] = None):
+        self.symbols = symbols
+        self.index = {symbol: i for i, symbol in enumerate(symbols)}
+        self.columns = columns
+        self.scale = scale
+
+    @classmethod
+    def from_list(
+        cls,
+        data: Sequence[Dict[str, Any]],
+        columns: Optional[Sequence[str]] = None,
+        scale: Optional[int] = None,
+    ) -> "TickerTable":
+        if columns is None:
+            columns = TICKER_NUM_COLUMNS + TICKER_INT_COLUMNS
+        symbols = [item["symbol"] for item in data]
+        decoded = {}
+        for name in columns:
+            if name in TICKER_INT_COLUMNS:
+                decoded[name] = array("q", [item.get(name) or 0 for item in data])
+            elif scale is None:
+                decoded[name] = array("d", [float(item.get(name) or 0) for item in data])
+            else:
+                decoded[name] = array("q", [to_scaled(item.get(name) or "0", scale) for item in data])
+        return cls(symbols, decoded, scale)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __getitem__(self, column: str) -> array:
+        return self.columns[column]
+
+    def row(self, symbol: str) -> Dict[str, Any]:
+        i = self.index[symbol]
+        row = {"symbol": symbol}
+        for name, values in self.columns.items():
+            row[name] = values[i]
+        return row
+
+
+def orders(data: Iterable[Dict[str, Any]]) -> List[Order]:
+    return Order.from_list(data)
+
+
+def trades(data: Iterable[Dict[str, Any]]) -> List[Trade]:
+    return Trade.from_list(data)
+
+
+def ticker_table(data: Any, columns: Optional[Sequence[str]] = None, scale: Optional[int] = None) -> TickerTable:
+    if isinstance(data, dict):
+        data = [data]
+    return TickerTable.from_list(data, columns, scale)
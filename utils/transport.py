@@ -0,0 +1,190 @@
+import asyncio
+import time
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+
+import aiohttp
+from aiohttp.client import ClientTimeout
+from yarl import URL
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class Response(NamedTuple):
+    status: int
+    # case insensitive
+    headers: Mapping[str, str]
+    body: bytes
+
+
+class ConnectionStats:
+    """Use of one pooled connection, keyed by its local address."""
+
+    __slots__ = ("opened", "last_used", "requests", "last_rtt", "errors")
+
+    def __init__(self, now: float) -> None:
+        self.opened = now
+        self.last_used = now
+        self.requests = 0
+        self.last_rtt = 0.0
+        # consecutive error responses (5xx) seen on it
+        self.errors = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.errors == 0
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "age": now - self.opened,
+            "idle": now - self.last_used,
+            "requests": self.requests,
+            "last_rtt": self.last_rtt,
+            "healthy": self.healthy,
+        }
+
+
+class Transport:
+    """Sends one HTTP request for BinanceBase and returns the whole response.
+
+    `url` already carries the encoded (and signed) query string and must be sent as is,
+    `headers` are complete (the client's defaults and the api key).
+    Implementations raise asyncio.TimeoutError when `timeout` (total seconds) passes
+    and ConnectionError / aiohttp.ClientConnectionError when the connection fails, so
+    the breakers and deadlines treat every transport alike.
+
+    `track` keeps ConnectionStats per connection; entries idle for longer than
+    `idle_timeout` are taken as closed by the pool.
+    """
+
+    idle_timeout: float = 60.0
+
+    def __init__(self) -> None:
+        self.connections: Dict[Any, ConnectionStats] = {}
+        self.failures = 0
+
+    def track(self, key: Any, rtt: float, status: int) -> None:
+        now = time.monotonic()
+        stats = self.connections.get(key)
+        if stats is None or now - stats.last_used > self.idle_timeout:
+            stats = self.connections[key] = ConnectionStats(now - rtt)
+        stats.last_used = now
+        stats.requests += 1
+        stats.last_rtt = rtt
+        stats.errors = stats.errors + 1 if status >= 500 else 0
+
+    def connection_stats(self) -> Dict[Any, Dict[str, Any]]:
+        now = time.monotonic()
+        for key in [k for k, v in self.connections.items() if now - v.last_used > self.idle_timeout]:
+            del self.connections[key]
+        return {key: stats.to_dict(now) for key, stats in self.connections.items()}
+
+    async def request(
+        self, method: str, url: str, headers: Dict[str, str], timeout: float, proxy: Any = None
+    ) -> Response:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class AiohttpTransport(Transport):
+    """HTTP/1.1 over a pool of keep-alive connections, one request per connection at a time."""
+
+    def __init__(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        connection_limit: int = 100,
+        idle_timeout: float = 60.0,
+        dns_ttl: int = 300,
+    ) -> None:
+        super().__init__()
+        self._owns_session = session is None
+        # aiohttp drops idle sockets after 15s and re-resolves dns every 10s by default,
+        # keep both longer so a prewarmed pool stays usable between heartbeats
+        self.idle_timeout = idle_timeout
+        self.session = session or aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=connection_limit, keepalive_timeout=idle_timeout, ttl_dns_cache=dns_ttl
+            )
+        )
+
+    async def request(
+        self, method: str, url: str, headers: Dict[str, str], timeout: float, proxy: Any = None
+    ) -> Response:
+        start = time.monotonic()
+        try:
+            async with self.session.request(
+                method, URL(url, encoded=True), headers=headers, timeout=ClientTimeout(total=timeout), proxy=proxy
+            ) as response:
+                body = await response.read()
+            # small bodies are read eagerly and the connection released before we get here
+            protocol = response.connection.protocol if response.connection else getattr(response, "_protocol", None)
+            transport = getattr(protocol, "transport", None)
+            key = transport.get_extra_info("sockname") if transport is not None else None
+        except Exception:
+            self.failures += 1
+            raise
+        self.track(key, time.monotonic() - start, response.status)
+        return Response(response.status, response.headers, body)
+
+    async def close(self) -> None:
+        if self._owns_session:
+            await self.session.close()
+
+
+class HttpxTransport(Transport):
+    """HTTP/2 through httpx: concurrent requests are multiplexed as streams over a few
+    connections instead of opening one connection per request in flight.
+
+    Over https HTTP/2 is negotiated with ALPN; for a plain http server that speaks
+    HTTP/2 (e.g. example/mock_server.py under hypercorn) pass http1=False.
+    Requires `pip install httpx[http2]`.
+
+    client = Spot(api_key, api_secret, transport=HttpxTransport())
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        http1: bool = True,
+        max_connections: int = 10,
+        proxy: Optional[str] = None,
+        idle_timeout: float = 60.0,
+    ) -> None:
+        if httpx is None:
+            raise ImportError("HttpxTransport requires httpx, install it with `pip install httpx[http2]`")
+        super().__init__()
+        self.idle_timeout = idle_timeout
+        self.client = httpx.AsyncClient(
+            http1=http1,
+            http2=http2,
+            proxy=proxy,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=idle_timeout,
+            ),
+        )
+
+    async def request(
+        self, method: str, url: str, headers: Dict[str, str], timeout: float, proxy: Any = None
+    ) -> Response:
+        start = time.monotonic()
+        try:
+            response = await self.client.request(method, url, headers=headers, timeout=timeout)
+        except httpx.TimeoutException as e:
+            self.failures += 1
+            raise asyncio.TimeoutError(str(e)) from e
+        except httpx.TransportError as e:
+            self.failures += 1
+            raise ConnectionError(str(e)) from e
+        stream = response.extensions.get("network_stream")
+        key = stream.get_extra_info("client_addr") if stream is not None else None
+        self.track(key, time.monotonic() - start, response.status_code)
+        return Response(response.status_code, response.headers, response.content)
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,108 @@
+from typing import Any, Dict, Optional
+
+# request weight (IP) of the spot endpoints, see https://binance-docs.github.io/apidocs/spot/en/#limits
+# endpoints whose weight depends on the method or the parameters are in request_weight
+WEIGHTS: Dict[str, int] = {
+    "/api/v3/ping": 1,
+    "/api/v3/time": 1,
+    "/api/v3/exchangeInfo": 20,
+    "/api/v3/trades": 25,
+    "/api/v3/historicalTrades": 25,
+    "/api/v3/aggTrades": 2,
+    "/api/v3/klines": 2,
+    "/api/v3/uiKlines": 2,
+    "/api/v3/avgPrice": 2,
+    "/api/v3/order": 1,
+    "/api/v3/order/test": 1,
+    "/api/v3/order/cancelReplace": 1,
+    "/api/v3/order/oco": 1,
+    "/api/v3/orderList": 1,
+    "/api/v3/allOrderList": 20,
+    "/api/v3/openOrderList": 6,
+    "/api/v3/allOrders": 20,
+    "/api/v3/myTrades": 20,
+    "/api/v3/account": 20,
+    "/api/v3/rateLimit/order": 40,
+    "/sapi/v1/system/status": 1,
+    "/sapi/v1/capital/config/getall": 10,
+    "/sapi/v1/accountSnapshot": 2400,
+    "/sapi/v1/account/status": 1,
+    "/sapi/v1/account/apiTradingStatus": 1,
+    "/sapi/v1/asset/assetDetail": 1,
+    "/sapi/v1/asset/tradeFee": 1,
+    "/sapi/v1/asset/get-funding-asset": 1,
+    "/sapi/v3/asset/getUserAsset": 5,
+    "/sapi/v1/account/apiRestrictions": 1,
+}
+
+# requests that count towards the order rate limits (x-mbx-order-count-*)
+ORDER_PATHS = {
+    ("POST", "/api/v3/order"),
+    ("POST", "/api/v3/order/oco"),
+    ("POST", "/api/v3/order/cancelReplace"),
+}
+
+
+def symbol_count(params: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Number of symbols requested, None when the request covers the whole market."""
+
+    if not params:
+        return None
+    if params.get("symbol"):
+        return 1
+    symbols = params.get("symbols")
+    if not symbols:
+        return None
+    if isinstance(symbols, str):
+        return symbols.count(",") + 1
+    return len(symbols)
+
+
+def depth_weight(limit: Optional[int]) -> int:
+    limit = limit or 100
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
+def ticker_24hr_weight(count: Optional[int]) -> int:
+    if count is None or count > 100:
+        return 80
+    if count > 20:
+        return 40
+    return 2
+
+
+def rolling_window_weight(count: Optional[int]) -> int:
+    # 4 per symbol, capped at 200
+    if count is None:
+        return 200
+    return min(4 * count, 200)
+
+
+def request_weight(http_method: str, url_path: str, params: Optional[Dict[str, Any]] = None) -> int:
+    """Weight (IP) a request will consume."""
+
+    if url_path == "/api/v3/depth":
+        return depth_weight((params or {}).get("limit"))
+    if url_path == "/api/v3/ticker/24hr":
+        return ticker_24hr_weight(symbol_count(params))
+    if url_path in ("/api/v3/ticker/price", "/api/v3/ticker/bookTicker"):
+        # a symbols list costs as much as the whole market
+        return 2 if (params or {}).get("symbol") else 4
+    if url_path == "/api/v3/ticker":
+        return rolling_window_weight(symbol_count(params))
+    if url_path == "/api/v3/openOrders":
+        if http_method == "DELETE":
+            return 1
+        return 6 if (params or {}).get("symbol") else 80
+    if url_path in ("/api/v3/order", "/api/v3/orderList") and http_method == "GET":
+        # queries, placing and cancelling cost 1
+        return 4
+    if url_path == "/api/v3/myTrades" and (params or {}).get("orderId") is not None:
+        return 5
+    return WEIGHTS.get(url_path, 1)